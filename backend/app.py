@@ -1,20 +1,33 @@
 import os
 
-from flask import Flask, jsonify, send_from_directory
-from flask_smorest import Api
+from flask import Flask, jsonify
 from werkzeug.exceptions import HTTPException
 
-from config import Config
+from config import get_config
 from db import db
+from cache import init_cache
+from cache_warmup import init_cache_warmup
+from compression import init_compression
+from db_pool import engine_options
+from metrics import init_metrics
+from openapi_spec import LazySpecApi
+from slow_queries import init_slow_query_log
+from report_ingest import init_report_ingestion
+from scan_analytics import init_scan_analytics
+from static_assets import init_static_assets
 
 # Import all models so SQLAlchemy recognizes them
 from models.user import User
 from models.report import Report
+from models.report_summary import ReportSummary
 from models.product import Product
 from models.brand import Brand
 from models.category import Category
 from models.brand_alternative import BrandAlternative
+from models.scan_count import ScanCount
+from models.unknown_barcode import UnknownBarcode
 
+from resources.admin import blp as admin_blp
 from resources.auth import blp as auth_blp
 from resources.barcode import blp as barcode_blp
 from resources.categories import blp as categories_blp
@@ -32,6 +45,23 @@ def custom_schema_name_resolver(schema):
     return schema.__class__.__name__
 
 
+def configure_spec(spec):
+    """Spec customizations, applied when the OpenAPI document is first built."""
+    # Add security scheme for Bearer token
+    spec.components.security_scheme("BearerAuth", {
+        "type": "http",
+        "scheme": "bearer",
+        "bearerFormat": "JWT",
+        "description": "JWT token for authentication"
+    })
+
+    # Apply custom schema name resolver to the MarshmallowPlugin
+    # that flask-smorest created
+    for plugin in spec.plugins:
+        if hasattr(plugin, 'converter') and hasattr(plugin.converter, 'schema_name_resolver'):
+            plugin.converter.schema_name_resolver = custom_schema_name_resolver
+
+
 def register_error_handlers(app: Flask) -> None:
     @app.errorhandler(HTTPException)
     def handle_http_exception(e: HTTPException):
@@ -45,8 +75,7 @@ def register_error_handlers(app: Flask) -> None:
     @app.errorhandler(Exception)
     def handle_unexpected_exception(e: Exception):
         # Log the full error for debugging
-        import traceback
-        traceback.print_exc()
+        app.logger.exception("Unhandled exception")
         # consistent format for unexpected crashes
         return jsonify({
             "status": "error",
@@ -55,52 +84,84 @@ def register_error_handlers(app: Flask) -> None:
         }), 500
 
 
-def create_app():
+def create_app(config_object=None):
     frontend_path = os.path.abspath(
         os.path.join(os.path.dirname(__file__), "..", "frontend")
     )
     app = Flask(__name__, static_folder=frontend_path, static_url_path="/static")
-    app.config.from_object(Config)
+    app.config.from_object(config_object or get_config())
     # ✅ Add this one line
     register_error_handlers(app)
-
+    if app.config["COMPRESS_ENABLED"]:
+        init_compression(app)
+    if app.config["METRICS_ENABLED"]:
+        init_metrics(app)
+    # Optional subsystems are imported only when enabled (cold start)
+    if app.config["CACHE_ENABLED"]:
+        init_cache(app)
+    if app.config["SQL_PROFILING"]:
+        from sql_profiler import init_sql_profiler
+        init_sql_profiler(app)
+
+    if not app.config.get("SQLALCHEMY_ENGINE_OPTIONS"):
+        app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(app.config)
     db.init_app(app)
-    api = Api(app)
-    
-    # Add security scheme for Bearer token
-    api.spec.components.security_scheme("BearerAuth", {
-        "type": "http",
-        "scheme": "bearer",
-        "bearerFormat": "JWT",
-        "description": "JWT token for authentication"
-    })
-    
-    # Apply custom schema name resolver to the MarshmallowPlugin
-    # that flask-smorest created
-    for plugin in api.spec.plugins:
-        if hasattr(plugin, 'converter') and hasattr(plugin.converter, 'schema_name_resolver'):
-            plugin.converter.schema_name_resolver = custom_schema_name_resolver
-    
+    if app.config["DATABASE_REPLICA_URLS"]:
+        from read_replicas import init_read_replicas
+        init_read_replicas(app)
+    if app.config["SLOW_QUERY_MS"] > 0:
+        init_slow_query_log(app)
+    if app.config["REPORT_INGESTION_MODE"] == "queue":
+        init_report_ingestion(app)
+    if app.config["SCAN_ANALYTICS_ENABLED"]:
+        init_scan_analytics(app)
+    if app.config["CACHE_ENABLED"] and app.config["CACHE_WARMUP_ENABLED"]:
+        init_cache_warmup(app)
+    if app.config["CATALOG_INDEX_ENABLED"]:
+        from catalog_index import init_catalog_index
+        init_catalog_index(app)
+    api = LazySpecApi(app, configure_spec=configure_spec)
+
     api.register_blueprint(auth_blp)
     api.register_blueprint(barcode_blp)
     api.register_blueprint(categories_blp)
     api.register_blueprint(brands_blp)
     api.register_blueprint(products_blp)
     api.register_blueprint(reports_blp)
+    api.register_blueprint(admin_blp)
     # api.register_blueprint(search_blp)  # (delete if endpoint removed)
 
+    static_assets = init_static_assets(app, frontend_path)
+
     @app.get("/")
     def home():
-        return send_from_directory(frontend_path, "index.html")
+        return static_assets.index_response()
 
     @app.get("/health")
     def health():
         return {"message": "Boycott API Running!"}
 
+    @app.get("/ready")
+    def ready():
+        # Readiness probe; /health stays the liveness probe
+        warmer = app.extensions.get("cache_warmup")
+        if warmer is not None and not warmer.ready():
+            return {"message": "Warming up"}, 503
+        return {"message": "Ready"}
+
     return app
 
 
-app = create_app()
+def __getattr__(name):
+    # `from app import app` (scripts, `flask run`) builds the default app on
+    # first use instead of at import, so importing create_app stays cheap
+    if name == "app":
+        global app
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 if __name__ == "__main__":
-    app.run(debug=False, host="0.0.0.0", port=5000)
+    # Development server only; production runs gunicorn -c gunicorn.conf.py wsgi:app
+    create_app().run(debug=False, host="0.0.0.0", port=5000)
@@ -0,0 +1,241 @@
+# FILE: asgi.py
+"""
+Async (ASGI) read path for barcode scans and catalog GETs:
+
+    uvicorn asgi:app --workers 2
+
+Serves /barcode/<code>, /products/<code>/alternatives and the GET
+endpoints of /brands, /products and /categories from an AsyncSession
+(asyncpg on Postgres, aiosqlite on SQLite), so one process holds many
+in-flight scans without a thread each. It runs the same query plans,
+normalization and marshmallow schemas as the Flask resources; responses
+are identical. Everything else (auth, writes, reports, Swagger) stays on
+the WSGI app - route only these GET paths here at the proxy.
+
+Barcode scans are recorded for scan analytics as on the WSGI path; the
+recorder's flusher writes through a minimal Flask app on the sync engine.
+"""
+
+import json
+import re
+from urllib.parse import parse_qsl
+
+from flask import Config as FlaskConfig, Flask
+from flask_smorest import abort
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from werkzeug.datastructures import MultiDict
+from werkzeug.exceptions import HTTPException
+from werkzeug.http import parse_accept_header
+
+from compression import Compression, negotiate
+
+from config import get_config
+from db import db
+from db_pool import engine_options as pool_engine_options
+from models.brand import Brand
+from models.category import Category
+from models.product import Product
+from resources.barcode import (
+    PRODUCT_LOAD_OPTIONS,
+    barcode_lookup_plan,
+    format_barcode_for_output,
+    product_alternatives_plan,
+)
+from resources.brands import brand_list_stmt
+from resources.categories import category_list_stmt, category_products_plan
+from resources.products import product_list_stmt
+from schema import BarcodeResultSchema, BrandSchema, CategorySchema, ProductSchema
+
+
+def async_database_url(url):
+    """Same database, async driver: asyncpg for Postgres, aiosqlite for SQLite."""
+    scheme, rest = url.split("://", 1)
+    if scheme in ("postgresql", "postgres", "postgresql+psycopg2"):
+        return f"postgresql+asyncpg://{rest}"
+    if scheme == "sqlite":
+        return f"sqlite+aiosqlite://{rest}"
+    return url
+
+
+def scan_recorder(settings):
+    """A ScanRecorder for this process (None when SCAN_ANALYTICS_ENABLED is off)."""
+    if not settings["SCAN_ANALYTICS_ENABLED"]:
+        return None
+    from scan_analytics import init_scan_analytics
+
+    # Only the flusher uses it: a Flask app just for db.session
+    flask_app = Flask(__name__)
+    flask_app.config.from_mapping(settings)
+    if not flask_app.config.get("SQLALCHEMY_ENGINE_OPTIONS"):
+        flask_app.config["SQLALCHEMY_ENGINE_OPTIONS"] = pool_engine_options(settings)
+    db.init_app(flask_app)
+    return init_scan_analytics(flask_app)
+
+
+async def run_plan_async(session, plan):
+    """Async twin of db.run_plan."""
+    try:
+        statement, many = next(plan)
+        while True:
+            result = await session.scalars(statement)
+            statement, many = plan.send(result.all() if many else result.first())
+    except StopIteration as done:
+        return done.value
+
+
+def single_plan(statement, many, not_found=None):
+    result = yield statement, many
+    if not_found and result is None:
+        abort(404, message=not_found)
+    return result
+
+
+def barcode(args, code):
+    include_reports = args.get("include") == "reports"
+    return barcode_lookup_plan(code, include_reports=include_reports), BarcodeResultSchema()
+
+
+def product_alternatives(args, code):
+    return product_alternatives_plan(code), BrandSchema(many=True)
+
+
+def brand_list(args):
+    return single_plan(brand_list_stmt(args), True), BrandSchema(many=True)
+
+
+def brand_detail(args, brand_id):
+    stmt = select(Brand).where(Brand.id == int(brand_id))
+    return single_plan(stmt, False, "Brand not found."), BrandSchema()
+
+
+def product_list(args):
+    return single_plan(product_list_stmt(args), True), ProductSchema(many=True)
+
+
+def product_detail(args, product_id):
+    stmt = select(Product).where(Product.id == int(product_id)).options(*PRODUCT_LOAD_OPTIONS)
+    return single_plan(stmt, False, "Product not found."), ProductSchema()
+
+
+def category_list(args):
+    return single_plan(category_list_stmt(), True), CategorySchema(many=True)
+
+
+def category_detail(args, category_id):
+    stmt = select(Category).where(Category.id == int(category_id))
+    return single_plan(stmt, False, "Category not found."), CategorySchema()
+
+
+def category_products(args, slug):
+    return category_products_plan(slug), ProductSchema(many=True)
+
+
+# Same URL rules as the Flask blueprints (first match wins)
+ROUTES = [
+    (re.compile(r"^/barcode/(.+)$"), barcode),
+    (re.compile(r"^/products/(\d+)$"), product_detail),
+    (re.compile(r"^/products/(.+)/alternatives$"), product_alternatives),
+    (re.compile(r"^/products$"), product_list),
+    (re.compile(r"^/brands/(\d+)$"), brand_detail),
+    (re.compile(r"^/brands$"), brand_list),
+    (re.compile(r"^/categories/(\d+)$"), category_detail),
+    (re.compile(r"^/categories/([^/]+)/products$"), category_products),
+    (re.compile(r"^/categories$"), category_list),
+]
+
+
+def error_body(code, name, message):
+    # Same shape as flask-smorest's error responses
+    return {"code": code, "status": name, "message": message}
+
+
+class AsyncCatalogApp:
+    def __init__(self, database_url=None, scans=None, **engine_options):
+        config = get_config()
+        url = database_url or config.ASYNC_DATABASE_URL or async_database_url(
+            config.SQLALCHEMY_DATABASE_URI
+        )
+        settings = FlaskConfig("")
+        settings.from_object(config)
+        if not engine_options:
+            engine_options = pool_engine_options(settings, url, is_async=True)
+        self.compression = (
+            Compression.from_config(settings) if settings["COMPRESS_ENABLED"] else None
+        )
+        self.engine = create_async_engine(url, **engine_options)
+        self.sessionmaker = async_sessionmaker(self.engine, expire_on_commit=False)
+        self.scans = scans if scans is not None else scan_recorder(settings)
+
+    def record_scan(self, barcode, found):
+        # Same events as resources/barcode.py record_scan
+        if self.scans is not None:
+            self.scans.record(barcode, found)
+
+    async def handle(self, path, query_string):
+        for pattern, handler in ROUTES:
+            match = pattern.match(path)
+            if match:
+                break
+        else:
+            return 404, error_body(404, "Not Found", "The requested URL was not found on the server.")
+
+        args = MultiDict(parse_qsl(query_string, keep_blank_values=True))
+        try:
+            plan, schema = handler(args, *match.groups())
+            async with self.sessionmaker() as session:
+                result = await run_plan_async(session, plan)
+            if handler is barcode:
+                self.record_scan(result["barcode"], found=True)
+            return 200, schema.dump(result)
+        except HTTPException as e:
+            if handler is barcode and e.code == 404:  # valid barcode, not in the catalog
+                self.record_scan(format_barcode_for_output(match.group(1)), found=False)
+            message = getattr(e, "data", {}).get("message", e.description)
+            return e.code, error_body(e.code, e.name, message)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            while True:
+                message = await receive()
+                if message["type"] == "lifespan.startup":
+                    await send({"type": "lifespan.startup.complete"})
+                elif message["type"] == "lifespan.shutdown":
+                    await self.engine.dispose()
+                    await send({"type": "lifespan.shutdown.complete"})
+                    return
+        if scope["type"] != "http":
+            return
+
+        if scope["method"] not in ("GET", "HEAD"):
+            status, payload = 405, error_body(405, "Method Not Allowed", "Read-only endpoint.")
+        else:
+            status, payload = await self.handle(
+                scope["path"], scope["query_string"].decode("latin-1")
+            )
+
+        body = json.dumps(payload).encode("utf-8")
+        headers = [(b"content-type", b"application/json")]
+        if self.compression is not None:
+            # Same negotiation and threshold as the WSGI app (compression.py)
+            headers.append((b"vary", b"Accept-Encoding"))
+            encoding = None
+            if len(body) >= self.compression.min_size:
+                accept = dict(scope["headers"]).get(b"accept-encoding", b"").decode("latin-1")
+                encoding = negotiate(parse_accept_header(accept), self.compression.algorithms)
+            if encoding:
+                body = self.compression.compress(body, encoding)
+                headers.append((b"content-encoding", encoding.encode("ascii")))
+        headers.append((b"content-length", str(len(body)).encode("ascii")))
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": headers,
+        })
+        await send({
+            "type": "http.response.body",
+            "body": b"" if scope["method"] == "HEAD" else body,
+        })
+
+
+app = AsyncCatalogApp()
@@ -1,20 +1,204 @@
 # FILE: auth_utils.py
 
+import hashlib
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
 import jwt
 from datetime import datetime, timedelta
 from functools import wraps
-from flask import current_app, g, request
+from flask import current_app, g, has_app_context, request
 from flask_smorest import abort
+from sqlalchemy import event, inspect, or_
+
+from db import db
 from models.user import User
 
+# What login_required/admin_required put in g.current_user: a detached,
+# immutable snapshot of the user (id, role, ...), never an ORM instance.
+Principal = namedtuple("Principal", "id username email role token_version")
+
+# Revocation watermark of a deleted user: no token version is valid
+DELETED_USER = float("inf")
+
+
+def principal_from_user(user):
+    return Principal(user.id, user.username, user.email, user.role, user.token_version)
+
+
+class PrincipalCache:
+    """
+    Per-app, per-process LRU of user_id -> Principal with a short TTL,
+    plus the token revocation watermarks (user_id -> minimum valid token
+    version) used when the token's role claim is trusted, and the user ids
+    seen since the last revocation refresh.
+    """
+
+    def __init__(self, ttl, maxsize=10000):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.revoked_below = {}
+        self.revocations_loaded_at = None
+        self.seen = set()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None:
+                if entry[0] >= time.monotonic():
+                    self._entries.move_to_end(user_id)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[user_id]
+            self.misses += 1
+            return None
+
+    def put(self, principal):
+        if self.ttl > 0:
+            with self._lock:
+                self._entries[principal.id] = (time.monotonic() + self.ttl, principal)
+                self._entries.move_to_end(principal.id)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+
+    def invalidate(self, user_id, token_version=None):
+        with self._lock:
+            self._entries.pop(user_id, None)
+            if token_version is not None:
+                self.revoked_below[user_id] = max(
+                    token_version, self.revoked_below.get(user_id, 0)
+                )
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        # Unlocked counters: approximate under concurrency, good enough for metrics
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+def principal_cache():
+    cache = current_app.extensions.get("auth_principals")
+    if cache is None:
+        cache = current_app.extensions.setdefault(
+            "auth_principals",
+            PrincipalCache(
+                current_app.config["AUTH_USER_CACHE_TTL"],
+                maxsize=current_app.config["AUTH_USER_CACHE_SIZE"],
+            ),
+        )
+    return cache
+
+
+def invalidate_user(user_id, token_version=None):
+    """Drop a cached principal (role change, deletion, token revocation)."""
+    if has_app_context():
+        cache = current_app.extensions.get("auth_principals")
+        if cache is not None:
+            cache.invalidate(user_id, token_version)
+
+
+@event.listens_for(User, "before_update")
+def _revoke_tokens_on_role_change(mapper, connection, target):
+    # A role claim baked into older tokens is now wrong: retire them
+    if inspect(target).attrs.role.history.has_changes():
+        target.token_version = (target.token_version or 0) + 1
+
+
+@event.listens_for(User, "after_update")
+def _invalidate_updated_user(mapper, connection, target):
+    invalidate_user(target.id, target.token_version)
+
+
+@event.listens_for(User, "after_delete")
+def _invalidate_deleted_user(mapper, connection, target):
+    invalidate_user(target.id, DELETED_USER)
+
 
-def create_access_token(user_id, user_role, expires_in=86400):
+class TokenCache:
+    """
+    Bounded LRU of verified tokens: sha256(secret, token) -> (exp, payload).
+    A hit skips the HS256 verification and claim parsing; entries are
+    only served until the token's own exp.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(secret, token):
+        return hashlib.sha256(f"{secret}\0{token}".encode("utf-8")).digest()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.time():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, payload):
+        with self._lock:
+            self._entries[key] = (payload.get("exp", 0), payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def token_cache():
+    """The app's TokenCache, or None when AUTH_TOKEN_CACHE_SIZE is 0."""
+    cache = current_app.extensions.get("auth_tokens")
+    if cache is None:
+        size = current_app.config["AUTH_TOKEN_CACHE_SIZE"]
+        if size <= 0:
+            return None
+        cache = current_app.extensions.setdefault("auth_tokens", TokenCache(size))
+    return cache
+
+
+def create_access_token(user_id, user_role, expires_in=86400, token_version=0):
     """
     Create a JWT access token (default 24 hours).
     """
     payload = {
         "user_id": user_id,
         "user_role": user_role,
+        "ver": token_version,
         "exp": datetime.utcnow() + timedelta(seconds=expires_in),
         "iat": datetime.utcnow(),
     }
@@ -36,11 +220,20 @@ def decode_token(token):
     """
     Decode and validate JWT token.
     Returns payload dict or None if invalid.
+    Verified payloads are cached until exp; treat them as read-only.
     """
+    secret = current_app.config["SECRET_KEY"]
+    cache = token_cache()
+    if cache is not None:
+        key = TokenCache.key(secret, token)
+        payload = cache.get(key)
+        if payload is not None:
+            return payload
+
     try:
-        return jwt.decode(
+        payload = jwt.decode(
             token,
-            current_app.config["SECRET_KEY"],
+            secret,
             algorithms=["HS256"],
         )
     except jwt.ExpiredSignatureError:
@@ -48,11 +241,74 @@ def decode_token(token):
     except jwt.InvalidTokenError:
         return None
 
+    if cache is not None:
+        cache.put(key, payload)
+    return payload
+
+
+def refresh_revocations(cache):
+    """
+    Trusted-claim mode: reload user_id -> token_version for users whose
+    tokens were ever revoked, at most every AUTH_REVOCATION_REFRESH_SECONDS.
+    The same query checks the user ids seen since the last refresh; those
+    no longer in the table were deleted and lose every token. This keeps
+    workers that did not perform the demotion or deletion in sync without
+    a query per request.
+    """
+    interval = current_app.config["AUTH_REVOCATION_REFRESH_SECONDS"]
+    now = time.monotonic()
+    if cache.revocations_loaded_at is not None and now - cache.revocations_loaded_at < interval:
+        return
+    with cache._lock:
+        seen, cache.seen = cache.seen, set()
+    condition = User.token_version > 0
+    if seen:
+        condition = or_(condition, User.id.in_(seen))
+    rows = db.session.query(User.id, User.token_version).filter(condition).all()
+    with cache._lock:
+        for user_id, version in rows:
+            if cache.revoked_below.get(user_id) == DELETED_USER:
+                del cache.revoked_below[user_id]  # the id belongs to a new user
+            cache.revoked_below[user_id] = max(version or 0, cache.revoked_below.get(user_id, 0))
+        for user_id in seen.difference(user_id for user_id, _ in rows):
+            cache.revoked_below[user_id] = DELETED_USER
+        cache.revocations_loaded_at = now
+
+
+def principal_for_payload(payload):
+    """
+    Resolve the token payload to a Principal.
+    Cached users cost no query; with AUTH_TRUST_TOKEN_ROLE the signed
+    role claim is used directly, checked against the revocation list.
+    """
+    user_id = payload.get("user_id")
+    version = payload.get("ver", 0)
+    cache = principal_cache()
+
+    if current_app.config["AUTH_TRUST_TOKEN_ROLE"]:
+        refresh_revocations(cache)
+        if version < cache.revoked_below.get(user_id, 0):
+            abort(401, message="Token has been revoked.")
+        cache.seen.add(user_id)
+        return Principal(user_id, None, None, payload.get("user_role"), version)
+
+    principal = cache.get(user_id)
+    if principal is None:
+        user = User.query.get(user_id)
+        if not user:
+            abort(401, message="User not found.")
+        principal = principal_from_user(user)
+        cache.put(principal)
+
+    if version < principal.token_version:
+        abort(401, message="Token has been revoked.")
+    return principal
+
 
 def get_current_user():
     """
     Extract and validate JWT from Authorization header.
-    Returns User object or aborts.
+    Returns a Principal or aborts.
     """
     auth_header = request.headers.get("Authorization")
     if not auth_header:
@@ -69,11 +325,7 @@ def get_current_user():
     if not payload:
         abort(401, message="Invalid or expired token.")
 
-    user = User.query.get(payload.get("user_id"))
-    if not user:
-        abort(401, message="User not found.")
-
-    return user
+    return principal_for_payload(payload)
 
 
 def require_admin():
@@ -0,0 +1,49 @@
+# FILE: background.py
+"""
+One background thread per worker process, for the write-behind and
+refresh helpers (report_ingest, scan_analytics, cache_warmup,
+catalog_index).
+
+Threads do not survive a pre-fork server: a thread started in the
+gunicorn master (preload_app) is gone in every worker. ensure_started()
+is therefore called from the request paths that need the thread, and
+starts it at most once per process; after a fork the child starts its
+own. `on_start` runs first, under the same lock, for per-process setup.
+
+With `enabled` off, ensure_started() does nothing: the owner's work is
+only done when called by hand (tests, scripts).
+"""
+
+import os
+import threading
+
+
+class WorkerThread:
+    def __init__(self, target, name, on_start=None, enabled=True):
+        self.target = target
+        self.name = name
+        self.on_start = on_start
+        self.enabled = enabled
+        self.thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def started(self):
+        """True if the thread was started in this process."""
+        return self._pid == os.getpid()
+
+    def ensure_started(self):
+        if not self.enabled or self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            if self.on_start is not None:
+                self.on_start()
+            self.thread = threading.Thread(target=self.target, name=self.name, daemon=True)
+            self.thread.start()
+
+    def join(self, timeout=None):
+        if self.thread is not None and self.thread.is_alive():
+            self.thread.join(timeout)
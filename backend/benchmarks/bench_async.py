@@ -0,0 +1,85 @@
+"""
+High-concurrency latency benchmark for the sync (gunicorn) and async
+(uvicorn asgi:app) read paths.
+
+Run from backend/ against running servers, e.g.:
+    python -m benchmarks.bench_async --url http://127.0.0.1:5000/barcode/6194002400707 -c 64 256
+    python -m benchmarks.bench_async --url http://127.0.0.1:8000/barcode/6194002400707 -c 64 256
+
+Opens `c` keep-alive connections from one asyncio loop (threads would be
+the bottleneck at these concurrency levels) and sends requests back to
+back for --duration seconds per level.
+"""
+
+import argparse
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+
+async def client(host, port, request, deadline, latencies, errors):
+    reader = writer = None
+    while time.perf_counter() < deadline:
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            start = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            status_line = await reader.readline()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                if name.lower() == "content-length":
+                    length = int(value)
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+            if int(status_line.split()[1]) >= 500:
+                errors.append(1)
+        except (OSError, asyncio.IncompleteReadError, IndexError, ValueError):
+            errors.append(1)
+            if writer is not None:
+                writer.close()
+            writer = None
+    if writer is not None:
+        writer.close()
+
+
+async def run_level(url, concurrency, duration):
+    parts = urlsplit(url)
+    path = parts.path + (f"?{parts.query}" if parts.query else "")
+    request = (
+        f"GET {path} HTTP/1.1\r\nHost: {parts.hostname}\r\nConnection: keep-alive\r\n\r\n"
+    ).encode("latin-1")
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(*[
+        client(parts.hostname, parts.port or 80, request, deadline, latencies, errors)
+        for _ in range(concurrency)
+    ])
+    latencies.sort()
+    pct = lambda p: latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000 if latencies else 0  # noqa: E731
+    print(
+        f"c={concurrency:<5} {len(latencies) / duration:7.0f} req/s  "
+        f"p50={pct(0.50):7.1f}ms p95={pct(0.95):7.1f}ms p99={pct(0.99):7.1f}ms  "
+        f"errors={len(errors)}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", required=True)
+    parser.add_argument("-c", "--concurrency", type=int, nargs="+", default=[16, 64, 256])
+    parser.add_argument("-d", "--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    print(args.url)
+    for level in args.concurrency:
+        asyncio.run(run_level(args.url, level, args.duration))
+
+
+if __name__ == "__main__":
+    main()
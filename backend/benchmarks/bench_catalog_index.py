@@ -0,0 +1,99 @@
+"""
+Memory footprint and lookup speed of the in-memory catalog (catalog_index.py).
+
+Run from backend/:  python -m benchmarks.bench_catalog_index [--products N] [--lookups L] [--trace]
+
+Builds a CatalogIndex from synthetic rows shaped like the production
+catalog (13-digit barcodes, product names of a few words, 1-3
+categories per product, one brand per 100 products with a third of them
+boycotted and five alternatives each). Prints the bytes held per
+component, scaled to one million products, the build time and the cost
+of one lookup. --trace builds a second time under tracemalloc and prints
+the allocations it retains, as a cross-check of the component sizes.
+"""
+
+import argparse
+import random
+import time
+import tracemalloc
+
+from catalog_index import CatalogIndex
+
+WORDS = "organic sugar free sparkling water cocoa palm oil imported local cola classic light".split()
+
+
+def rows(products, rng):
+    brands = max(products // 100, 1)
+    brand_rows = [
+        (
+            i + 1,
+            f"Brand {i}",
+            f"https://brand{i}.example.com",
+            f"https://cdn.example.com/logos/brand-{i}.png",
+            i % 3 == 0,
+            "Listed by the boycott campaign for sourcing from occupied territories" if i % 3 == 0 else None,
+        )
+        for i in range(brands)
+    ]
+    alternative_rows = [
+        (len(brand_rows) * k + i, i + 1, rng.randint(1, brands), rng.choice((None, rng.randint(1, 40))), rng.randint(1, 100))
+        for i in range(0, brands, 3)
+        for k in range(5)
+    ]
+    product_rows = [
+        (i + 1, f"{6190000000000 + i}", f"{rng.choice(WORDS).title()} {rng.choice(WORDS)} {i}", rng.randint(1, brands))
+        for i in range(products)
+    ]
+    category_rows = [
+        (i + 1, category_id)
+        for i in range(products)
+        for category_id in rng.sample(range(1, 41), rng.randint(1, 3))
+    ]
+    return product_rows, category_rows, brand_rows, alternative_rows
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--trace", action="store_true")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    source = rows(args.products, rng)
+
+    start = time.perf_counter()
+    index = CatalogIndex.build(*source)
+    build_seconds = time.perf_counter() - start
+    retained = None
+    if args.trace:
+        del index
+        tracemalloc.start()
+        index = CatalogIndex.build(*source)
+        retained, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    del source
+
+    scale = 1_000_000 / len(index)
+    report = index.memory_report()
+    print(f"{len(index):,} products, {len(index.brand_ids):,} brands, "
+          f"{len(index.alt_brands):,} alternatives, {len(index.strings):,} distinct strings")
+    print(f"built in {build_seconds:.2f}s")
+    print(f"  {'component':<20}{'MB':>10}{'MB per 1M products':>22}")
+    for name, size in report.items():
+        print(f"  {name:<20}{size / 1e6:>10.1f}{size * scale / 1e6:>22.1f}")
+    if retained is not None:
+        print(f"  {'tracemalloc':<20}{retained / 1e6:>10.1f}{retained * scale / 1e6:>22.1f}")
+    print(f"  {report['total'] / len(index):.1f} bytes per product")
+
+    barcodes = [f"{6190000000000 + rng.randrange(args.products)}" for _ in range(args.lookups)]
+    start = time.perf_counter()
+    for barcode in barcodes:
+        index.lookup(barcode)
+    seconds = time.perf_counter() - start
+    print(f"lookup: {seconds / args.lookups * 1e6:.2f} us each ({args.lookups / seconds:,.0f}/s on one core)")
+
+
+if __name__ == "__main__":
+    main()
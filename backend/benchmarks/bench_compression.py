@@ -0,0 +1,124 @@
+"""
+CPU cost vs. bytes saved for each compression algorithm and level, on our
+own payloads.
+
+Run from backend/:  python -m benchmarks.bench_compression [--products N] [--repeat R]
+
+Seeds an in-memory database with a catalog that looks like production
+(brands with boycott reasons, products with descriptions and categories,
+reports), renders the usual large responses through the app uncompressed,
+and compresses each one R times per setting. br and zstd rows appear
+only when brotli / zstandard are installed. "MB/s" is compression
+throughput on one core. "saved/ms" is KB of transfer saved per ms of CPU,
+which is what to compare when choosing COMPRESS_*_LEVEL.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("COMPRESS_ENABLED", "false")  # render payloads uncompressed
+
+from app import create_app  # noqa: E402
+import auth_utils as auth_module  # noqa: E402
+from compression import ENCODERS  # noqa: E402
+from db import db  # noqa: E402
+from models.brand import Brand  # noqa: E402
+from models.category import Category  # noqa: E402
+from models.product import Product  # noqa: E402
+from models.report import Report  # noqa: E402
+from models.user import User  # noqa: E402
+
+LEVELS = {"gzip": (1, 3, 6, 9), "br": (1, 4, 6, 11), "zstd": (1, 3, 9, 19)}
+WORDS = "organic sugar free sparkling water cocoa palm oil imported local cola classic light".split()
+
+
+def seed(products, rng):
+    categories = [Category(name=f"Category {i}", slug=f"category-{i}") for i in range(12)]
+    brands = [
+        Brand(
+            name=f"Brand {i}",
+            website=f"https://brand{i}.example.com",
+            logo_url=f"https://cdn.example.com/logos/brand-{i}.png",
+            boycott_status=i % 3 == 0,
+            reason="Listed by the boycott campaign for sourcing from occupied territories" if i % 3 == 0 else None,
+        )
+        for i in range(products // 10 + 1)
+    ]
+    user = User(username="bench", email="bench@example.com", password_hash="x", role="admin")
+    db.session.add_all([*categories, *brands, user])
+    db.session.flush()
+    for i in range(products):
+        db.session.add(Product(
+            name=f"{rng.choice(WORDS).title()} {rng.choice(WORDS)} {i}",
+            barcode=f"{6190000000000 + i}",
+            brand=rng.choice(brands),
+            description=" ".join(rng.choices(WORDS, k=rng.randint(5, 25))),
+            categories=rng.sample(categories, rng.randint(1, 3)),
+        ))
+    for i in range(200):
+        db.session.add(Report(
+            user_id=user.id,
+            barcode=f"{6190000000000 + i}",
+            message=" ".join(rng.choices(WORDS, k=rng.randint(8, 40))),
+            evidence_url=f"https://news.example.com/articles/{i}",
+        ))
+    db.session.commit()
+    return auth_module.create_access_token(user.id, "admin")
+
+
+def payloads(client, token):
+    headers = {"Authorization": f"Bearer {token}"}
+    urls = [
+        "/products?limit=100",
+        "/products?limit=20",
+        "/brands?limit=100",
+        "/reports?limit=100",
+        "/openapi.json",
+    ]
+    return {url: client.get(url, headers=headers).get_data() for url in urls}
+
+
+def measure(data, encoding, level, repeat):
+    compress = ENCODERS[encoding][0]
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = compress(data, level)
+        timings.append(time.perf_counter() - start)
+    return len(out), statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        token = seed(args.products, random.Random(args.seed))
+        bodies = payloads(app.test_client(), token)
+
+    for url, data in bodies.items():
+        print(f"{url}  {len(data) / 1024:.1f} KB uncompressed")
+        print(f"  {'encoding':<10}{'level':>6}{'KB':>9}{'ratio':>8}{'ms':>9}{'MB/s':>9}{'saved/ms':>10}")
+        for encoding in ENCODERS:
+            for level in LEVELS[encoding]:
+                size, seconds = measure(data, encoding, level, args.repeat)
+                saved_kb = (len(data) - size) / 1024
+                print(
+                    f"  {encoding:<10}{level:>6}{size / 1024:>9.1f}{len(data) / size:>8.2f}"
+                    f"{seconds * 1000:>9.3f}{len(data) / seconds / 1e6:>9.1f}"
+                    f"{saved_kb / (seconds * 1000):>10.1f}"
+                )
+        print()
+
+
+if __name__ == "__main__":
+    main()
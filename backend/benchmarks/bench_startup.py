@@ -0,0 +1,128 @@
+"""
+Startup benchmark: what a fresh worker (or test session) pays before and
+right after it can serve.
+
+Run from backend/:
+    python -m benchmarks.bench_startup --runs 5
+    python -m benchmarks.bench_startup --importtime 15
+    python -m benchmarks.bench_startup --max-import-ms 1500 --max-create-app-ms 60
+
+Each run is a new interpreter (cold imports). Reported medians:
+  import_app_ms      import app (modules only; the default app is built lazily)
+  create_app_ms      first create_app() with modules already imported
+  first_health_ms    first GET /health
+  first_openapi_ms   first GET /openapi.json (builds the spec unless prebuilt)
+  cached_openapi_ms  second GET /openapi.json
+
+--importtime N lists the N slowest modules (cumulative) from
+`python -X importtime -c "import app"`. The --max-* options turn the
+medians into a regression gate: the script exits 1 if one is exceeded.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROBE = r"""
+import json, os, time
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+t0 = time.perf_counter()
+import app as app_module
+t1 = time.perf_counter()
+app = app_module.create_app()
+t2 = time.perf_counter()
+client = app.test_client()
+client.get("/health")
+t3 = time.perf_counter()
+client.get("/openapi.json")
+t4 = time.perf_counter()
+client.get("/openapi.json")
+t5 = time.perf_counter()
+print(json.dumps({
+    "import_app_ms": (t1 - t0) * 1000,
+    "create_app_ms": (t2 - t1) * 1000,
+    "first_health_ms": (t3 - t2) * 1000,
+    "first_openapi_ms": (t4 - t3) * 1000,
+    "cached_openapi_ms": (t5 - t4) * 1000,
+}))
+"""
+
+
+def probe(env=None):
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        capture_output=True, text=True, check=True,
+        env={**os.environ, **(env or {})},
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def medians(runs, env=None):
+    samples = [probe(env) for _ in range(runs)]
+    return {key: statistics.median(s[key] for s in samples) for key in samples[0]}
+
+
+def import_times(top):
+    """[(cumulative_ms, self_ms, module)] for `import app`, slowest first."""
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app"],
+        capture_output=True, text=True, check=True,
+        env={**os.environ, "DATABASE_URL": "sqlite:///:memory:"},
+    )
+    rows = []
+    for line in out.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us) / 1000, int(self_us) / 1000, module.rstrip()))
+    rows.sort(reverse=True)
+    return rows[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--spec-file", help="also measure with OPENAPI_SPEC_FILE prebuilt here")
+    parser.add_argument("--importtime", type=int, metavar="N", help="show the N slowest imports")
+    parser.add_argument("--max-import-ms", type=float)
+    parser.add_argument("--max-create-app-ms", type=float)
+    parser.add_argument("--max-first-health-ms", type=float)
+    args = parser.parse_args()
+
+    if args.importtime:
+        print("slowest imports (cumulative ms, self ms)")
+        for cumulative, own, module in import_times(args.importtime):
+            print(f"  {cumulative:8.1f} {own:8.1f}  {module}")
+
+    results = {"lazy spec": medians(args.runs)}
+    if args.spec_file:
+        subprocess.run([sys.executable, "build_openapi.py", args.spec_file], check=True,
+                       capture_output=True, env={**os.environ, "DATABASE_URL": "sqlite:///:memory:"})
+        results["prebuilt spec"] = medians(args.runs, {"OPENAPI_SPEC_FILE": args.spec_file})
+
+    for label, values in results.items():
+        print(label)
+        for key, value in values.items():
+            print(f"  {key:<18} {value:8.1f}")
+
+    limits = {
+        "import_app_ms": args.max_import_ms,
+        "create_app_ms": args.max_create_app_ms,
+        "first_health_ms": args.max_first_health_ms,
+    }
+    failed = [
+        f"{key} {results['lazy spec'][key]:.1f} > {limit:.1f}"
+        for key, limit in limits.items()
+        if limit is not None and results["lazy spec"][key] > limit
+    ]
+    if failed:
+        print("startup budget exceeded: " + ", ".join(failed))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
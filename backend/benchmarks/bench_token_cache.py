@@ -0,0 +1,74 @@
+"""
+Per-request cost of decode_token with and without the verified-token cache.
+
+Run from backend/:  python -m benchmarks.bench_token_cache [--requests N] [--tokens K]
+
+Traffic model: K live tokens (dashboards, mobile sessions) whose request
+share follows a Zipf-like distribution, so a few admin dashboards send
+most of the calls - the reuse pattern the cache targets.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+from app import create_app  # noqa: E402
+import auth_utils as auth_module  # noqa: E402
+
+
+def run(app, tokens, stream, cache_size):
+    app.config["AUTH_TOKEN_CACHE_SIZE"] = cache_size
+    app.extensions.pop("auth_tokens", None)
+    timings = []
+    with app.app_context():
+        for index in stream:
+            start = time.perf_counter()
+            auth_module.decode_token(tokens[index])
+            timings.append(time.perf_counter() - start)
+        cache = auth_module.token_cache()
+        stats = cache.stats() if cache else None
+    return timings, stats
+
+
+def summarize(label, timings):
+    timings = sorted(timings)
+    pct = lambda p: timings[int(p * (len(timings) - 1))] * 1e6  # noqa: E731
+    print(
+        f"{label:<10} mean={statistics.mean(timings) * 1e6:7.2f}us "
+        f"p50={pct(0.50):7.2f}us p99={pct(0.99):7.2f}us"
+    )
+    return statistics.mean(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=50000)
+    parser.add_argument("--tokens", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        tokens = [
+            auth_module.create_access_token(i, "admin" if i % 10 == 0 else "user")
+            for i in range(args.tokens)
+        ]
+    rng = random.Random(args.seed)
+    weights = [1 / (rank + 1) for rank in range(args.tokens)]
+    stream = rng.choices(range(args.tokens), weights=weights, k=args.requests)
+
+    print(f"{args.requests} decodes over {args.tokens} tokens (Zipf reuse)")
+    uncached, _ = run(app, tokens, stream, cache_size=0)
+    cached, stats = run(app, tokens, stream, cache_size=4096)
+    before = summarize("no cache", uncached)
+    after = summarize("cache", cached)
+    print(f"hit rate {stats['hit_rate']:.1%}, saving {(before - after) * 1e6:.2f}us/request "
+          f"({before / after:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
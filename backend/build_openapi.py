@@ -0,0 +1,16 @@
+# Prebuild the OpenAPI document so workers serve it without building it:
+#   python build_openapi.py openapi.json
+#   OPENAPI_SPEC_FILE=openapi.json gunicorn -c gunicorn.conf.py wsgi:app
+import sys
+
+from app import create_app
+
+path = sys.argv[1] if len(sys.argv) > 1 else "openapi.json"
+
+app = create_app()
+app.config["OPENAPI_SPEC_FILE"] = None  # always build fresh from the code
+with app.app_context():
+    api = app.extensions["flask-smorest"]["apis"][""]["ext_obj"]
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(api.spec_json())
+print("OpenAPI document written:", path)
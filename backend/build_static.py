@@ -0,0 +1,17 @@
+# Fingerprint and precompress the frontend assets (see static_assets.py):
+#   python build_static.py [../frontend/build]
+#   STATIC_BUILD_DIR=../frontend/build gunicorn -c gunicorn.conf.py wsgi:app
+# Earlier builds' files are kept so pages cached before a deploy still load.
+import os
+import sys
+
+from static_assets import brotli, build_assets
+
+frontend = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "frontend"))
+out_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(frontend, "build")
+
+manifest = build_assets(frontend, out_dir)
+for source, name in sorted(manifest.items()):
+    print(f"{source} -> {name}")
+print("encodings:", "br, gzip" if brotli is not None else "gzip (pip install brotli for .br)")
+print("manifest written:", os.path.join(out_dir, "manifest.json"))
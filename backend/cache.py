@@ -0,0 +1,698 @@
+# FILE: cache.py
+"""
+Application cache: a per-process LRU in front of an optional shared tier
+that speaks the Redis protocol (CACHE_REDIS_URL), so every gunicorn
+worker and node sees one copy of each entry.
+
+Entries live in namespaces. A key is stored as
+<prefix><namespace>:<version>:<key>, where <version> is a per-namespace
+counter kept in the shared tier. Cache.clear(namespace) bumps the
+counter, which orphans every entry of the namespace at once.
+Cache.delete(namespace, key) drops a single entry. Both are broadcast on
+the <prefix>cache:invalidate pub/sub channel, and each worker's listener
+thread applies them to its local LRU right away. Local copies of shared
+entries are also capped at CACHE_LOCAL_TTL seconds, which bounds
+staleness if a broadcast is missed.
+
+Concurrent misses on one key are coalesced (Cache.get_or_set): one
+caller computes the value and the others wait for it, within a worker
+and, through a short-lived lock in the shared tier, across workers.
+
+If the shared tier is unreachable, it is treated as a miss and retried
+after a few seconds, so requests never fail because of the cache.
+Without CACHE_REDIS_URL, the cache is local to each process, and so are
+the versions and generations below: a write in one worker retires only
+that worker's entries. Every entry is then capped at CACHE_LOCAL_TTL
+seconds, which bounds how long other workers serve the old value.
+
+Every table also has a generation counter, kept the same way as a
+namespace version. A commit that wrote to a table (an INSERT, UPDATE or
+DELETE of any kind, association tables included) bumps that table's
+generation. Entries that depend on tables carry the tables' generations
+in their key, so one bump retires every dependent entry without tracking
+individual keys. Resources use the decorators:
+
+    @cached("barcode", key=canonical, tables=("products", "brands"))
+    def lookup(raw): ...              # JSON-serializable result
+
+    @blp.response(200, BrandSchema(many=True))
+    @cached_page("brands", BrandSchema(many=True), tables=("brands",),
+                 defaults={"page": 1, "limit": 20})
+    def get(self): ...                # list page, keyed on the query string
+"""
+
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from functools import wraps
+from urllib.parse import unquote, urlencode, urlsplit
+
+from flask import current_app, g, has_app_context, jsonify, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+MISSING = object()
+SHARED_RETRY_SECONDS = 5.0
+CHANNEL = "cache:invalidate"
+
+
+class CacheUnavailable(Exception):
+    """The shared tier could not be used; callers treat it as a miss."""
+
+
+class LocalCache:
+    """Bounded, thread-safe LRU with a TTL per entry."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+            self.misses += 1
+            return MISSING
+
+    def set(self, key, value, ttl):
+        if self.maxsize <= 0 or ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def read_reply(reader):
+    """One RESP2 reply from a buffered socket reader."""
+    line = reader.readline()
+    if not line.endswith(b"\r\n"):
+        raise ConnectionError("connection closed")
+    kind, rest = line[:1], line[1:-2]
+    if kind == b"+":
+        return rest.decode("utf-8")
+    if kind == b"-":
+        raise CacheUnavailable(rest.decode("utf-8"))
+    if kind == b":":
+        return int(rest)
+    if kind == b"$":
+        size = int(rest)
+        return None if size < 0 else reader.read(size + 2)[:-2]
+    if kind == b"*":
+        size = int(rest)
+        return None if size < 0 else [read_reply(reader) for _ in range(size)]
+    raise ConnectionError(f"unexpected reply {line[:20]!r}")
+
+
+class RespClient:
+    """
+    Minimal Redis (RESP2) client: one connection per thread, opened on
+    first use and again after a fork or an error.
+    """
+
+    def __init__(self, url, timeout):
+        parts = urlsplit(url)
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port or 6379
+        self.password = unquote(parts.password) if parts.password else None
+        self.db = int(parts.path.lstrip("/") or 0)
+        self.timeout = timeout
+        self._local = threading.local()
+
+    @staticmethod
+    def encode(args):
+        out = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode("utf-8")
+            out.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        return b"".join(out)
+
+    def connect(self):
+        sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        conn = (sock, sock.makefile("rb"))
+        try:
+            if self.password:
+                self._call(conn, "AUTH", self.password)
+            if self.db:
+                self._call(conn, "SELECT", self.db)
+        except Exception:
+            sock.close()
+            raise
+        return conn
+
+    def _call(self, conn, *args):
+        conn[0].sendall(self.encode(args))
+        return read_reply(conn[1])
+
+    def execute(self, *args):
+        conn = getattr(self._local, "conn", None)
+        try:
+            if conn is None or self._local.pid != os.getpid():
+                conn = self._local.conn = self.connect()
+                self._local.pid = os.getpid()
+            return self._call(conn, *args)
+        except (OSError, ConnectionError) as e:
+            if conn is not None:
+                conn[0].close()
+            self._local.conn = None
+            raise CacheUnavailable(str(e)) from e
+
+    def listen(self, channel):
+        """
+        Subscribe on a dedicated blocking connection. Yields None once
+        subscribed, then each message payload; ends when the connection
+        drops or close_listener() is called.
+        """
+        sock, reader = conn = self.connect()
+        self._listen_sock = sock
+        sock.settimeout(None)
+        try:
+            self._call(conn, "SUBSCRIBE", channel)
+            yield None
+            while True:
+                reply = read_reply(reader)
+                if reply and reply[0] == b"message":
+                    yield reply[2]
+        finally:
+            sock.close()
+
+    def close_listener(self):
+        sock = getattr(self, "_listen_sock", None)
+        if sock is not None:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+class Flight:
+    """One in-progress computation that concurrent callers wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class Cache:
+    def __init__(
+        self, local, shared=None, default_ttl=300, local_ttl=30, prefix="boycott:",
+        coalesce=True, lock_timeout=5.0,
+    ):
+        self.local = local
+        self.shared = shared
+        self.default_ttl = default_ttl
+        self.local_ttl = local_ttl
+        self.prefix = prefix
+        self.coalesce = coalesce
+        self.lock_timeout = lock_timeout
+        self._flights = {}
+        self.on_bump = []  # callables(tables), run after this worker bumps tables
+        self.origin = uuid.uuid4().hex
+        self._versions = {}
+        self._bumped_at = {}  # table -> monotonic time of its last bump seen here
+        self._lock = threading.Lock()
+        self._down_until = 0.0
+        self._subscribed = False
+        self._listener_pid = None
+        self._closed = False
+        self.shared_hits = 0
+        self.shared_misses = 0
+        self.shared_errors = 0
+        self.coalesced = 0
+
+    # --- shared tier ---
+
+    def _shared(self, *args):
+        if self.shared is None:
+            raise CacheUnavailable("no shared tier")
+        if time.monotonic() < self._down_until:
+            raise CacheUnavailable("shared tier marked down")
+        try:
+            return self.shared.execute(*args)
+        except CacheUnavailable:
+            self.shared_errors += 1
+            self._down_until = time.monotonic() + SHARED_RETRY_SECONDS
+            raise
+
+    def _publish(self, message):
+        try:
+            self._shared("PUBLISH", self.prefix + CHANNEL, json.dumps({"origin": self.origin, **message}))
+        except CacheUnavailable:
+            pass
+
+    def ensure_listener(self):
+        # One listener thread per worker process; after a fork the child starts its own
+        if self.shared is None or self._listener_pid == os.getpid():
+            return
+        with self._lock:
+            if self._listener_pid == os.getpid():
+                return
+            self._listener_pid = os.getpid()
+            self._subscribed = False
+            self._versions.clear()
+            threading.Thread(target=self._listen_loop, daemon=True).start()
+
+    def _listen_loop(self):
+        pid, backoff = os.getpid(), 0.5
+        while not self._closed and self._listener_pid == pid:
+            try:
+                for message in self.shared.listen(self.prefix + CHANNEL):
+                    if message is None:
+                        # Broadcasts may have been missed while unsubscribed
+                        with self._lock:
+                            self._versions.clear()
+                            self.local.clear()
+                            self._subscribed = True
+                        backoff = 0.5
+                    else:
+                        self._apply(json.loads(message))
+            except (CacheUnavailable, OSError, ConnectionError, ValueError):
+                pass
+            with self._lock:
+                self._subscribed = False
+                self._versions.clear()
+            if not self._closed:
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 10.0)
+
+    def _apply(self, message):
+        if message.get("origin") == self.origin:
+            return
+        if "delete" in message:
+            self.local.delete(message["delete"])
+        if "namespace" in message:
+            if message["namespace"].startswith("table:"):
+                self._bumped_at[message["namespace"][len("table:"):]] = time.monotonic()
+            with self._lock:
+                current = self._versions.get(message["namespace"], 0)
+                self._versions[message["namespace"]] = max(current, message["version"])
+
+    def close(self):
+        self._closed = True
+        if self.shared is not None:
+            self.shared.close_listener()
+
+    # --- keys ---
+
+    def version(self, namespace):
+        """Current version of a namespace, or None if it cannot be known."""
+        version = self._versions.get(namespace)
+        if version is not None:
+            return version
+        if self.shared is None:
+            return self._versions.setdefault(namespace, 0)
+        try:
+            raw = self._shared("GET", f"{self.prefix}version:{namespace}")
+        except CacheUnavailable:
+            return None
+        version = int(raw) if raw else 0
+        if self._subscribed:
+            # Kept only while broadcasts keep it current
+            with self._lock:
+                version = max(version, self._versions.get(namespace, 0))
+                self._versions[namespace] = version
+        return version
+
+    def full_key(self, namespace, key):
+        version = self.version(namespace)
+        if version is None:
+            return None
+        return f"{self.prefix}{namespace}:{version}:{key}"
+
+    # --- operations ---
+
+    def get(self, namespace, key):
+        self.ensure_listener()
+        full = self.full_key(namespace, key)
+        if full is None:
+            return MISSING
+        return self._lookup(full)
+
+    def _lookup(self, full):
+        value = self.local.get(full)
+        if value is not MISSING or self.shared is None:
+            return value
+        try:
+            raw = self._shared("GET", full)
+        except CacheUnavailable:
+            return MISSING
+        if raw is None:
+            self.shared_misses += 1
+            return MISSING
+        self.shared_hits += 1
+        value = json.loads(raw)
+        self.local.set(full, value, self.local_ttl)
+        return value
+
+    def set(self, namespace, key, value, ttl=None):
+        self.ensure_listener()
+        full = self.full_key(namespace, key)
+        if full is not None:
+            self._store(full, value, self.default_ttl if ttl is None else ttl)
+
+    def _store(self, full, value, ttl):
+        self.local.set(full, value, min(ttl, self.local_ttl))
+        if self.shared is None:
+            return
+        try:
+            self._shared("SET", full, json.dumps(value, separators=(",", ":")), "PX", int(ttl * 1000))
+        except CacheUnavailable:
+            pass
+
+    def get_or_set(self, namespace, key, compute, ttl=None, store=True):
+        """
+        Cached value, or compute() stored under the key. Concurrent misses
+        on one key share a single compute() (single flight): within the
+        worker, callers wait for the thread already computing; across
+        workers, the first to take a lock in the shared tier computes and
+        the others poll for its result. A wait longer than lock_timeout
+        gives up and computes anyway.
+        """
+        self.ensure_listener()
+        full = self.full_key(namespace, key)
+        if full is None:
+            return compute()
+        value = self._lookup(full)
+        if value is not MISSING:
+            return value
+        ttl = self.default_ttl if ttl is None else ttl
+        if not self.coalesce:
+            return self._compute(full, compute, ttl, store)
+
+        with self._lock:
+            flight = self._flights.get(full)
+            leader = flight is None
+            if leader:
+                flight = self._flights[full] = Flight()
+        if not leader:
+            self.coalesced += 1
+            if not flight.done.wait(self.lock_timeout):
+                return compute()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        try:
+            flight.value = self._compute_once(full, compute, ttl, store)
+            return flight.value
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(full, None)
+            flight.done.set()
+
+    def _compute(self, full, compute, ttl, store):
+        value = compute()
+        if store:
+            self._store(full, value, ttl)
+        return value
+
+    def _compute_once(self, full, compute, ttl, store):
+        # Values that will not be stored cannot be shared with other workers
+        if self.shared is None or not store:
+            return self._compute(full, compute, ttl, store)
+        lock = f"{full}:lock"
+        try:
+            locked = self._shared("SET", lock, self.origin, "NX", "PX", int(self.lock_timeout * 1000)) is not None
+        except CacheUnavailable:
+            return self._compute(full, compute, ttl, store)
+        if not locked:
+            self.coalesced += 1
+            value = self._await_shared(full)
+            if value is not MISSING:
+                return value
+            return self._compute(full, compute, ttl, store)
+        started = time.monotonic()
+        try:
+            return self._compute(full, compute, ttl, store)
+        finally:
+            # After lock_timeout the lock may already belong to another worker
+            if time.monotonic() - started < self.lock_timeout:
+                try:
+                    self._shared("DEL", lock)
+                except CacheUnavailable:
+                    pass
+
+    def _await_shared(self, full):
+        """Poll the shared tier for another worker's result until lock_timeout."""
+        deadline, delay = time.monotonic() + self.lock_timeout, 0.005
+        while time.monotonic() < deadline:
+            time.sleep(delay)
+            delay = min(delay * 2, 0.1)
+            try:
+                raw = self._shared("GET", full)
+            except CacheUnavailable:
+                return MISSING
+            if raw is not None:
+                value = json.loads(raw)
+                self.local.set(full, value, self.local_ttl)
+                return value
+        return MISSING
+
+    def delete(self, namespace, key):
+        full = self.full_key(namespace, key)
+        if full is None:
+            return
+        self.local.delete(full)
+        try:
+            self._shared("DEL", full)
+        except CacheUnavailable:
+            pass
+        self._publish({"delete": full})
+
+    def clear(self, namespace):
+        """Invalidate every entry of a namespace (in all workers)."""
+        if self.shared is None:
+            with self._lock:
+                self._versions[namespace] = self._versions.get(namespace, 0) + 1
+            return
+        try:
+            version = self._shared("INCR", f"{self.prefix}version:{namespace}")
+        except CacheUnavailable:
+            # Unknown shared version: stop trusting anything held locally
+            with self._lock:
+                self._versions.pop(namespace, None)
+            self.local.clear()
+            return
+        with self._lock:
+            if self._subscribed:
+                self._versions[namespace] = max(version, self._versions.get(namespace, 0))
+            else:
+                self._versions.pop(namespace, None)
+        self._publish({"namespace": namespace, "version": version})
+
+    # --- table generations ---
+
+    def generation(self, table):
+        return self.version(f"table:{table}")
+
+    def bump(self, *tables):
+        """Retire every entry keyed on these tables' generations."""
+        for table in tables:
+            self._bumped_at[table] = time.monotonic()
+            self.clear(f"table:{table}")
+        for hook in self.on_bump:
+            hook(tables)
+
+    def bumped_within(self, tables, seconds):
+        since = time.monotonic() - seconds
+        return any(self._bumped_at.get(table, since) > since for table in tables)
+
+    def table_key(self, key, tables):
+        """key@g1.g2... for the tables' current generations (None if unknown)."""
+        generations = [self.generation(table) for table in tables]
+        if None in generations:
+            return None
+        return f"{key}@{'.'.join(map(str, generations))}"
+
+    def shared_stats(self):
+        lookups = self.shared_hits + self.shared_misses
+        return {
+            "hits": self.shared_hits,
+            "misses": self.shared_misses,
+            "errors": self.shared_errors,
+            "coalesced": self.coalesced,
+            "hit_rate": self.shared_hits / lookups if lookups else 0.0,
+        }
+
+
+def normalized_query(args, defaults=None):
+    """Sorted query string with defaults applied, so "", "?page=1" and
+    "?limit=20&page=1" name the same page."""
+    items = [(k, v) for k in args for v in args.getlist(k)]
+    present = {k for k, _ in items}
+    items.extend((k, str(v)) for k, v in (defaults or {}).items() if k not in present)
+    return urlencode(sorted(items))
+
+
+def replica_policy(cache, tables):
+    """
+    (use_cache, store) for the current request under read-replica routing
+    (read_replicas.py). A client inside its read-your-writes window reads
+    the primary and skips the cache: a shared entry could predate its own
+    write. Warm-up requests also read the primary, but do fill the
+    cache. Right after a bump, a replica may still lag behind the commit,
+    so what it returns is served but not stored.
+    """
+    router = current_app.extensions.get("read_replicas")
+    if router is None:
+        return True, True
+    if g.get("read_replica") is None:
+        # Warm-up requests (cache_warmup.py) read the primary to fill it
+        return (True, True) if g.get("cache_warmup") else (False, False)
+    return True, not cache.bumped_within(tables, router.window)
+
+
+def cached(namespace, ttl=None, key=None, tables=()):
+    """
+    Cache a function's JSON-serializable result in the app cache.
+    key(*args, **kwargs) builds the key within the namespace (default:
+    the repr of the arguments); the generations of `tables` are appended,
+    so a committed write to any of them retires the entry. Without an
+    app cache it calls through.
+    """
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            cache = current_app.extensions.get("cache")
+            if cache is None:
+                return fn(*args, **kwargs)
+            use_cache, store = replica_policy(cache, tables)
+            cache_key = use_cache and cache.table_key(
+                key(*args, **kwargs) if key else repr((args, sorted(kwargs.items()))), tables
+            )
+            if not cache_key:
+                return fn(*args, **kwargs)
+            return cache.get_or_set(namespace, cache_key, lambda: fn(*args, **kwargs), ttl, store)
+
+        return wrapper
+
+    return decorator
+
+
+def cached_page(namespace, schema, tables, defaults=None, ttl=None):
+    """
+    For list views under @blp.response: cache the page's JSON body, keyed
+    on the normalized query string plus the generations of `tables`. The
+    view returns rows as usual; hits skip the query and serialization.
+    """
+
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            cache = current_app.extensions.get("cache")
+            if cache is None:
+                return fn(*args, **kwargs)
+
+            def render():
+                return jsonify(schema.dump(fn(*args, **kwargs))).get_data(as_text=True)
+
+            use_cache, store = replica_policy(cache, tables)
+            cache_key = use_cache and cache.table_key(normalized_query(request.args, defaults), tables)
+            body = cache.get_or_set(namespace, cache_key, render, ttl, store) if cache_key else render()
+            return current_app.response_class(body, mimetype=current_app.json.mimetype)
+
+        return wrapper
+
+    return decorator
+
+
+# Table generations: every INSERT/UPDATE/DELETE is noted on its connection
+# (ORM flushes, Core statements and association tables alike); when the
+# session commits, the tables it wrote get their generation bumped. The
+# bump happens after the database commit, so a reader can never cache
+# pre-commit rows under the new generation.
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _note_written_table(conn, cursor, statement, parameters, context, executemany):
+    if context is None or context.compiled is None:
+        return
+    if context.isinsert or context.isupdate or context.isdelete:
+        table = getattr(context.compiled.statement, "table", None)
+        name = getattr(table, "name", None)
+        if name:
+            conn.info.setdefault("cache_written_tables", set()).add(name)
+
+
+@event.listens_for(Session, "after_begin")
+def _track_connection(session, transaction, connection):
+    session.info.setdefault("cache_connections", []).append(connection)
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_written_tables(session):
+    tables = set()
+    for connection in session.info.pop("cache_connections", ()):
+        tables |= connection.info.pop("cache_written_tables", set())
+    if tables and has_app_context():
+        cache = current_app.extensions.get("cache")
+        if cache is not None:
+            cache.bump(*sorted(tables))
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_written_tables(session):
+    for connection in session.info.pop("cache_connections", ()):
+        connection.info.pop("cache_written_tables", None)
+
+
+def init_cache(app):
+    """Create the app cache (after init_metrics, to report its hit rates)."""
+    shared = None
+    if app.config["CACHE_REDIS_URL"]:
+        shared = RespClient(app.config["CACHE_REDIS_URL"], app.config["CACHE_REDIS_TIMEOUT"])
+    cache = Cache(
+        LocalCache(app.config["CACHE_MAXSIZE"]),
+        shared,
+        default_ttl=app.config["CACHE_DEFAULT_TTL"],
+        local_ttl=app.config["CACHE_LOCAL_TTL"],
+        prefix=app.config["CACHE_KEY_PREFIX"],
+        coalesce=app.config["CACHE_COALESCE"],
+        lock_timeout=app.config["CACHE_LOCK_TIMEOUT"],
+    )
+    app.extensions["cache"] = cache
+    metrics = app.extensions.get("metrics")
+    if metrics is not None:
+        metrics.register_cache("app_local", cache.local.stats)
+        if shared is not None:
+            metrics.register_cache("app_shared", cache.shared_stats)
+    return cache
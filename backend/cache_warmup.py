@@ -0,0 +1,136 @@
+# FILE: cache_warmup.py
+"""
+Cache warm-up: preload the hot set so a fresh worker, or one whose
+entries were just retired by a write, does not serve its first wave of
+traffic from the database.
+
+The hot set is /categories, the first pages of /brands and /products,
+and the CACHE_WARMUP_TOP_BARCODES most scanned barcodes of the last day
+(scan_analytics.py). Each URL is dispatched through the app in a
+background thread, so entries land under exactly the keys real requests
+use; warm-up requests are not recorded as scans and read the primary
+when read replicas are configured. A pass stops when its
+CACHE_WARMUP_BUDGET (seconds) runs out.
+
+A pass runs when the worker starts (gunicorn post_fork, or the first
+request) and CACHE_WARMUP_DELAY seconds after a commit in this worker
+bumps a table the hot set reads; commits made during the delay or a pass
+fold into one more pass. With a shared tier, one worker's pass fills it
+for every worker. With CACHE_WARMUP_GATE_READY, /ready answers 503 until
+the startup pass has finished.
+"""
+
+import logging
+import threading
+import time
+
+from flask import g
+
+from background import WorkerThread
+from scan_analytics import top_scanned
+
+logger = logging.getLogger(__name__)
+
+LIST_URLS = ("/categories", "/brands", "/products")
+HOT_TABLES = frozenset(("products", "brands", "brand_alternatives", "categories", "product_category"))
+HOT_WINDOW_HOURS = 24
+
+
+class CacheWarmer:
+    def __init__(self, app, top_barcodes=200, budget=10.0, delay=1.0, gate_ready=False, background=True):
+        """With `background` off passes only run when warm() is called."""
+        self.app = app
+        self.top_barcodes = top_barcodes
+        self.budget = budget
+        self.delay = delay
+        self.gate_ready = gate_ready
+        self.last_run = None
+        self._wake = threading.Event()
+        self._warmed = threading.Event()
+        self._worker = WorkerThread(self._run, "cache-warmup", on_start=self._on_start, enabled=background)
+
+    def ensure_started(self):
+        """Start this process's warm-up thread and its startup pass."""
+        self._worker.ensure_started()
+
+    def _on_start(self):
+        self._warmed.clear()
+        self._wake.set()
+
+    def tables_bumped(self, tables):
+        """Cache.on_bump hook: re-warm after a write to the hot set's tables."""
+        if HOT_TABLES.intersection(tables) and self._worker.started():
+            self._wake.set()
+
+    def ready(self):
+        self.ensure_started()
+        return not self.gate_ready or self._warmed.is_set()
+
+    def _run(self):
+        startup = True
+        while True:
+            self._wake.wait()
+            if not startup:
+                time.sleep(self.delay)  # let a burst of commits land first
+            self._wake.clear()
+            try:
+                self.warm()
+            except Exception:
+                logger.exception("Cache warm-up failed")
+            finally:
+                self._warmed.set()  # a failed pass must not hold readiness forever
+            startup = False
+
+    # --- the pass ---
+
+    def hot_barcodes(self):
+        if self.top_barcodes <= 0 or "scan_analytics" not in self.app.extensions:
+            return []
+        with self.app.app_context():
+            _, rows = top_scanned(HOT_WINDOW_HOURS, self.top_barcodes)
+        return [barcode for barcode, scans, misses in rows if misses < scans]
+
+    def fetch(self, url):
+        # A fresh app context, so the g flag cannot outlive this request
+        with self.app.app_context(), self.app.test_request_context(url):
+            g.cache_warmup = True
+            return self.app.full_dispatch_request().status_code
+
+    def warm(self):
+        """One pass over the hot set within the time budget; returns a summary."""
+        started = time.monotonic()
+        deadline = started + self.budget
+        urls = list(LIST_URLS)
+        warmed = 0
+        try:
+            urls += [f"/barcode/{barcode}" for barcode in self.hot_barcodes()]
+        except Exception:
+            logger.exception("Cache warm-up could not read the top scanned barcodes")
+        for url in urls:
+            if time.monotonic() >= deadline:
+                break
+            self.fetch(url)
+            warmed += 1
+        self.last_run = {
+            "urls": warmed,
+            "skipped": len(urls) - warmed,
+            "seconds": round(time.monotonic() - started, 3),
+        }
+        logger.info("Cache warm-up: %(urls)d URLs in %(seconds)ss, %(skipped)d over budget", self.last_run)
+        self._warmed.set()
+        return self.last_run
+
+
+def init_cache_warmup(app):
+    """Attach a warmer to the app cache (started by ensure_started)."""
+    warmer = CacheWarmer(
+        app,
+        top_barcodes=app.config["CACHE_WARMUP_TOP_BARCODES"],
+        budget=app.config["CACHE_WARMUP_BUDGET"],
+        delay=app.config["CACHE_WARMUP_DELAY"],
+        gate_ready=app.config["CACHE_WARMUP_GATE_READY"],
+    )
+    app.extensions["cache"].on_bump.append(warmer.tables_bumped)
+    app.before_request(warmer.ensure_started)
+    app.extensions["cache_warmup"] = warmer
+    return warmer
@@ -0,0 +1,364 @@
+# FILE: catalog_index.py
+"""
+In-memory catalog for /barcode/<code> (CATALOG_INDEX_ENABLED): each worker
+holds an immutable, array-backed copy of everything a lookup needs, so
+lookups never touch the database.
+
+Layout (CatalogIndex), one row per product, sorted by barcode:
+
+    keys        array('Q')  barcode as an integer (the GTIN-14 value)
+    lengths     array('B')  digits as stored, for exact-match output
+    product_ids array('I')
+    names       array('I')  -> string table
+    brands      array('I')  -> brand row (NO_BRAND if missing)
+    cat_offsets array('I')  product i's categories are
+    cat_ids     array('I')  cat_ids[cat_offsets[i]:cat_offsets[i + 1]]
+
+Brands are parallel arrays too (boycott flags in a bytearray, text in
+the string table), with their alternatives grouped per brand, best
+score first. Strings live in one UTF-8 blob with an offsets array and
+are interned, so repeated values (websites, reasons) are stored once.
+A lookup is a binary search plus a few array reads. No ORM objects are
+kept, and the arrays hold no Python object references, so the
+garbage collector never walks them.
+
+Freshness: an index records the table generations (cache.py) it was
+built at. When a commit bumps one of CATALOG_TABLES, or the index is
+older than CATALOG_INDEX_MAX_AGE, a background thread rebuilds it and
+swaps it in with one reference assignment. Requests that already hold
+the old index finish with it. With a shared cache tier, commits in any
+worker bump the generations seen here. Without one only this worker's
+commits do (none with CACHE_ENABLED off), so the max age is capped at
+CACHE_LOCAL_TTL, the staleness bound of the local-only cache. A failed
+build is retried after retry_delay seconds, doubling up to the max age.
+Until the first build completes, lookups use the database path.
+?include=reports still reads the live report counters from the database.
+"""
+
+import logging
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left
+
+from flask_smorest import abort
+from sqlalchemy import select
+
+from background import WorkerThread
+from db import db
+from models.brand import Brand
+from models.brand_alternative import BrandAlternative
+from models.product import Product, product_category
+from resources.barcode import clean_barcode_input, format_barcode_for_output, normalize_barcode_or_400
+
+logger = logging.getLogger(__name__)
+
+CATALOG_TABLES = ("products", "brands", "brand_alternatives", "product_category")
+NO_BRAND = 0xFFFFFFFF
+
+
+class StringTable:
+    """Interned strings in one UTF-8 blob; index 0 is None."""
+
+    def __init__(self, data, offsets):
+        self.data = data
+        self.offsets = offsets
+
+    @classmethod
+    def builder(cls):
+        index = {None: 0}
+        chunks = []
+        offsets = array("I", [0, 0])  # blob offsets: up to 4 GiB of text
+
+        def intern(value):
+            i = index.get(value)
+            if i is None:
+                encoded = value.encode("utf-8")
+                chunks.append(encoded)
+                offsets.append(offsets[-1] + len(encoded))
+                i = index[value] = len(offsets) - 2
+            return i
+
+        def finish():
+            return cls(b"".join(chunks), offsets)
+
+        return intern, finish
+
+    def get(self, i):
+        if i == 0:
+            return None
+        return self.data[self.offsets[i]:self.offsets[i + 1]].decode("utf-8")
+
+    def __len__(self):
+        return len(self.offsets) - 2
+
+    def nbytes(self):
+        return sys.getsizeof(self.data) + sys.getsizeof(self.offsets)
+
+
+def barcode_key(barcode):
+    """(integer key, stored digit count or 0) for a stored barcode, or None."""
+    if barcode is None:
+        return None
+    if barcode.isdigit() and len(barcode) <= 14:
+        return int(barcode), len(barcode)
+    digits = format_barcode_for_output(barcode)
+    if not digits.isdigit() or len(digits) > 14:
+        return None
+    exact = clean_barcode_input(barcode)
+    return int(digits), len(exact) if exact.isdigit() and exact == digits else 0
+
+
+class CatalogIndex:
+    def __init__(self, **parts):
+        self.__dict__.update(parts)
+
+    @classmethod
+    def build(cls, products, product_categories, brands, alternatives, generations=None):
+        """
+        Build from row iterables:
+            products            (id, barcode, name, brand_id)
+            product_categories  (product_id, category_id)
+            brands              (id, name, website, logo_url, boycott_status, reason)
+            alternatives        (id, boycotted_brand_id, alternative_brand_id, category_id, score)
+        """
+        intern, finish_strings = StringTable.builder()
+
+        brand_rows = sorted(brands, key=lambda row: row[0])
+        brand_pos = {row[0]: i for i, row in enumerate(brand_rows)}
+        brand_ids = array("I", (row[0] for row in brand_rows))
+        brand_names = array("I", (intern(row[1]) for row in brand_rows))
+        brand_websites = array("I", (intern(row[2]) for row in brand_rows))
+        brand_logos = array("I", (intern(row[3]) for row in brand_rows))
+        brand_reasons = array("I", (intern(row[5]) for row in brand_rows))
+        boycott = bytearray(bool(row[4]) for row in brand_rows)
+
+        per_brand = {}
+        for alt_id, brand_id, alternative_id, category_id, score in alternatives:
+            if brand_id in brand_pos and alternative_id in brand_pos:
+                per_brand.setdefault(brand_pos[brand_id], []).append(
+                    (-(score or 0), alt_id, brand_pos[alternative_id], category_id or 0)
+                )
+        alt_offsets = array("I", [0])
+        alt_brands = array("I")
+        alt_categories = array("I")
+        for pos in range(len(brand_rows)):
+            for _, _, alternative_pos, category_id in sorted(per_brand.get(pos, ())):
+                alt_brands.append(alternative_pos)
+                alt_categories.append(category_id)
+            alt_offsets.append(len(alt_brands))
+
+        categories = {}
+        for product_id, category_id in product_categories:
+            categories.setdefault(product_id, []).append(category_id)
+
+        rows = []
+        skipped = 0
+        for product_id, barcode, name, brand_id in products:
+            key = barcode_key(barcode)
+            if key is None:
+                skipped += 1
+                continue
+            rows.append((key[0], product_id, key[1], name, brand_id))
+        rows.sort()
+
+        keys, lengths, product_ids = array("Q"), array("B"), array("I")
+        names, product_brands = array("I"), array("I")
+        cat_offsets, cat_ids = array("I", [0]), array("I")
+        for key, product_id, length, name, brand_id in rows:
+            if keys and keys[-1] == key:
+                skipped += 1  # duplicate barcode: the lowest product id wins
+                continue
+            keys.append(key)
+            lengths.append(length)
+            product_ids.append(product_id)
+            names.append(intern(name))
+            product_brands.append(brand_pos.get(brand_id, NO_BRAND))
+            cat_ids.extend(sorted(categories.get(product_id, ())))
+            cat_offsets.append(len(cat_ids))
+        if skipped:
+            logger.warning("Catalog index: %d products skipped (unparseable or duplicate barcode)", skipped)
+
+        return cls(
+            keys=keys, lengths=lengths, product_ids=product_ids, names=names,
+            brands=product_brands, cat_offsets=cat_offsets, cat_ids=cat_ids,
+            brand_ids=brand_ids, brand_names=brand_names, brand_websites=brand_websites,
+            brand_logos=brand_logos, brand_reasons=brand_reasons, boycott=boycott,
+            alt_offsets=alt_offsets, alt_brands=alt_brands, alt_categories=alt_categories,
+            strings=finish_strings(), generations=generations, built_at=time.monotonic(),
+        )
+
+    @classmethod
+    def load(cls, generations=None):
+        """Build from the database (inside an app context)."""
+        execute = db.session.execute
+        return cls.build(
+            execute(select(Product.id, Product.barcode, Product.name, Product.brand_id)),
+            execute(select(product_category.c.product_id, product_category.c.category_id)),
+            execute(select(
+                Brand.id, Brand.name, Brand.website, Brand.logo_url, Brand.boycott_status, Brand.reason
+            )),
+            execute(select(
+                BrandAlternative.id,
+                BrandAlternative.boycotted_brand_id,
+                BrandAlternative.alternative_brand_id,
+                BrandAlternative.category_id,
+                BrandAlternative.score,
+            )),
+            generations,
+        )
+
+    # --- lookups ---
+
+    def __len__(self):
+        return len(self.keys)
+
+    def find(self, key):
+        i = bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            return i
+        return None
+
+    def brand_dict(self, pos):
+        strings = self.strings
+        return {
+            "id": self.brand_ids[pos],
+            "name": strings.get(self.brand_names[pos]),
+            "website": strings.get(self.brand_websites[pos]),
+            "logo_url": strings.get(self.brand_logos[pos]),
+            "boycott_status": bool(self.boycott[pos]),
+            "reason": strings.get(self.brand_reasons[pos]),
+        }
+
+    def lookup(self, raw):
+        """Same result and errors as barcode_lookup_plan(raw), without the database."""
+        raw_clean = clean_barcode_input(raw)
+        i = None
+        if raw_clean.isdigit() and len(raw_clean) <= 14:
+            # Exact match on the stored digits first, as the SQL path does
+            i = self.find(int(raw_clean))
+            if i is not None and self.lengths[i] != len(raw_clean):
+                i = None
+            barcode = raw_clean
+        if i is None:
+            barcode = normalize_barcode_or_400(raw_clean)
+            i = self.find(int(barcode))
+        if i is None:
+            abort(404, message="Product not found.")
+
+        pos = self.brands[i]
+        if pos == NO_BRAND:
+            abort(500, message="Product has no brand.")
+
+        alternatives = []
+        if self.boycott[pos]:
+            categories = set(self.cat_ids[self.cat_offsets[i]:self.cat_offsets[i + 1]])
+            for j in range(self.alt_offsets[pos], self.alt_offsets[pos + 1]):
+                category_id = self.alt_categories[j]
+                if category_id == 0 or category_id in categories:
+                    alternatives.append(self.brand_dict(self.alt_brands[j]))
+
+        return {
+            "barcode": barcode,
+            "product_name": self.strings.get(self.names[i]),
+            "brand": self.brand_dict(pos),
+            "alternatives": alternatives,
+        }
+
+    # --- footprint ---
+
+    def memory_report(self):
+        """Bytes held per component: array headers and buffers, string blob."""
+        parts = {
+            "products": sum(map(sys.getsizeof, (
+                self.keys, self.lengths, self.product_ids, self.names, self.brands, self.cat_offsets
+            ))),
+            "product_categories": sys.getsizeof(self.cat_ids),
+            "brands": sum(map(sys.getsizeof, (
+                self.brand_ids, self.brand_names, self.brand_websites, self.brand_logos,
+                self.brand_reasons, self.boycott,
+            ))),
+            "alternatives": sum(map(sys.getsizeof, (self.alt_offsets, self.alt_brands, self.alt_categories))),
+            "strings": self.strings.nbytes(),
+        }
+        parts["total"] = sum(parts.values())
+        return parts
+
+
+class ServingCatalog:
+    """The current CatalogIndex of this worker, rebuilt in the background."""
+
+    def __init__(self, app, max_age=300.0, retry_delay=5.0, background=True):
+        """With `background` off the index is only built by rebuild()."""
+        self.app = app
+        self.max_age = max_age
+        self.retry_delay = retry_delay
+        self.index = None
+        self.builds = 0
+        self._wake = threading.Event()
+        self._worker = WorkerThread(self._run, "catalog-index", on_start=self._wake.set, enabled=background)
+
+    def ensure_started(self):
+        """Start this worker's builder thread and its first build."""
+        self._worker.ensure_started()
+
+    def generations(self):
+        cache = self.app.extensions.get("cache")
+        if cache is None:
+            return None
+        return cache.table_key("catalog", CATALOG_TABLES)
+
+    def current(self):
+        """The index to serve from (None until the first build), scheduling a
+        rebuild when the catalog has changed since it was built."""
+        self.ensure_started()
+        index = self.index
+        if index is not None and (
+            time.monotonic() - index.built_at > self.max_age or self.generations() != index.generations
+        ):
+            self._wake.set()
+        return index
+
+    def _run(self):
+        failures = 0
+        while True:
+            if failures:
+                # Nothing else wakes the builder before the first index exists
+                self._wake.wait(min(self.retry_delay * 2 ** (failures - 1), self.max_age))
+            else:
+                self._wake.wait()
+            self._wake.clear()
+            try:
+                self.rebuild()
+                failures = 0
+            except Exception:
+                failures += 1
+                logger.exception("Catalog index rebuild failed (attempt %d)", failures)
+
+    def rebuild(self):
+        started = time.monotonic()
+        with self.app.app_context():
+            # Read before loading: a commit during the load leaves the new
+            # index one generation behind, so it is rebuilt again
+            generations = self.generations()
+            index = CatalogIndex.load(generations)
+        self.index = index  # atomic swap
+        self.builds += 1
+        logger.info(
+            "Catalog index: %d products, %.1f MB, built in %.2fs",
+            len(index), index.memory_report()["total"] / 1e6, time.monotonic() - started,
+        )
+        return index
+
+
+def init_catalog_index(app):
+    """Attach the in-memory catalog (built by a per-worker background thread)."""
+    max_age = app.config["CATALOG_INDEX_MAX_AGE"]
+    cache = app.extensions.get("cache")
+    if cache is None or cache.shared is None:
+        # Other workers' commits are invisible here: bound staleness by age
+        max_age = min(max_age, app.config["CACHE_LOCAL_TTL"])
+    catalog = ServingCatalog(app, max_age=max_age)
+    app.extensions["catalog_index"] = catalog
+    return catalog
@@ -0,0 +1,156 @@
+# FILE: compression.py
+"""
+Negotiated response compression (COMPRESS_ENABLED).
+
+An after_request hook compresses JSON, HTML, CSS, JS and text responses
+of at least COMPRESS_MIN_SIZE bytes with the best encoding the client
+accepts. Ties in Accept-Encoding quality are broken by the server's own
+order, COMPRESS_ALGORITHMS. zstd and brotli come from the zstandard and
+brotli packages (requirements.txt); an install without them falls back
+to gzip, which is always available.
+Levels are per algorithm (COMPRESS_GZIP_LEVEL, COMPRESS_BR_LEVEL,
+COMPRESS_ZSTD_LEVEL). benchmarks/bench_compression.py shows the CPU cost
+and size of each level on our payloads.
+
+Streamed responses are compressed chunk by chunk and flushed after every
+chunk, so clients still receive data as it is produced. Responses that
+already carry a Content-Encoding (precompressed static assets),
+send_file passthroughs and Cache-Control: no-transform are left alone.
+A compressed response's ETag is made weak, so If-None-Match still gets
+a 304.
+"""
+
+import zlib
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # optional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional
+    zstandard = None
+
+
+def _gzip_stream(level):
+    z = zlib.compressobj(level, zlib.DEFLATED, 31)
+    return (lambda chunk: z.compress(chunk) + z.flush(zlib.Z_SYNC_FLUSH)), z.flush
+
+
+def _br_stream(level):
+    c = brotli.Compressor(quality=level)
+    return (lambda chunk: c.process(chunk) + c.flush()), c.finish
+
+
+def _zstd_stream(level):
+    c = zstandard.ZstdCompressor(level=level).compressobj()
+    return (lambda chunk: c.compress(chunk) + c.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)), c.flush
+
+
+# name -> (compress(data, level), stream(level) -> (feed(chunk), finish()))
+ENCODERS = {"gzip": (lambda data, level: zlib.compress(data, level, wbits=31), _gzip_stream)}
+if brotli is not None:
+    ENCODERS["br"] = (lambda data, level: brotli.compress(data, quality=level), _br_stream)
+if zstandard is not None:
+    ENCODERS["zstd"] = (
+        lambda data, level: zstandard.ZstdCompressor(level=level).compress(data), _zstd_stream
+    )
+
+COMPRESSIBLE = (
+    "application/json",
+    "application/javascript",
+    "application/xml",
+    "image/svg+xml",
+    "text/",
+)
+
+
+def negotiate(accept_encodings, preferred):
+    """Encoding to use for a werkzeug Accept-Encoding header, or None.
+
+    The highest client quality wins; equal qualities go to the first name
+    in `preferred` (the server's order).
+    """
+    best, best_quality = None, 0
+    for name in preferred:
+        if name not in ENCODERS:
+            continue
+        quality = accept_encodings[name]
+        if quality > best_quality:
+            best, best_quality = name, quality
+    return best
+
+
+def compress_stream(chunks, encoding, level):
+    feed, finish = ENCODERS[encoding][1](level)
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        out = feed(chunk)
+        if out:
+            yield out
+    yield finish()
+
+
+class Compression:
+    def __init__(self, min_size, algorithms, levels):
+        self.min_size = min_size
+        self.algorithms = [name for name in algorithms if name in ENCODERS]
+        self.levels = levels
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            config["COMPRESS_MIN_SIZE"],
+            config["COMPRESS_ALGORITHMS"],
+            {
+                "gzip": config["COMPRESS_GZIP_LEVEL"],
+                "br": config["COMPRESS_BR_LEVEL"],
+                "zstd": config["COMPRESS_ZSTD_LEVEL"],
+            },
+        )
+
+    def compress(self, data, encoding):
+        return ENCODERS[encoding][0](data, self.levels[encoding])
+
+    def compressible(self, response):
+        if response.status_code < 200 or response.status_code in (204, 304):
+            return False
+        if response.direct_passthrough or "Content-Encoding" in response.headers:
+            return False
+        if "no-transform" in response.headers.get("Cache-Control", ""):
+            return False
+        return (response.mimetype or "").startswith(COMPRESSIBLE)
+
+    def after_request(self, response):
+        if request.method == "HEAD" or not self.compressible(response):
+            return response
+        # Vary even when not compressing, so caches keep the variants apart
+        response.vary.add("Accept-Encoding")
+        if not response.is_streamed and response.calculate_content_length() < self.min_size:
+            return response
+        encoding = negotiate(request.accept_encodings, self.algorithms)
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            response.response = compress_stream(response.response, encoding, self.levels[encoding])
+            response.headers.pop("Content-Length", None)
+        else:
+            response.set_data(self.compress(response.get_data(), encoding))
+        response.headers["Content-Encoding"] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+
+def init_compression(app):
+    """Register first so it runs after every other after_request hook."""
+    compression = Compression.from_config(app.config)
+    app.after_request(compression.after_request)
+    app.extensions["compression"] = compression
+    return compression
@@ -1,3 +1,61 @@
+from flask import g, has_request_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+from sqlalchemy import Select
 
-db = SQLAlchemy()  # This initializes SQLAlchemy
+
+class RoutingSession(Session):
+    """
+    Sends plain SELECTs to the read replica engine picked for the current
+    request (g.read_replica, see read_replicas.py). Flushes, DML, text() and
+    SELECT ... FOR UPDATE always go to the primary.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and not self._flushing
+            and isinstance(clause, Select)
+            and clause._for_update_arg is None
+            and has_request_context()
+        ):
+            replica = g.get("read_replica")
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})  # This initializes SQLAlchemy
+
+
+def upsert_insert(table):
+    """
+    Dialect-specific INSERT for the current engine, so callers can use
+    .on_conflict_do_update() (same API on Postgres and SQLite).
+    """
+    name = db.engine.dialect.name
+    if name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise NotImplementedError(f"Upsert is not supported on {name}.")
+    return insert(table)
+
+
+def run_plan(plan):
+    """
+    Drive a query plan on the Flask-SQLAlchemy session.
+
+    A plan is a generator that yields (statement, many) and is sent back
+    scalars(statement).all() when many is true, else .first(); its return
+    value is the result. asgi.py drives the same plans on an AsyncSession,
+    so lookup logic is written once for both serving paths.
+    """
+    try:
+        statement, many = next(plan)
+        while True:
+            result = db.session.scalars(statement)
+            statement, many = plan.send(result.all() if many else result.first())
+    except StopIteration as done:
+        return done.value
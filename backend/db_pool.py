@@ -0,0 +1,149 @@
+# FILE: db_pool.py
+"""
+Connection pool configuration and live pool statistics.
+
+engine_options() turns the DB_POOL_* settings into SQLAlchemy engine
+options. The instrumented pool classes time every checkout, which is how
+long a request waited for a connection, and count the threads currently
+blocked on an exhausted pool (no idle connection and no overflow left).
+pool_snapshot() reports this for /admin/db-pool and /metrics.
+"""
+
+import threading
+import time
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Checkout wait histogram bucket upper bounds, in seconds
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class PoolWaitStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.waiting = 0
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_sum = 0.0
+        self.bucket_counts = [0] * (len(WAIT_BUCKETS) + 1)  # last is +Inf
+
+    def enter(self):
+        with self._lock:
+            self.waiting += 1
+
+    def leave(self, waited, timed_out, blocked):
+        with self._lock:
+            if blocked:
+                self.waiting -= 1
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.wait_sum += waited
+            for i, bound in enumerate(WAIT_BUCKETS):
+                if waited <= bound:
+                    self.bucket_counts[i] += 1
+                    break
+            else:
+                self.bucket_counts[-1] += 1
+
+    def snapshot(self):
+        with self._lock:
+            cumulative, buckets = 0, {}
+            for bound, count in zip(WAIT_BUCKETS + (float("inf"),), self.bucket_counts):
+                cumulative += count
+                buckets["+Inf" if bound == float("inf") else str(bound)] = cumulative
+            return {
+                "waiting": self.waiting,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_seconds_sum": self.wait_sum,
+                "wait_seconds_buckets": buckets,
+            }
+
+
+class _TimedCheckout:
+    def _exhausted(self):
+        # Same test QueuePool makes before blocking on its queue
+        return self.checkedin() == 0 and -1 < self._max_overflow <= self._overflow
+
+    def _do_get(self):
+        stats = self.wait_stats
+        blocked = self._exhausted()
+        if blocked:
+            stats.enter()
+        start = time.perf_counter()
+        timed_out = True
+        try:
+            conn = super()._do_get()
+            timed_out = False
+            return conn
+        finally:
+            stats.leave(time.perf_counter() - start, timed_out, blocked)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.wait_stats = self.wait_stats
+        return pool
+
+
+class InstrumentedQueuePool(_TimedCheckout, QueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+
+def engine_options(config, url=None, is_async=False):
+    """
+    SQLAlchemy engine options from DB_POOL_* config. In-memory SQLite
+    keeps its single shared connection, so no pool settings apply there.
+    """
+    url = make_url(url or config["SQLALCHEMY_DATABASE_URI"])
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return {}
+
+    options = {
+        "poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        "pool_size": config["DB_POOL_SIZE"],
+        "max_overflow": config["DB_MAX_OVERFLOW"],
+        "pool_timeout": config["DB_POOL_TIMEOUT"],
+        "pool_recycle": config["DB_POOL_RECYCLE"],
+        "pool_pre_ping": config["DB_POOL_PRE_PING"],
+    }
+    if config["DB_PGBOUNCER"] and url.get_backend_name() == "postgresql":
+        if is_async:
+            # asyncpg prepares statements server-side by default, and those
+            # break under PgBouncer transaction pooling
+            options["connect_args"] = {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+            }
+        else:
+            # psycopg2 never uses server-side prepared statements; just make
+            # sure no session state (e.g. SET) outlives a transaction
+            options["pool_reset_on_return"] = "rollback"
+    return options
+
+
+def pool_snapshot(engine):
+    pool = engine.pool
+    snapshot = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        snapshot.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow,
+        })
+    stats = getattr(pool, "wait_stats", None)
+    if stats is not None:
+        snapshot.update(stats.snapshot())
+    return snapshot
@@ -0,0 +1,75 @@
+# FILE: gunicorn.conf.py
+# Production serving: gunicorn -c gunicorn.conf.py wsgi:app
+# Every setting can be overridden from the environment.
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+
+# Pre-fork workers, each with a small thread pool: requests mostly wait on
+# Postgres, so threads keep a worker busy while one request is blocked.
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+
+# Import the app once in the master; workers share those pages (copy-on-write)
+preload_app = os.getenv("GUNICORN_PRELOAD", "true").lower() == "true"
+
+# Keep-alive: longer than the client/load balancer wants is wasted sockets,
+# shorter forces a reconnect per request. Keep it above the LB idle timeout
+# if a load balancer sits in front.
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+
+# Recycle workers periodically (bounded memory growth); jitter avoids
+# every worker restarting at once
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "10000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "1000"))
+
+# Workers share /metrics totals through snapshot files (see metrics.py);
+# a fresh directory per server start so old counters do not leak in,
+# removed again in on_exit. A configured directory is left alone.
+_metrics_tmpdir = None
+if not os.getenv("METRICS_MULTIPROC_DIR"):
+    _metrics_tmpdir = tempfile.mkdtemp(prefix="boycott-metrics-")
+    os.environ["METRICS_MULTIPROC_DIR"] = _metrics_tmpdir
+
+accesslog = os.getenv("GUNICORN_ACCESSLOG", "-")
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOGLEVEL", "info")
+
+# Graceful reloads: `kill -HUP <master>` starts new workers and lets old
+# ones finish in-flight requests within graceful_timeout. With preload_app
+# HUP does not re-import code; for a code deploy use USR2 (new master)
+# then WINCH/QUIT on the old master, or roll the container.
+
+
+def post_fork(server, worker):
+    # Connections opened in the master (during preload) must not be shared
+    # across processes: drop them, each worker opens its own pool.
+    from db import db
+    from wsgi import app
+
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
+    replicas = app.extensions.get("read_replicas")
+    if replicas is not None:
+        for engine in replicas.engines.values():
+            engine.dispose(close=False)
+    catalog = app.extensions.get("catalog_index")
+    if catalog is not None:
+        catalog.ensure_started()
+    # Fill this worker's cache before traffic arrives (cache_warmup.py)
+    warmer = app.extensions.get("cache_warmup")
+    if warmer is not None:
+        warmer.ensure_started()
+
+
+def on_exit(server):
+    if _metrics_tmpdir is not None:
+        shutil.rmtree(_metrics_tmpdir, ignore_errors=True)
@@ -0,0 +1,388 @@
+# FILE: metrics.py
+"""
+Prometheus metrics: GET /metrics in the text exposition format.
+
+Recorded per request: count by route/method/status, a latency histogram
+by route/method, and an in-flight gauge. Each thread records into its own
+shard with plain dict increments (no lock on the hot path); a scrape sums
+the shards. Cache hit/miss counters and DB pool stats are read at scrape
+time.
+
+Several worker processes (gunicorn): set METRICS_MULTIPROC_DIR. Every
+worker writes a JSON snapshot there every METRICS_FLUSH_INTERVAL seconds
+and on each scrape. The scraped worker merges all snapshots, so any
+worker returns totals for the whole server. Counters of exited workers
+are folded into archive.json, so totals never go backwards. Their gauges
+are dropped. Liveness is tracked with flock, so on platforms without
+fcntl (Windows) METRICS_MULTIPROC_DIR is ignored and each process reports
+its own metrics.
+"""
+
+import glob
+import json
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from collections import defaultdict
+
+from flask import Response, current_app, g, request
+
+from db import db
+from db_pool import WAIT_BUCKETS, pool_snapshot
+import auth_utils as auth_module
+
+try:
+    import fcntl
+except ImportError:  # not POSIX: no multi-process snapshots
+    fcntl = None
+
+PREFIX = "boycott_"
+
+# Request latency histogram bucket upper bounds, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 10.0)
+
+HISTOGRAM_BUCKETS = {
+    "http_request_duration_seconds": LATENCY_BUCKETS,
+    "db_pool_wait_seconds": WAIT_BUCKETS,
+}
+
+HELP = {
+    "http_requests_total": ("counter", "HTTP requests by route, method and status."),
+    "http_request_duration_seconds": ("histogram", "HTTP request latency by route and method."),
+    "http_requests_in_flight": ("gauge", "HTTP requests currently being served."),
+    "cache_hits_total": ("counter", "Cache hits by cache."),
+    "cache_misses_total": ("counter", "Cache misses by cache."),
+    "cache_hit_ratio": ("gauge", "hits / (hits + misses) since start, by cache."),
+    "cache_entries": ("gauge", "Entries currently held, by cache."),
+    "db_pool_size": ("gauge", "Configured pool size, by pool."),
+    "db_pool_checked_out": ("gauge", "Connections in use, by pool."),
+    "db_pool_overflow": ("gauge", "Overflow connections open, by pool."),
+    "db_pool_waiting": ("gauge", "Threads blocked on an exhausted pool, by pool."),
+    "db_pool_timeouts_total": ("counter", "Checkouts that timed out, by pool."),
+    "db_pool_wait_seconds": ("histogram", "Time spent waiting for a connection, by pool."),
+}
+
+
+def labels(**pairs):
+    return ",".join(f'{k}="{str(v)}"' for k, v in pairs.items())
+
+
+class _Shard:
+    """One thread's counters; only that thread writes to it."""
+
+    __slots__ = ("requests", "latency", "in_flight")
+
+    def __init__(self):
+        self.requests = defaultdict(int)  # (route, method, status) -> count
+        self.latency = {}  # (route, method) -> [count per bucket..., +Inf, sum]
+        self.in_flight = 0
+
+
+class Metrics:
+    def __init__(self, multiproc_dir=None, flush_interval=1.0):
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()
+        self.cache_sources = {}  # name -> callable returning a stats() dict
+        self.multiproc_dir = multiproc_dir
+        self.flush_interval = flush_interval
+        self._pid = None
+        self._lock_file = None
+        self._snapshot_path = None
+
+    # --- recording (hot path) ---
+
+    def _shard(self):
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = _Shard()
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def request_started(self):
+        self._shard().in_flight += 1
+
+    def request_finished(self, route, method, status, seconds):
+        shard = self._shard()
+        shard.in_flight -= 1
+        shard.requests[(route, method, status)] += 1
+        hist = shard.latency.get((route, method))
+        if hist is None:
+            hist = shard.latency[(route, method)] = [0] * (len(LATENCY_BUCKETS) + 1) + [0.0]
+        hist[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        hist[-1] += seconds
+
+    def register_cache(self, name, stats):
+        """stats() must return a dict with at least hits and misses (size optional)."""
+        self.cache_sources[name] = stats
+
+    # --- collection ---
+
+    def snapshot(self, app):
+        """This process's metrics as {"counters", "gauges", "histograms"} of {labels: value}."""
+        counters = defaultdict(dict)
+        gauges = defaultdict(dict)
+        histograms = defaultdict(dict)
+
+        in_flight = 0
+        requests = defaultdict(int)
+        latency = {}
+        with self._lock:
+            shards = list(self._shards)
+        for shard in shards:
+            in_flight += shard.in_flight
+            for key, count in list(shard.requests.items()):
+                requests[key] += count
+            for key, hist in list(shard.latency.items()):
+                total = latency.setdefault(key, [0] * len(hist))
+                for i, value in enumerate(list(hist)):
+                    total[i] += value
+
+        for (route, method, status), count in requests.items():
+            counters["http_requests_total"][labels(route=route, method=method, status=status)] = count
+        for (route, method), hist in latency.items():
+            cumulative, running = [], 0
+            for count in hist[:-1]:
+                running += count
+                cumulative.append(running)
+            histograms["http_request_duration_seconds"][labels(route=route, method=method)] = (
+                cumulative + [hist[-1]]
+            )
+        gauges["http_requests_in_flight"][""] = in_flight
+
+        with app.app_context():
+            for name, stats in self.cache_sources.items():
+                values = stats()
+                if values is None:
+                    continue
+                key = labels(cache=name)
+                counters["cache_hits_total"][key] = values.get("hits", 0)
+                counters["cache_misses_total"][key] = values.get("misses", 0)
+                if "size" in values:
+                    gauges["cache_entries"][key] = values["size"]
+
+            engines = [("default" if key is None else key, e) for key, e in db.engines.items()]
+        replicas = app.extensions.get("read_replicas")
+        if replicas is not None:
+            engines.extend(replicas.engines.items())
+        for name, engine in engines:
+            pool = pool_snapshot(engine)
+            key = labels(pool=name)
+            for field in ("size", "checked_out", "overflow", "waiting"):
+                if field in pool:
+                    gauges[f"db_pool_{field}"][key] = pool[field]
+            if "wait_seconds_buckets" in pool:
+                counters["db_pool_timeouts_total"][key] = pool["timeouts"]
+                histograms["db_pool_wait_seconds"][key] = (
+                    list(pool["wait_seconds_buckets"].values()) + [pool["wait_seconds_sum"]]
+                )
+
+        return {
+            "counters": dict(counters),
+            "gauges": dict(gauges),
+            "histograms": dict(histograms),
+        }
+
+    # --- multi-process ---
+
+    def ensure_started(self, app):
+        # One snapshot file (and flusher thread) per worker process; after a
+        # fork the child starts its own
+        if not self.multiproc_dir or self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            os.makedirs(self.multiproc_dir, exist_ok=True)
+            name = f"worker-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+            # Under the archive lock, so a concurrent scrape cannot see the
+            # new lock file before it is held and archive it as dead
+            with open(os.path.join(self.multiproc_dir, "archive.lock"), "w") as guard:
+                fcntl.flock(guard, fcntl.LOCK_EX)
+                self._lock_file = open(os.path.join(self.multiproc_dir, f"{name}.lock"), "w")
+                fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            self._snapshot_path = os.path.join(self.multiproc_dir, f"{name}.json")
+            self._pid = os.getpid()
+            threading.Thread(target=self._flush_loop, args=(app,), daemon=True).start()
+
+    def _flush_loop(self, app):
+        pid = os.getpid()
+        while self._pid == pid:
+            time.sleep(self.flush_interval)
+            try:
+                self.write_snapshot(app)
+            except Exception:
+                app.logger.exception("Writing metrics snapshot failed")
+
+    def write_snapshot(self, app):
+        tmp = f"{self._snapshot_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(app), f)
+        os.replace(tmp, self._snapshot_path)
+
+    def collect(self, app):
+        """Metrics for this process, or for every worker sharing multiproc_dir."""
+        if not self.multiproc_dir:
+            return self.snapshot(app)
+        self.ensure_started(app)
+        self.write_snapshot(app)
+
+        archive_path = os.path.join(self.multiproc_dir, "archive.json")
+        with open(os.path.join(self.multiproc_dir, "archive.lock"), "w") as guard:
+            fcntl.flock(guard, fcntl.LOCK_EX)
+            archive = _read_json(archive_path) or {}
+            live, archived_any = [], False
+            for lock_path in glob.glob(os.path.join(self.multiproc_dir, "worker-*.lock")):
+                snapshot_path = lock_path[:-len(".lock")] + ".json"
+                with open(lock_path, "a") as owner:
+                    try:
+                        fcntl.flock(owner, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                        alive = False
+                    except BlockingIOError:
+                        alive = True
+                snapshot = _read_json(snapshot_path)
+                if alive:
+                    if snapshot:
+                        live.append(snapshot)
+                    continue
+                # Worker exited: keep its counters, drop its gauges
+                if snapshot:
+                    archive = merge([archive, {
+                        "counters": snapshot.get("counters", {}),
+                        "histograms": snapshot.get("histograms", {}),
+                    }])
+                    archived_any = True
+                for path in (snapshot_path, lock_path):
+                    if os.path.exists(path):
+                        os.remove(path)
+            if archived_any:
+                tmp = f"{archive_path}.tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(archive, f)
+                os.replace(tmp, archive_path)
+        return merge(live + [archive])
+
+
+def _read_json(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def merge(snapshots):
+    """Sum snapshots: counters, gauges and (cumulative) histogram buckets alike."""
+    merged = {"counters": {}, "gauges": {}, "histograms": {}}
+    for snapshot in snapshots:
+        for kind in ("counters", "gauges"):
+            for name, series in snapshot.get(kind, {}).items():
+                target = merged[kind].setdefault(name, {})
+                for key, value in series.items():
+                    target[key] = target.get(key, 0) + value
+        for name, series in snapshot.get("histograms", {}).items():
+            target = merged["histograms"].setdefault(name, {})
+            for key, values in series.items():
+                if key in target:
+                    target[key] = [a + b for a, b in zip(target[key], values)]
+                else:
+                    target[key] = list(values)
+    return merged
+
+
+def render(snapshot):
+    """Prometheus text exposition format (0.0.4)."""
+    counters = snapshot["counters"]
+    gauges = dict(snapshot["gauges"])
+
+    # Hit ratio from the (merged) counters; per-process ratios cannot be summed
+    hits, misses = counters.get("cache_hits_total", {}), counters.get("cache_misses_total", {})
+    gauges["cache_hit_ratio"] = {
+        key: (hits[key] / (hits[key] + misses.get(key, 0))) if hits[key] + misses.get(key, 0) else 0.0
+        for key in hits
+    }
+
+    lines = []
+
+    def header(name):
+        kind, text = HELP[name]
+        lines.append(f"# HELP {PREFIX}{name} {text}")
+        lines.append(f"# TYPE {PREFIX}{name} {kind}")
+
+    def series(name, key, value):
+        lines.append(f"{PREFIX}{name}{{{key}}} {value}" if key else f"{PREFIX}{name} {value}")
+
+    for source in (counters, gauges):
+        for name in sorted(source):
+            header(name)
+            for key, value in sorted(source[name].items()):
+                series(name, key, value)
+
+    for name in sorted(snapshot["histograms"]):
+        header(name)
+        bounds = [str(b) for b in HISTOGRAM_BUCKETS[name]] + ["+Inf"]
+        for key, values in sorted(snapshot["histograms"][name].items()):
+            sep = "," if key else ""
+            for bound, count in zip(bounds, values):
+                series(f"{name}_bucket", f'{key}{sep}le="{bound}"', count)
+            series(f"{name}_sum", key, values[-1])
+            series(f"{name}_count", key, values[-2])
+
+    return "\n".join(lines) + "\n"
+
+
+def metrics():
+    return current_app.extensions["metrics"]
+
+
+def _start_timer():
+    m = metrics()
+    m.ensure_started(current_app._get_current_object())
+    m.request_started()
+    g._metrics_start = time.perf_counter()
+
+
+def _note_status(response):
+    g._metrics_status = response.status_code
+    return response
+
+
+def _stop_timer(exc):
+    start = g.pop("_metrics_start", None)
+    if start is None:
+        return
+    route = request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+    metrics().request_finished(
+        route, request.method, g.pop("_metrics_status", 500), time.perf_counter() - start
+    )
+
+
+def _cache_stats(get_cache):
+    def stats():
+        cache = get_cache()
+        return cache.stats() if cache is not None else None
+
+    return stats
+
+
+def init_metrics(app):
+    """Register the request hooks and GET /metrics (call early in create_app)."""
+    multiproc_dir = app.config["METRICS_MULTIPROC_DIR"]
+    if multiproc_dir and fcntl is None:
+        app.logger.warning("METRICS_MULTIPROC_DIR ignored: it needs fcntl (POSIX)")
+        multiproc_dir = None
+    m = Metrics(multiproc_dir, app.config["METRICS_FLUSH_INTERVAL"])
+    m.register_cache("auth_token", _cache_stats(auth_module.token_cache))
+    m.register_cache("auth_principal", _cache_stats(auth_module.principal_cache))
+    app.extensions["metrics"] = m
+    app.before_request(_start_timer)
+    app.after_request(_note_status)
+    app.teardown_request(_stop_timer)
+
+    @app.get("/metrics")
+    def prometheus_metrics():
+        body = render(metrics().collect(current_app._get_current_object()))
+        return Response(body, mimetype="text/plain; version=0.0.4")
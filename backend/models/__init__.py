@@ -2,9 +2,12 @@
 
 from models.user import User
 from models.report import Report
+from models.report_summary import ReportSummary
 from models.product import Product
 from models.brand import Brand
 from models.category import Category
 from models.brand_alternative import BrandAlternative
+from models.scan_count import ScanCount
+from models.unknown_barcode import UnknownBarcode
 
-__all__ = ["User", "Report", "Product", "Brand", "Category", "BrandAlternative"]
+__all__ = ["User", "Report", "ReportSummary", "Product", "Brand", "Category", "BrandAlternative", "ScanCount", "UnknownBarcode"]
@@ -13,20 +13,33 @@ class ReportStatus(PyEnum):
 
 class Report(db.Model):
     __tablename__ = "reports"
+    __table_args__ = (
+        # Listing filters by status / owner and pages on (created_at, id)
+        db.Index("ix_reports_status_created_at", "status", "created_at"),
+        db.Index("ix_reports_user_id_created_at", "user_id", "created_at"),
+        # Moderation queue: only pending rows, so it stays small as
+        # approved/rejected reports accumulate
+        db.Index(
+            "ix_reports_pending_created_at",
+            "created_at",
+            "id",
+            postgresql_where=db.text("status = 'pending'"),
+            sqlite_where=db.text("status = 'pending'"),
+        ),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
     product_id = db.Column(
         db.Integer, db.ForeignKey("products.id"), nullable=True, index=True
     )
-    barcode = db.Column(db.String(14), nullable=True)
+    barcode = db.Column(db.String(14), nullable=True, index=True)
     message = db.Column(db.Text, nullable=False)
     evidence_url = db.Column(db.String(500), nullable=True)
     status = db.Column(
         db.String(20),
         default=ReportStatus.PENDING.value,
         nullable=False,
-        index=True,
     )
     admin_note = db.Column(db.Text, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False, index=True)
@@ -34,6 +47,13 @@ class Report(db.Model):
         db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False
     )
 
+    # Set when the report arrived through the write-behind queue (202 response)
+    ingest_id = db.Column(db.String(32), unique=True, nullable=True)
+
+    # Moderation lease: set by POST /reports/claim, expires at claimed_until
+    claimed_by = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=True)
+    claimed_until = db.Column(db.DateTime, nullable=True)
+
     # Relationships
     product = db.relationship("Product", backref="reports", lazy=True)
 
@@ -49,4 +69,7 @@ class Report(db.Model):
             "admin_note": self.admin_note,
             "created_at": self.created_at,
             "updated_at": self.updated_at,
+            "ingest_id": self.ingest_id,
+            "claimed_by": self.claimed_by,
+            "claimed_until": self.claimed_until,
         }
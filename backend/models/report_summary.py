@@ -0,0 +1,140 @@
+# FILE: models/report_summary.py
+
+from collections import defaultdict
+
+from sqlalchemy import case, func
+
+from db import db, upsert_insert
+from models.report import Report
+
+
+class ReportSummary(db.Model):
+    """
+    Per-product / per-barcode report counters, maintained incrementally
+    whenever a report is created or moderated (see apply_report_changes).
+    """
+    __tablename__ = "report_summaries"
+    __table_args__ = (
+        db.UniqueConstraint("scope", "key", name="uq_report_summaries_scope_key"),
+        db.Index("ix_report_summaries_scope_pending", "scope", "pending_count"),
+        db.Index("ix_report_summaries_scope_last_report", "scope", "last_report_at"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    scope = db.Column(db.String(10), nullable=False)  # "product" or "barcode"
+    key = db.Column(db.String(50), nullable=False)  # product id or barcode
+    pending_count = db.Column(db.Integer, default=0, nullable=False)
+    approved_count = db.Column(db.Integer, default=0, nullable=False)
+    rejected_count = db.Column(db.Integer, default=0, nullable=False)
+    last_report_at = db.Column(db.DateTime, nullable=True)
+
+    @property
+    def total_count(self):
+        return self.pending_count + self.approved_count + self.rejected_count
+
+    def to_dict(self):
+        return {
+            "scope": self.scope,
+            "product_id": int(self.key) if self.scope == "product" else None,
+            "barcode": self.key if self.scope == "barcode" else None,
+            "pending": self.pending_count,
+            "approved": self.approved_count,
+            "rejected": self.rejected_count,
+            "total": self.total_count,
+            "last_report_at": self.last_report_at,
+        }
+
+
+def report_keys(product_id, barcode):
+    keys = []
+    if product_id:
+        keys.append(("product", str(product_id)))
+    if barcode:
+        keys.append(("barcode", barcode))
+    return keys
+
+
+def apply_report_changes(changes):
+    """
+    Fold report lifecycle changes into the summary counters.
+
+    `changes` is an iterable of (product_id, barcode, old_status,
+    new_status, reported_at); old_status is None for new reports and
+    reported_at is only used for new reports. Changes are grouped per
+    key so each affected row gets a single upsert. Runs in the caller's
+    transaction - the caller commits.
+    """
+    deltas = defaultdict(lambda: {"pending": 0, "approved": 0, "rejected": 0, "last": None})
+    for product_id, barcode, old_status, new_status, reported_at in changes:
+        if old_status == new_status:
+            continue
+        for key in report_keys(product_id, barcode):
+            delta = deltas[key]
+            if old_status:
+                delta[old_status] -= 1
+            else:
+                last = delta["last"]
+                delta["last"] = reported_at if last is None else max(last, reported_at)
+            delta[new_status] += 1
+
+    table = ReportSummary.__table__
+    for (scope, key), delta in deltas.items():
+        last = delta["last"]
+        stmt = upsert_insert(table).values(
+            scope=scope,
+            key=key,
+            pending_count=delta["pending"],
+            approved_count=delta["approved"],
+            rejected_count=delta["rejected"],
+            last_report_at=last,
+        )
+        set_ = {
+            "pending_count": table.c.pending_count + delta["pending"],
+            "approved_count": table.c.approved_count + delta["approved"],
+            "rejected_count": table.c.rejected_count + delta["rejected"],
+        }
+        if last is not None:
+            set_["last_report_at"] = case(
+                (table.c.last_report_at.is_(None), last),
+                (table.c.last_report_at < last, last),
+                else_=table.c.last_report_at,
+            )
+        db.session.execute(
+            stmt.on_conflict_do_update(index_elements=["scope", "key"], set_=set_)
+        )
+
+
+def rebuild_report_summaries():
+    """
+    Recompute every counter from the reports table (one-off backfill or
+    repair; the request path never does this).
+    """
+    db.session.query(ReportSummary).delete()
+    for scope, column in (("product", Report.product_id), ("barcode", Report.barcode)):
+        rows = (
+            db.session.query(
+                column,
+                Report.status,
+                func.count(Report.id),
+                func.max(Report.created_at),
+            )
+            .filter(column.isnot(None))
+            .group_by(column, Report.status)
+            .all()
+        )
+        summaries = {}
+        for key, status, count, last in rows:
+            summary = summaries.get(key)
+            if summary is None:
+                summary = summaries[key] = ReportSummary(
+                    scope=scope,
+                    key=str(key),
+                    pending_count=0,
+                    approved_count=0,
+                    rejected_count=0,
+                )
+            setattr(summary, f"{status}_count", count)
+            if summary.last_report_at is None or last > summary.last_report_at:
+                summary.last_report_at = last
+        db.session.add_all(summaries.values())
+    db.session.commit()
@@ -0,0 +1,22 @@
+# FILE: models/scan_count.py
+
+from db import db
+
+
+class ScanCount(db.Model):
+    """
+    Barcode scans per hour (UTC), folded in by the scan analytics flusher
+    (scan_analytics.py). misses counts the scans that found no product.
+    """
+    __tablename__ = "scan_counts"
+    __table_args__ = (
+        db.UniqueConstraint("barcode", "hour", name="uq_scan_counts_barcode_hour"),
+        # Top-N over a time window
+        db.Index("ix_scan_counts_hour", "hour"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    barcode = db.Column(db.String(14), nullable=False)
+    hour = db.Column(db.DateTime, nullable=False)
+    scans = db.Column(db.Integer, default=0, nullable=False)
+    misses = db.Column(db.Integer, default=0, nullable=False)
@@ -0,0 +1,25 @@
+# FILE: models/unknown_barcode.py
+
+from db import db
+
+
+class UnknownBarcode(db.Model):
+    """
+    Valid barcodes that were scanned but are not in the catalog (catalog
+    gaps), maintained by the scan analytics flusher (scan_analytics.py).
+    """
+    __tablename__ = "unknown_barcodes"
+
+    id = db.Column(db.Integer, primary_key=True)
+    barcode = db.Column(db.String(14), nullable=False, unique=True)
+    scan_count = db.Column(db.Integer, default=0, nullable=False)
+    first_seen_at = db.Column(db.DateTime, nullable=False)
+    last_seen_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    def to_dict(self):
+        return {
+            "barcode": self.barcode,
+            "scans": self.scan_count,
+            "first_seen_at": self.first_seen_at,
+            "last_seen_at": self.last_seen_at,
+        }
@@ -2,7 +2,7 @@
 
 from db import db
 from datetime import datetime
-from werkzeug.security import generate_password_hash, check_password_hash
+from password_hashing import hash_password, verify_password
 
 
 class User(db.Model):
@@ -14,17 +14,25 @@ class User(db.Model):
     password_hash = db.Column(db.String(255), nullable=False)
     role = db.Column(db.String(20), default="user", nullable=False)  # "user" or "admin"
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    # Bumped to revoke every token issued so far (see auth_utils)
+    token_version = db.Column(db.Integer, default=0, nullable=False)
 
     # Relationships
-    reports = db.relationship("Report", backref="user", lazy=True, cascade="all, delete-orphan")
+    reports = db.relationship(
+        "Report",
+        backref="user",
+        lazy=True,
+        cascade="all, delete-orphan",
+        foreign_keys="Report.user_id",
+    )
 
     def set_password(self, password):
         """Hash and set the password."""
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
         """Verify password against hash."""
-        return check_password_hash(self.password_hash, password)
+        return verify_password(self.password_hash, password)
 
     def to_dict(self):
         return {
@@ -0,0 +1,99 @@
+# FILE: openapi_spec.py
+"""
+Lazily built, cached OpenAPI document.
+
+flask-smorest documents each blueprint as it is registered: every view's
+marshmallow schemas, and its default error responses, are converted to
+JSON schema inside create_app(), which every worker and every test pays
+for. LazySpecApi registers the routes immediately. The configure_spec
+callback (security schemes, schema name resolver) and the blueprint docs
+run, in that original order, the first time .spec is used, typically the
+first GET /openapi.json. The serialized JSON is then kept and served
+with an ETag.
+
+OPENAPI_SPEC_FILE points at a prebuilt document (build_openapi.py, run at
+image build time). When that file exists it is served as is, and the
+spec is never built in the process.
+"""
+
+import hashlib
+import json
+import os
+import threading
+
+from flask import current_app, request
+from flask_smorest import Api
+
+
+class LazySpecApi(Api):
+    def __init__(self, app=None, *, configure_spec=None, **kwargs):
+        self._configure_spec = configure_spec  # callable(spec), e.g. security schemes
+        self._pending_docs = []
+        self._configure_pending = False
+        self._building = False
+        self._spec_lock = threading.RLock()
+        self._spec_json = None
+        super().__init__(app, **kwargs)
+
+    def init_app(self, app, *, spec_kwargs=None):
+        super().init_app(app, spec_kwargs=spec_kwargs)
+        # Set only now: init_app itself reads .spec to register default responses
+        self._configure_pending = self._configure_spec is not None
+
+    @property
+    def spec(self):
+        if self._configure_pending or self._pending_docs:
+            with self._spec_lock:
+                # Other threads wait here for the build; the building thread
+                # re-enters (flask-smorest reads self.spec while documenting)
+                if not self._building:
+                    self._build()
+        return self._spec
+
+    @spec.setter
+    def spec(self, value):
+        self._spec = value
+
+    def _build(self):
+        self._building = True
+        try:
+            if self._configure_pending:
+                self._configure_pending = False
+                self._configure_spec(self._spec)
+            pending, self._pending_docs = self._pending_docs, []
+            for blp, name, parameters in pending:
+                blp.register_views_in_doc(self, self._app, self._spec, name=name, parameters=parameters)
+                self._spec.tag({"name": name, "description": blp.description})
+        finally:
+            self._building = False
+
+    def register_blueprint(self, blp, *, parameters=None, **options):
+        # Same as Api.register_blueprint, with the documentation step deferred
+        blp_name = options.get("name", blp.name)
+        self._app.extensions["flask-smorest"]["blp_name_to_api"][blp_name] = self
+        self._app.register_blueprint(blp, **options)
+        self._pending_docs.append((blp, blp_name, parameters))
+
+    @property
+    def spec_built(self):
+        return not (self._pending_docs or self._configure_pending)
+
+    def spec_json(self):
+        """The serialized document: prebuilt file if configured, else built once."""
+        if self._spec_json is None:
+            with self._spec_lock:
+                if self._spec_json is None:
+                    path = self._app.config.get("OPENAPI_SPEC_FILE")
+                    if path and os.path.exists(path):
+                        with open(path, encoding="utf-8") as f:
+                            self._spec_json = f.read()
+                    else:
+                        self._spec_json = json.dumps(self.spec.to_dict(), indent=2)
+                    self._spec_etag = hashlib.sha256(self._spec_json.encode("utf-8")).hexdigest()[:32]
+        return self._spec_json
+
+    def _openapi_json(self):
+        body = self.spec_json()
+        response = current_app.response_class(body, mimetype="application/json")
+        response.set_etag(self._spec_etag)
+        return response.make_conditional(request)
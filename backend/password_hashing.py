@@ -0,0 +1,111 @@
+# FILE: password_hashing.py
+"""
+Password hashing off the request thread, in a small bounded pool.
+
+PBKDF2/scrypt are CPU-bound; a login burst would otherwise pin every
+request worker. hashlib releases the GIL while hashing, so a thread pool
+runs hashes in parallel with request handling ("process" is available
+for interpreters where that does not hold). Admission is bounded: at most
+PASSWORD_HASH_WORKERS running plus PASSWORD_HASH_MAX_PENDING waiting;
+beyond that callers get HashingPoolSaturated (-> 503) instead of queueing.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app, has_app_context
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS, check_password_hash, generate_password_hash
+
+# Parameters werkzeug fills in when the method leaves them out
+METHOD_DEFAULTS = {
+    "scrypt": ("32768", "8", "1"),
+    "pbkdf2": ("sha256", str(DEFAULT_PBKDF2_ITERATIONS)),
+}
+
+
+class HashingPoolSaturated(Exception):
+    """Every hashing slot is taken; the caller should answer 503."""
+
+
+def method_prefix(method):
+    """The prefix werkzeug writes for `method` ("scrypt" -> "scrypt:32768:8:1")."""
+    name, *args = method.split(":")
+    defaults = METHOD_DEFAULTS.get(name, ())
+    return ":".join([name, *args, *defaults[len(args):]])
+
+
+class PasswordHasher:
+    def __init__(self, method, workers=2, max_pending=8, executor="thread"):
+        self.method = method
+        self.prefix = method_prefix(method)
+        self.workers = workers
+        self.executor_kind = executor
+        self._slots = threading.BoundedSemaphore(workers + max_pending)
+        self._executor = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        # Pools do not survive fork: build one per worker process
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    if self.executor_kind == "process":
+                        # multiprocessing is only imported when asked for
+                        from concurrent.futures import ProcessPoolExecutor as cls
+                    else:
+                        cls = ThreadPoolExecutor
+                    self._executor = cls(max_workers=self.workers)
+                    self._pid = os.getpid()
+        return self._executor
+
+    def run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HashingPoolSaturated()
+        try:
+            future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future.result()
+
+    def hash(self, password):
+        return self.run(generate_password_hash, password, self.method)
+
+    def verify(self, pwhash, password):
+        return self.run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        """True when pwhash was made with another algorithm/cost than configured."""
+        return pwhash.split("$", 1)[0] != self.prefix
+
+
+def password_hasher():
+    """The current app's PasswordHasher (created on first use)."""
+    hasher = current_app.extensions.get("password_hasher")
+    if hasher is None:
+        config = current_app.config
+        hasher = current_app.extensions.setdefault(
+            "password_hasher",
+            PasswordHasher(
+                config["PASSWORD_HASH_METHOD"],
+                workers=config["PASSWORD_HASH_WORKERS"],
+                max_pending=config["PASSWORD_HASH_MAX_PENDING"],
+                executor=config["PASSWORD_HASH_EXECUTOR"],
+            ),
+        )
+    return hasher
+
+
+def hash_password(password):
+    if has_app_context():
+        return password_hasher().hash(password)
+    return generate_password_hash(password)
+
+
+def verify_password(pwhash, password):
+    if has_app_context():
+        return password_hasher().verify(pwhash, password)
+    return check_password_hash(pwhash, password)
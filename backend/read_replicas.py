@@ -0,0 +1,122 @@
+# FILE: read_replicas.py
+"""
+Read-replica routing.
+
+Each DATABASE_REPLICA_URLS entry gets its own engine ("replica_0",
+"replica_1", ...). They are deliberately not Flask-SQLAlchemy binds: no
+model lives on them, and db.create_all() must never touch a replica.
+A GET/HEAD request is given one replica, round-robin, and
+db.RoutingSession sends its SELECTs there. Everything else (writes,
+locking reads, background jobs) uses the primary.
+
+Read-your-writes: after a successful write, the client reads from the
+primary for READ_YOUR_WRITES_SECONDS. The window is tracked two ways:
+a cookie, which works across gunicorn workers for the web frontend, and
+a per-process map of user ids, for API clients that send a bearer token
+but drop cookies.
+"""
+
+import itertools
+import math
+import threading
+import time
+
+from flask import current_app, g, request
+from sqlalchemy import create_engine
+
+from db_pool import engine_options
+import auth_utils as auth_module
+
+READ_METHODS = ("GET", "HEAD", "OPTIONS")
+PRIMARY_COOKIE = "read_primary_until"
+
+
+class ReplicaRouter:
+    def __init__(self, engines, window):
+        self.engines = engines  # name -> Engine
+        self.window = window
+        self._cycle = itertools.cycle(list(engines.values()))
+        self._lock = threading.Lock()
+        self._recent_writers = {}  # user id -> monotonic deadline
+
+    def pick(self):
+        with self._lock:
+            return next(self._cycle)
+
+    def note_write(self, user_id):
+        now = time.monotonic()
+        with self._lock:
+            if len(self._recent_writers) > 1024:
+                self._recent_writers = {
+                    uid: until for uid, until in self._recent_writers.items() if until > now
+                }
+            self._recent_writers[user_id] = now + self.window
+
+    def wrote_recently(self, user_id):
+        until = self._recent_writers.get(user_id)
+        return until is not None and until > time.monotonic()
+
+    def has_recent_writers(self):
+        return bool(self._recent_writers)
+
+
+def replica_router():
+    return current_app.extensions.get("read_replicas")
+
+
+def _bearer_user_id():
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    payload = auth_module.decode_token(token.strip())
+    return payload.get("user_id") if payload else None
+
+
+def _reads_primary(router):
+    if g.get("cache_warmup"):
+        return True  # fresh rows for the cache (cache_warmup.py)
+    try:
+        if float(request.cookies.get(PRIMARY_COOKIE, 0)) > time.time():
+            return True
+    except ValueError:
+        pass
+    if router.has_recent_writers():
+        user_id = _bearer_user_id()
+        return user_id is not None and router.wrote_recently(user_id)
+    return False
+
+
+def route_request():
+    router = replica_router()
+    if request.method in READ_METHODS and not _reads_primary(router):
+        g.read_replica = router.pick()
+    else:
+        g.read_replica = None
+
+
+def remember_write(response):
+    router = replica_router()
+    if request.method in READ_METHODS or response.status_code >= 400 or router.window <= 0:
+        return response
+    user = g.get("current_user")
+    if user is not None:
+        router.note_write(user.id)
+    response.set_cookie(
+        PRIMARY_COOKIE,
+        str(time.time() + router.window),
+        max_age=math.ceil(router.window),
+        httponly=True,
+        samesite="Lax",
+    )
+    return response
+
+
+def init_read_replicas(app):
+    """Create the replica engines and register the per-request routing hooks."""
+    engines = {
+        f"replica_{i}": create_engine(url, **engine_options(app.config, url))
+        for i, url in enumerate(app.config["DATABASE_REPLICA_URLS"])
+    }
+    app.extensions["read_replicas"] = ReplicaRouter(engines, app.config["READ_YOUR_WRITES_SECONDS"])
+    app.before_request(route_request)
+    app.after_request(remember_write)
@@ -0,0 +1,6 @@
+from app import app
+from models.report_summary import ReportSummary, rebuild_report_summaries
+
+with app.app_context():
+    rebuild_report_summaries()
+    print("Report summaries rebuilt:", ReportSummary.query.count(), "rows")
@@ -0,0 +1,346 @@
+# FILE: report_ingest.py
+"""
+Write-behind ingestion for POST /reports (REPORT_INGESTION_MODE=queue).
+
+The endpoint validates the payload, submits it here and answers 202.
+A background writer drains the bounded queue and inserts each batch with
+one multi-row INSERT (plus the report summary upserts) and one commit.
+
+The endpoint checks the product before queueing, and answers with a
+Location (GET /reports/ingest/<ingest_id>) that resolves to the report
+once it is written. A batch that fails is retried up to
+REPORT_INGEST_MAX_ATTEMPTS times, then written row by row; rows that
+still fail (e.g. a user deleted while the report was queued), and rows
+whose product was deleted meanwhile, are logged and appended to
+dead-letter.jsonl in the journal directory, so they cannot block the
+rows queued behind them.
+
+Durability: when REPORT_INGEST_JOURNAL_DIR is set, every submission is
+appended to a per-process journal. The journal is fsynced each time the
+writer takes a batch, so a crash can only lose submissions made since
+the previous batch. Each fsync starts a new segment file, and a segment
+is deleted once all of its rows are written, so the journal stays about
+as large as the queue. On startup, journals left behind by dead
+processes are replayed; replay is idempotent thanks to the unique
+Report.ingest_id.
+Journal ownership is an flock, so without fcntl (Windows) the journal is
+disabled and queued submissions are lost if the process dies.
+"""
+
+import atexit
+import glob
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from background import WorkerThread
+from db import db
+from models.product import Product
+from models.report import Report
+from models.report_summary import apply_report_changes
+
+try:
+    import fcntl
+except ImportError:  # not POSIX: no journal
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+class IngestQueueFull(Exception):
+    """Raised by submit() when the queue is at capacity (backpressure)."""
+
+
+class ReportJournal:
+    """
+    Append-only JSON-lines journal owned (flock) by one process, in
+    segments: sync() seals the current segment and starts a new one, and
+    release(done) deletes sealed segments whose rows are all among the
+    first `done` appended.
+    """
+
+    def __init__(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.name = f"reports-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.appended = 0
+        self._sealed = []  # (file, rows appended when it was sealed), oldest first
+        self._segments = 0
+        self._open_segment()
+
+    def _open_segment(self):
+        self._segments += 1
+        path = os.path.join(self.directory, f"{self.name}-{self._segments:06d}.jsonl")
+        self._file = open(path, "a", encoding="utf-8")
+        fcntl.flock(self._file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        self._file_start = self.appended
+
+    def append(self, row):
+        self._file.write(json.dumps(row, default=str) + "\n")
+        self.appended += 1
+
+    def sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        if self.appended > self._file_start:
+            self._sealed.append((self._file, self.appended))
+            self._open_segment()
+
+    def release(self, done):
+        while self._sealed and self._sealed[0][1] <= done:
+            f, _ = self._sealed.pop(0)
+            f.close()
+            os.remove(f.name)
+
+    def paths(self):
+        return [f.name for f, _ in self._sealed] + [self._file.name]
+
+    def close(self):
+        for f in [f for f, _ in self._sealed] + [self._file]:
+            f.close()
+            os.remove(f.name)
+        self._sealed = []
+
+    @staticmethod
+    def orphaned_rows(directory):
+        """Yield (path, rows) for journals whose owning process is gone."""
+        for path in sorted(glob.glob(os.path.join(directory, "reports-*.jsonl"))):
+            with open(path, "r+", encoding="utf-8") as f:
+                try:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue  # a live worker still owns it
+                rows = []
+                for line in f:
+                    try:
+                        rows.append(json.loads(line))
+                    except ValueError:
+                        break  # torn final line from the crash
+                yield path, rows
+
+
+class ReportIngestQueue:
+    def __init__(
+        self,
+        app,
+        maxsize=10000,
+        batch_size=500,
+        flush_interval=0.2,
+        journal_dir=None,
+        backend=None,
+        max_attempts=5,
+        retry_delay=1.0,
+        background=True,
+    ):
+        """
+        `backend` may be any object with the queue.Queue interface
+        (put_nowait/get/get_nowait); defaults to a bounded queue.Queue.
+        With `background` off there is no writer thread and no journal:
+        queued rows are written when flush() is called.
+        """
+        self.app = app
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.journal_dir = journal_dir
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.queue = backend if backend is not None else queue.Queue(maxsize)
+        self.journal = None
+        self.done = 0  # rows taken off the queue and written or dead-lettered
+        self.dead_lettered = 0
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._worker = WorkerThread(
+            self._run, "report-ingest-writer", on_start=self._on_start, enabled=background
+        )
+
+    # --- producer side (request threads) ---
+
+    def submit(self, user_id, product_id, barcode, message, evidence_url):
+        """Queue a report for insertion; returns the row dict (with ingest_id)."""
+        self._worker.ensure_started()
+        now = datetime.utcnow()
+        row = {
+            "ingest_id": uuid.uuid4().hex,
+            "user_id": user_id,
+            "product_id": product_id,
+            "barcode": barcode,
+            "message": message,
+            "evidence_url": evidence_url,
+            "status": "pending",
+            "created_at": now,
+            "updated_at": now,
+        }
+        with self._lock:
+            try:
+                self.queue.put_nowait(row)
+            except queue.Full:
+                raise IngestQueueFull()
+            if self.journal:
+                self.journal.append(row)
+        return row
+
+    # --- consumer side (writer thread) ---
+
+    def _on_start(self):
+        if self.journal_dir and fcntl is None:
+            logger.warning("REPORT_INGEST_JOURNAL_DIR ignored: the journal needs fcntl (POSIX)")
+        elif self.journal_dir:
+            self.replay_orphans()
+            with self._lock:
+                self.journal = ReportJournal(self.journal_dir)
+        self._stop.clear()
+        atexit.register(self.stop)
+
+    def _take_batch(self, timeout):
+        rows = []
+        try:
+            rows.append(self.queue.get(timeout=timeout))
+            while len(rows) < self.batch_size:
+                rows.append(self.queue.get_nowait())
+        except queue.Empty:
+            pass
+        return rows
+
+    def _run(self):
+        while not self._stop.is_set():
+            rows = self._take_batch(self.flush_interval)
+            if rows:
+                self._deliver(rows)
+
+    def _deliver(self, rows):
+        """Write a batch, retrying; then row by row, dead-lettering what fails."""
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                self._write(rows)
+                return
+            except Exception:
+                logger.exception("Report batch insert failed (attempt %d of %d)", attempt, self.max_attempts)
+            if attempt < self.max_attempts:
+                time.sleep(self.retry_delay)
+        for row in rows:
+            try:
+                self._write([row])
+            except Exception as error:
+                with self._write_lock:
+                    self._dead_letter(row, error)
+                    self._done(1)
+
+    def _write(self, rows):
+        with self._write_lock:
+            if self.journal:
+                with self._lock:
+                    self.journal.sync()
+            with self.app.app_context():
+                for row in self.write_batch(rows):
+                    self._dead_letter(row, f"unknown product {row['product_id']}")
+            self._done(len(rows))
+
+    def _done(self, count):
+        # Rows leave the queue in journal order, so the first `done` journaled
+        # rows are all in the database (or dead-lettered)
+        self.done += count
+        if self.journal:
+            with self._lock:
+                self.journal.release(self.done)
+
+    def _dead_letter(self, row, error):
+        line = json.dumps(row, default=str)
+        logger.error("Dead-lettering queued report %s (%s): %s", row["ingest_id"], error, line)
+        if self.journal_dir:
+            os.makedirs(self.journal_dir, exist_ok=True)
+            with open(os.path.join(self.journal_dir, "dead-letter.jsonl"), "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+        self.dead_lettered += 1
+
+    def flush(self):
+        """Synchronously write everything currently queued."""
+        while True:
+            rows = self._take_batch(timeout=0)
+            if not rows:
+                return
+            self._deliver(rows)
+
+    def stop(self):
+        self._stop.set()
+        self._worker.join(timeout=5)
+        self.flush()
+        if self.journal:
+            with self._lock:
+                self.journal.close()
+                self.journal = None
+
+    # --- database ---
+
+    @staticmethod
+    def write_batch(rows):
+        """
+        Insert one batch with a multi-row INSERT and a single commit.
+        Returns the rows left out because their product no longer exists.
+        """
+        dropped = []
+        product_ids = {row["product_id"] for row in rows if row["product_id"]}
+        if product_ids:
+            known = {
+                product_id
+                for (product_id,) in db.session.query(Product.id).filter(
+                    Product.id.in_(product_ids)
+                )
+            }
+            dropped = [row for row in rows if row["product_id"] and row["product_id"] not in known]
+            rows = [row for row in rows if not row["product_id"] or row["product_id"] in known]
+        if not rows:
+            return dropped
+
+        db.session.execute(insert(Report), rows)
+        apply_report_changes(
+            (row["product_id"], row["barcode"], None, "pending", row["created_at"])
+            for row in rows
+        )
+        db.session.commit()
+        return dropped
+
+    def replay_orphans(self):
+        """Insert rows from journals of dead processes that never reached the DB."""
+        with self.app.app_context():
+            for path, rows in ReportJournal.orphaned_rows(self.journal_dir):
+                for row in rows:
+                    for key in ("created_at", "updated_at"):
+                        row[key] = datetime.fromisoformat(row[key])
+                for start in range(0, len(rows), self.batch_size):
+                    chunk = rows[start:start + self.batch_size]
+                    existing = {
+                        ingest_id
+                        for (ingest_id,) in db.session.query(Report.ingest_id).filter(
+                            Report.ingest_id.in_([row["ingest_id"] for row in chunk])
+                        )
+                    }
+                    dropped = self.write_batch([row for row in chunk if row["ingest_id"] not in existing])
+                    for row in dropped:
+                        self._dead_letter(row, f"unknown product {row['product_id']}")
+                logger.info("Replayed %d queued reports from %s", len(rows), path)
+                os.remove(path)
+
+
+def init_report_ingestion(app):
+    """Attach a write-behind queue to the app (started on first submit)."""
+    ingest = ReportIngestQueue(
+        app,
+        maxsize=app.config["REPORT_INGEST_QUEUE_SIZE"],
+        batch_size=app.config["REPORT_INGEST_BATCH_SIZE"],
+        flush_interval=app.config["REPORT_INGEST_FLUSH_INTERVAL"],
+        journal_dir=app.config["REPORT_INGEST_JOURNAL_DIR"],
+        max_attempts=app.config["REPORT_INGEST_MAX_ATTEMPTS"],
+    )
+    app.extensions["report_ingest"] = ingest
+    return ingest
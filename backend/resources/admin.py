@@ -0,0 +1,80 @@
+# FILE: resources/admin.py
+
+from flask import current_app, request
+from flask.views import MethodView
+from flask_smorest import Blueprint, abort
+
+from db import db
+from db_pool import pool_snapshot
+from scan_analytics import top_missing, top_scanned
+import auth_utils as auth_module
+
+blp = Blueprint("Admin", __name__, description="Operational endpoints (admin only)")
+
+
+@blp.route("/admin/db-pool")
+class DatabasePool(MethodView):
+    @blp.doc(security=[{"BearerAuth": []}])
+    @auth_module.admin_required
+    def get(self):
+        """
+        Live connection pool stats for this worker process: size, checked
+        out, overflow, threads waiting for a connection and a histogram of
+        checkout wait times (cumulative, seconds).
+        """
+        pools = {
+            "default" if bind is None else bind: pool_snapshot(engine)
+            for bind, engine in db.engines.items()
+        }
+        replicas = current_app.extensions.get("read_replicas")
+        if replicas is not None:
+            pools.update(
+                (name, pool_snapshot(engine)) for name, engine in replicas.engines.items()
+            )
+        return pools
+
+
+@blp.route("/admin/scans")
+class ScanAnalytics(MethodView):
+    @blp.doc(
+        security=[{"BearerAuth": []}],
+        parameters=[
+            {
+                "in": "query",
+                "name": "hours",
+                "schema": {"type": "integer", "minimum": 1, "maximum": 720, "default": 24},
+                "description": "Time window, in hours up to now.",
+            },
+            {
+                "in": "query",
+                "name": "limit",
+                "schema": {"type": "integer", "minimum": 1, "maximum": 100, "default": 20},
+                "description": "Rows in each list.",
+            },
+        ],
+    )
+    @auth_module.admin_required
+    def get(self):
+        """
+        Most scanned barcodes and most scanned barcodes missing from the
+        catalog over the last ?hours=. Scans reach the database every
+        SCAN_FLUSH_INTERVAL seconds, so the latest ones may not show yet.
+        """
+        hours = request.args.get("hours", default=24, type=int)
+        limit = request.args.get("limit", default=20, type=int)
+        if not 1 <= hours <= 720:
+            abort(400, message="hours must be between 1 and 720.")
+        if not 1 <= limit <= 100:
+            abort(400, message="limit must be between 1 and 100.")
+
+        since, scanned = top_scanned(hours, limit)
+        recorder = current_app.extensions.get("scan_analytics")
+        return {
+            "since": since,
+            "top_scanned": [
+                {"barcode": barcode, "scans": scans, "misses": misses}
+                for barcode, scans, misses in scanned
+            ],
+            "top_missing": [row.to_dict() for row in top_missing(since, limit)],
+            "buffer": recorder.stats() if recorder is not None else None,
+        }
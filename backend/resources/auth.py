@@ -6,6 +6,7 @@ from sqlalchemy.exc import IntegrityError
 
 from db import db
 from models.user import User
+from password_hashing import HashingPoolSaturated, password_hasher
 from schema import UserRegisterSchema, UserLoginSchema, AuthResponseSchema
 import auth_utils as auth_module
 
@@ -31,7 +32,10 @@ class UserRegister(MethodView):
             email=data["email"],
             role="user",  # Default role
         )
-        user.set_password(data["password"])
+        try:
+            user.set_password(data["password"])
+        except HashingPoolSaturated:
+            abort(503, message="Server busy, please retry shortly.")
 
         db.session.add(user)
         try:
@@ -41,7 +45,9 @@ class UserRegister(MethodView):
             abort(400, message="Failed to create user.")
 
         # Generate token
-        token = auth_module.create_access_token(user.id, user.role)
+        token = auth_module.create_access_token(
+            user.id, user.role, token_version=user.token_version
+        )
 
         return {
             "access_token": token,
@@ -57,11 +63,21 @@ class UserLogin(MethodView):
         """Login user and return JWT token"""
         # Public access, no role restrictions
         user = User.query.filter_by(email=data["email"]).first()
-        if not user or not user.check_password(data["password"]):
-            abort(401, message="Invalid email or password.")
+        try:
+            if not user or not user.check_password(data["password"]):
+                abort(401, message="Invalid email or password.")
+
+            # Transparent upgrade when PASSWORD_HASH_METHOD changed
+            if password_hasher().needs_rehash(user.password_hash):
+                user.set_password(data["password"])
+                db.session.commit()
+        except HashingPoolSaturated:
+            abort(503, message="Server busy, please retry shortly.")
 
         # Generate token
-        token = auth_module.create_access_token(user.id, user.role)
+        token = auth_module.create_access_token(
+            user.id, user.role, token_version=user.token_version
+        )
 
         return {
             "access_token": token,
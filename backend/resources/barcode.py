@@ -3,12 +3,18 @@
 from decimal import Decimal, InvalidOperation
 from urllib.parse import unquote
 
+from flask import current_app, g, request
 from flask.views import MethodView
 from flask_smorest import Blueprint, abort
-from sqlalchemy import cast, Numeric
+from sqlalchemy import and_, cast, or_, select, Numeric
+from sqlalchemy.orm import joinedload, selectinload
+from werkzeug.exceptions import HTTPException
 
+from cache import cached
+from db import run_plan
 from models.product import Product
 from models.brand_alternative import BrandAlternative
+from models.report_summary import ReportSummary
 from schema import BarcodeResultSchema  # keep your import name as-is
 
 blp = Blueprint("Barcode", __name__, description="Barcode lookup")
@@ -83,71 +89,177 @@ def format_barcode_for_output(raw: str) -> str:
     return str(raw)
 
 
-# Accept characters like "+" and "e" in the path
-@blp.route("/barcode/<path:barcode>")
-class BarcodeLookup(MethodView):
-    @blp.response(200, BarcodeResultSchema)
-    def get(self, barcode):
-        """
-        GET /barcode/{barcode}
-        """
-        # Normalize input to digits only
-        raw_clean = clean_barcode_input(barcode)
-        product = Product.query.filter_by(barcode=raw_clean).first()
-
-        if product:
-            barcode = format_barcode_for_output(product.barcode)
-        else:
-            barcode = normalize_barcode_or_400(raw_clean)
-            product = Product.query.filter(
+def report_counts_plan(product, barcode):
+    """
+    "Reported N times" badge from the maintained counters: reports linked
+    to the product, or to the barcode when none are linked.
+    """
+    summaries = yield select(ReportSummary).where(
+        or_(
+            and_(ReportSummary.scope == "product", ReportSummary.key == str(product.id)),
+            and_(ReportSummary.scope == "barcode", ReportSummary.key == barcode),
+        )
+    ), True
+    rows = {row.scope: row for row in summaries}
+    row = rows.get("product") or rows.get("barcode")
+    if not row:
+        return {"pending": 0, "approved": 0, "rejected": 0, "total": 0}
+    return {
+        "pending": row.pending_count,
+        "approved": row.approved_count,
+        "rejected": row.rejected_count,
+        "total": row.total_count,
+    }
+
+
+# Brand and categories are always needed; load them with the product
+PRODUCT_LOAD_OPTIONS = (joinedload(Product.brand), selectinload(Product.categories))
+
+
+def resolve_product_plan(raw):
+    """
+    Find the product for a raw barcode: exact match first, then the
+    normalized form (also matching numeric/scientific-notation storage).
+    Returns (product, barcode for output).
+    """
+    # Normalize input to digits only
+    raw_clean = clean_barcode_input(raw)
+    product = yield (
+        select(Product).where(Product.barcode == raw_clean).options(*PRODUCT_LOAD_OPTIONS).limit(1),
+        False,
+    )
+
+    if product:
+        barcode = format_barcode_for_output(product.barcode)
+    else:
+        barcode = normalize_barcode_or_400(raw_clean)
+        product = yield (
+            select(Product)
+            .where(
                 (Product.barcode.in_([barcode, raw_clean]))
                 | (cast(Product.barcode, Numeric) == int(barcode))
-            ).first()
-        if not product:
-            abort(404, message="Product not found.")
-
-        brand = product.brand
-        if not brand:
-            # Data integrity issue -> server-side error
-            abort(500, message="Product has no brand.")
-
-        # Not boycotted → return empty alternatives (still a valid flow)
-        if not brand.boycott_status:
-            return {
-                "barcode": barcode,
-                "product_name": product.name,
-                "brand": brand_to_dict(brand),
-                "alternatives": [],
-            }
+            )
+            .options(*PRODUCT_LOAD_OPTIONS)
+            .limit(1),
+            False,
+        )
+    if not product:
+        abort(404, message="Product not found.")
+
+    if not product.brand:
+        # Data integrity issue -> server-side error
+        abort(500, message="Product has no brand.")
+
+    return product, barcode
+
+
+def alternative_brands_plan(product):
+    """Alternatives for a boycotted product's brand, best score first."""
+    brand = product.brand
+
+    # Not boycotted → no alternatives (still a valid flow)
+    if not brand.boycott_status:
+        return []
+
+    # Product categories (many-to-many)
+    product_category_ids = [c.id for c in (product.categories or [])]
 
-        # Product categories (many-to-many)
-        product_category_ids = [c.id for c in (product.categories or [])]
+    stmt = select(BrandAlternative).where(
+        BrandAlternative.boycotted_brand_id == brand.id
+    )
 
-        q = BrandAlternative.query.filter(
-            BrandAlternative.boycotted_brand_id == brand.id
+    # Filter alternatives by product categories when available;
+    # also allow "global" alternatives where category_id is NULL
+    if product_category_ids:
+        stmt = stmt.where(
+            (BrandAlternative.category_id.in_(product_category_ids))
+            | (BrandAlternative.category_id.is_(None))
         )
+    else:
+        stmt = stmt.where(BrandAlternative.category_id.is_(None))
 
-        # Filter alternatives by product categories when available;
-        # also allow "global" alternatives where category_id is NULL
-        if product_category_ids:
-            q = q.filter(
-                (BrandAlternative.category_id.in_(product_category_ids))
-                | (BrandAlternative.category_id.is_(None))
-            )
-        else:
-            q = q.filter(BrandAlternative.category_id.is_(None))
+    links = yield (
+        stmt.options(joinedload(BrandAlternative.alternative_brand))
+        .order_by(BrandAlternative.score.desc()),
+        True,
+    )
+    return [link.alternative_brand for link in links if link.alternative_brand]
 
-        links = q.order_by(BrandAlternative.score.desc()).all()
 
-        alternatives = [
-            brand_to_dict(link.alternative_brand)
-            for link in links
-            if link.alternative_brand
-        ]
+def product_alternatives_plan(raw):
+    product, _ = yield from resolve_product_plan(raw)
+    return (yield from alternative_brands_plan(product))
+
+
+def barcode_lookup_plan(raw, include_reports=False):
+    product, barcode = yield from resolve_product_plan(raw)
+    alternatives = yield from alternative_brands_plan(product)
+
+    result = {
+        "barcode": barcode,
+        "product_name": product.name,
+        "brand": brand_to_dict(product.brand),
+        "alternatives": [brand_to_dict(b) for b in alternatives],
+    }
+    if include_reports:
+        result["reports"] = yield from report_counts_plan(product, barcode)
+    return result
+
+
+@cached(
+    "barcode",
+    key=format_barcode_for_output,
+    tables=("products", "brands", "brand_alternatives", "categories", "product_category"),
+)
+def cached_barcode_lookup(raw):
+    # Keyed on the canonical digits, so "6.194002400707e12" shares the entry
+    return run_plan(barcode_lookup_plan(raw))
+
+
+def catalog_lookup(raw):
+    # In-memory catalog (catalog_index.py) once built, else the database
+    catalog = current_app.extensions.get("catalog_index")
+    index = catalog.current() if catalog is not None else None
+    if index is not None:
+        return index.lookup(raw)
+    return cached_barcode_lookup(raw)
+
+
+def record_scan(barcode, found):
+    # Analytics (scan_analytics.py): buffered in memory, never blocks
+    recorder = current_app.extensions.get("scan_analytics")
+    if recorder is not None and not g.get("cache_warmup"):
+        recorder.record(barcode, found)
 
-        return {
-            "barcode": barcode,
-            "product_name": product.name,
-            "brand": brand_to_dict(brand),
-            "alternatives": alternatives,
-        }
+
+# Accept characters like "+" and "e" in the path
+@blp.route("/barcode/<path:barcode>")
+class BarcodeLookup(MethodView):
+    @blp.doc(
+        parameters=[
+            {
+                "in": "query",
+                "name": "include",
+                "schema": {"type": "string", "enum": ["reports"]},
+                "required": False,
+                "description": "Add report counts for the product. Example: ?include=reports",
+            }
+        ]
+    )
+    @blp.response(200, BarcodeResultSchema)
+    def get(self, barcode):
+        """
+        GET /barcode/{barcode}
+        """
+        try:
+            if request.args.get("include") == "reports":
+                # Report counts change with every ingested report: not cached
+                result = run_plan(barcode_lookup_plan(barcode, include_reports=True))
+            else:
+                result = catalog_lookup(barcode)
+        except HTTPException as e:
+            if e.code == 404:  # valid barcode, not in the catalog
+                record_scan(format_barcode_for_output(barcode), found=False)
+            raise
+        record_scan(result["barcode"], found=True)
+        return result
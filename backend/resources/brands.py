@@ -3,9 +3,10 @@
 from flask.views import MethodView
 from flask_smorest import Blueprint, abort
 from flask import request
-from sqlalchemy import asc, desc
+from sqlalchemy import asc, desc, select
 from sqlalchemy.exc import IntegrityError
 
+from cache import cached_page
 from db import db
 from models.brand import Brand
 from models.product import Product
@@ -16,6 +17,66 @@ import auth_utils as auth_module
 
 blp = Blueprint("Brands", __name__, description="Brands endpoints")
 
+# Query defaults, so equivalent list URLs share one cache entry
+LIST_DEFAULTS = {"sort": "name", "order": "asc", "page": 1, "limit": 20}
+
+
+def brand_list_stmt(args):
+    """SELECT for GET /brands from its query args (filters, sort, page)."""
+    query = select(Brand)
+
+    # --- Filtering: search ---
+    search = args.get("search", type=str)
+    if search:
+        query = query.where(Brand.name.ilike(f"%{search}%"))
+
+    # --- Filtering: boycott_status (accept true/false) ---
+    boycott_status_raw = args.get("boycott_status")
+    if boycott_status_raw is not None:
+        val = boycott_status_raw.strip().lower()
+        if val in ("true", "1", "yes"):
+            query = query.where(Brand.boycott_status.is_(True))
+        elif val in ("false", "0", "no"):
+            query = query.where(Brand.boycott_status.is_(False))
+        else:
+            abort(400, message="Invalid boycott_status. Use true or false.")
+
+    # --- Filtering: category_id (brands that have products in this category) ---
+    category_id = args.get("category_id", type=int)
+    if category_id is not None:
+        if category_id < 1:
+            abort(400, message="category_id must be >= 1.")
+
+        query = (
+            query.join(Brand.products)
+                 .join(Product.categories)
+                 .where(Category.id == category_id)
+                 .distinct()
+        )
+
+    # --- Sorting ---
+    sort = args.get("sort", default="name", type=str)
+    order = args.get("order", default="asc", type=str)
+
+    if sort != "name":
+        abort(400, message="Invalid sort field. Only 'name' is supported.")
+    if order not in ("asc", "desc"):
+        abort(400, message="Invalid order. Use 'asc' or 'desc'.")
+
+    direction = asc if order == "asc" else desc
+    query = query.order_by(direction(Brand.name), Brand.id.asc())
+
+    # --- Pagination ---
+    page = args.get("page", default=1, type=int)
+    limit = args.get("limit", default=20, type=int)
+
+    if page < 1:
+        abort(400, message="page must be >= 1.")
+    if limit < 1 or limit > 100:
+        abort(400, message="limit must be between 1 and 100.")
+
+    return query.offset((page - 1) * limit).limit(limit)
+
 
 @blp.route("/brands")
 class BrandList(MethodView):
@@ -73,63 +134,17 @@ class BrandList(MethodView):
         ]
     )
     @blp.response(200, BrandSchema(many=True))
+    @cached_page(
+        "brands",
+        BrandSchema(many=True),
+        tables=("brands", "products", "product_category", "categories"),
+        defaults=LIST_DEFAULTS,
+    )
     def get(self):
         """
         GET /brands
         """
-        query = Brand.query
-
-        # --- Filtering: search ---
-        search = request.args.get("search", type=str)
-        if search:
-            query = query.filter(Brand.name.ilike(f"%{search}%"))
-
-        # --- Filtering: boycott_status (accept true/false) ---
-        boycott_status_raw = request.args.get("boycott_status")
-        if boycott_status_raw is not None:
-            val = boycott_status_raw.strip().lower()
-            if val in ("true", "1", "yes"):
-                query = query.filter(Brand.boycott_status.is_(True))
-            elif val in ("false", "0", "no"):
-                query = query.filter(Brand.boycott_status.is_(False))
-            else:
-                abort(400, message="Invalid boycott_status. Use true or false.")
-
-        # --- Filtering: category_id (brands that have products in this category) ---
-        category_id = request.args.get("category_id", type=int)
-        if category_id is not None:
-            if category_id < 1:
-                abort(400, message="category_id must be >= 1.")
-
-            query = (
-                query.join(Brand.products)
-                     .join(Product.categories)
-                     .filter(Category.id == category_id)
-                     .distinct()
-            )
-
-        # --- Sorting ---
-        sort = request.args.get("sort", default="name", type=str)
-        order = request.args.get("order", default="asc", type=str)
-
-        if sort != "name":
-            abort(400, message="Invalid sort field. Only 'name' is supported.")
-        if order not in ("asc", "desc"):
-            abort(400, message="Invalid order. Use 'asc' or 'desc'.")
-
-        direction = asc if order == "asc" else desc
-        query = query.order_by(direction(Brand.name), Brand.id.asc())
-
-        # --- Pagination ---
-        page = request.args.get("page", default=1, type=int)
-        limit = request.args.get("limit", default=20, type=int)
-
-        if page < 1:
-            abort(400, message="page must be >= 1.")
-        if limit < 1 or limit > 100:
-            abort(400, message="limit must be between 1 and 100.")
-
-        return query.offset((page - 1) * limit).limit(limit).all()
+        return db.session.scalars(brand_list_stmt(request.args)).all()
 
     # ✅ CREATE brand (admin later)
     @blp.arguments(BrandCreateUpdateSchema())
@@ -2,24 +2,47 @@
 
 from flask.views import MethodView
 from flask_smorest import Blueprint, abort
+from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
 
-from db import db
+from cache import cached_page
+from db import db, run_plan
 from models.category import Category
+from models.product import Product
+from resources.barcode import PRODUCT_LOAD_OPTIONS
 from schema import CategorySchema, CategoryCreateUpdateSchema, ProductSchema
 import auth_utils as auth_module
 
 blp = Blueprint("Categories", __name__, description="Categories endpoints")
 
 
+def category_list_stmt():
+    return select(Category).order_by(Category.name.asc(), Category.id.asc())
+
+
+def category_products_plan(slug):
+    category = yield select(Category).where(Category.slug == slug), False
+    if not category:
+        abort(404, message="Category not found.")
+    return (
+        yield select(Product)
+        .join(Product.categories)
+        .where(Category.id == category.id)
+        .options(*PRODUCT_LOAD_OPTIONS)
+        .order_by(Product.id.asc()),
+        True,
+    )
+
+
 @blp.route("/categories")
 class CategoryList(MethodView):
     @blp.response(200, CategorySchema(many=True))
+    @cached_page("categories", CategorySchema(many=True), tables=("categories",))
     def get(self):
         """
         GET /categories
         """
-        return Category.query.order_by(Category.name.asc(), Category.id.asc()).all()
+        return db.session.scalars(category_list_stmt()).all()
 
     # ✅ CREATE category (admin later)
     @blp.arguments(CategoryCreateUpdateSchema())
@@ -97,7 +120,4 @@ class CategoryDetail(MethodView):
 class CategoryProducts(MethodView):
     @blp.response(200, ProductSchema(many=True))
     def get(self, slug):
-        category = Category.query.filter_by(slug=slug).first()
-        if not category:
-            abort(404, message="Category not found.")
-        return category.products
+        return run_plan(category_products_plan(slug))
@@ -4,20 +4,23 @@ from urllib.parse import unquote
 from flask.views import MethodView
 from flask_smorest import Blueprint, abort
 from flask import request
-from sqlalchemy import cast, Numeric
-from sqlalchemy import asc, desc
+from sqlalchemy import asc, desc, select
 from sqlalchemy.exc import IntegrityError
 
-from db import db
+from cache import cached_page
+from db import db, run_plan
 from models.product import Product
 from models.brand import Brand
-from models.brand_alternative import BrandAlternative
 from models.category import Category
+from resources.barcode import PRODUCT_LOAD_OPTIONS, product_alternatives_plan
 from schema import ProductSchema, BrandSchema, ProductCreateUpdateSchema
 import auth_utils as auth_module
 
 blp = Blueprint("Products", __name__, description="Products endpoints")
 
+# Query defaults, so equivalent list URLs share one cache entry
+LIST_DEFAULTS = {"sort": "name", "order": "asc", "page": 1, "limit": 20}
+
 
 def normalize_barcode_or_400(raw: str) -> str:
     s = raw if raw is not None else ""
@@ -52,12 +55,54 @@ def normalize_barcode_or_400(raw: str) -> str:
     return s
 
 
-def clean_barcode_input(raw: str) -> str:
-    s = raw if raw is not None else ""
-    s = unquote(s)
-    s = s.strip()
-    s = "".join(s.split())
-    return s.replace(",", "").replace("_", "")
+def product_list_stmt(args):
+    """SELECT for GET /products from its query args (filters, sort, page)."""
+    query = select(Product).options(*PRODUCT_LOAD_OPTIONS)
+
+    # --- Filters ---
+    search = args.get("search", type=str)
+    brand_id = args.get("brand_id", type=int)
+    category_id = args.get("category_id", type=int)
+
+    # (Optional) reject old param so professor sees clean design
+    if args.get("brand") is not None:
+        abort(400, message="Use brand_id instead of brand (name).")
+
+    if search:
+        query = query.where(Product.name.ilike(f"%{search}%"))
+
+    if brand_id is not None:
+        if brand_id < 1:
+            abort(400, message="brand_id must be >= 1.")
+        query = query.where(Product.brand_id == brand_id)
+
+    if category_id is not None:
+        if category_id < 1:
+            abort(400, message="category_id must be >= 1.")
+        query = query.join(Product.categories).where(Category.id == category_id)
+
+    # --- Sorting ---
+    sort = args.get("sort", default="name", type=str)
+    order = args.get("order", default="asc", type=str)
+
+    if sort != "name":
+        abort(400, message="Invalid sort field. Only 'name' is supported.")
+    if order not in ("asc", "desc"):
+        abort(400, message="Invalid order. Use 'asc' or 'desc'.")
+
+    direction = asc if order == "asc" else desc
+    query = query.order_by(direction(Product.name), Product.id.asc())
+
+    # --- Pagination ---
+    page = args.get("page", default=1, type=int)
+    limit = args.get("limit", default=20, type=int)
+
+    if page < 1:
+        abort(400, message="page must be >= 1.")
+    if limit < 1 or limit > 100:
+        abort(400, message="limit must be between 1 and 100.")
+
+    return query.offset((page - 1) * limit).limit(limit)
 
 
 @blp.route("/products")
@@ -117,56 +162,17 @@ class ProductList(MethodView):
         ]
     )
     @blp.response(200, ProductSchema(many=True))
+    @cached_page(
+        "products",
+        ProductSchema(many=True),
+        tables=("products", "brands", "product_category", "categories"),
+        defaults=LIST_DEFAULTS,
+    )
     def get(self):
         """
         GET /products
         """
-        query = Product.query
-
-        # --- Filters ---
-        search = request.args.get("search", type=str)
-        brand_id = request.args.get("brand_id", type=int)
-        category_id = request.args.get("category_id", type=int)
-
-        # (Optional) reject old param so professor sees clean design
-        if request.args.get("brand") is not None:
-            abort(400, message="Use brand_id instead of brand (name).")
-
-        if search:
-            query = query.filter(Product.name.ilike(f"%{search}%"))
-
-        if brand_id is not None:
-            if brand_id < 1:
-                abort(400, message="brand_id must be >= 1.")
-            query = query.filter(Product.brand_id == brand_id)
-
-        if category_id is not None:
-            if category_id < 1:
-                abort(400, message="category_id must be >= 1.")
-            query = query.join(Product.categories).filter(Category.id == category_id)
-
-        # --- Sorting ---
-        sort = request.args.get("sort", default="name", type=str)
-        order = request.args.get("order", default="asc", type=str)
-
-        if sort != "name":
-            abort(400, message="Invalid sort field. Only 'name' is supported.")
-        if order not in ("asc", "desc"):
-            abort(400, message="Invalid order. Use 'asc' or 'desc'.")
-
-        direction = asc if order == "asc" else desc
-        query = query.order_by(direction(Product.name), Product.id.asc())
-
-        # --- Pagination ---
-        page = request.args.get("page", default=1, type=int)
-        limit = request.args.get("limit", default=20, type=int)
-
-        if page < 1:
-            abort(400, message="page must be >= 1.")
-        if limit < 1 or limit > 100:
-            abort(400, message="limit must be between 1 and 100.")
-
-        return query.offset((page - 1) * limit).limit(limit).all()
+        return db.session.scalars(product_list_stmt(request.args)).all()
 
     # ✅ CREATE product (admin later)
     @blp.arguments(ProductCreateUpdateSchema())
@@ -213,7 +219,7 @@ class ProductDetail(MethodView):
         """
         GET /products/{id}
         """
-        product = Product.query.get(product_id)
+        product = db.session.get(Product, product_id, options=PRODUCT_LOAD_OPTIONS)
         if not product:
             abort(404, message="Product not found.")
         return product
@@ -284,39 +290,7 @@ class ProductDetail(MethodView):
 class ProductBrandAlternatives(MethodView):
     @blp.response(200, BrandSchema(many=True))
     def get(self, barcode):
-        raw_clean = clean_barcode_input(barcode)
-        product = Product.query.filter_by(barcode=raw_clean).first()
-
-        if not product:
-            barcode = normalize_barcode_or_400(raw_clean)
-            product = Product.query.filter(
-                (Product.barcode.in_([barcode, raw_clean]))
-                | (cast(Product.barcode, Numeric) == int(barcode))
-            ).first()
-        if not product:
-            abort(404, message="Product not found.")
-
-        brand = product.brand
-        if not brand:
-            abort(500, message="Product has no brand.")
-
-        if not brand.boycott_status:
-            return []
-
-        product_category_ids = [c.id for c in (product.categories or [])]
-
-        q = BrandAlternative.query.filter(
-            BrandAlternative.boycotted_brand_id == brand.id
-        )
-
-        if product_category_ids:
-            q = q.filter(
-                (BrandAlternative.category_id.in_(product_category_ids))
-                | (BrandAlternative.category_id.is_(None))
-            )
-        else:
-            q = q.filter(BrandAlternative.category_id.is_(None))
-
-        links = q.order_by(BrandAlternative.score.desc()).all()
-
-        return [link.alternative_brand for link in links if link.alternative_brand]
+        """
+        GET /products/{barcode}/alternatives
+        """
+        return run_plan(product_alternatives_plan(barcode))
@@ -1,43 +1,204 @@
 # FILE: resources/reports.py
 
+import base64
+import binascii
+import json
+from datetime import datetime, timedelta
+
 from flask.views import MethodView
 from flask_smorest import Blueprint, abort
-from flask import g, request
+from flask import current_app, g, request, url_for
+from sqlalchemy import and_, or_, update
 from sqlalchemy.exc import IntegrityError
 
 from db import db
 from models.report import Report
 from models.product import Product
-from schema import ReportSchema, ReportCreateSchema, ReportUpdateSchema
+from models.report_summary import ReportSummary, apply_report_changes
+from report_ingest import IngestQueueFull
+from schema import (
+    ReportSchema,
+    ReportCreateSchema,
+    ReportUpdateSchema,
+    ReportBulkModerateSchema,
+    ReportBulkResultSchema,
+    ReportSummarySchema,
+)
 import auth_utils as auth_module
 
 blp = Blueprint("Reports", __name__, description="Reports endpoints")
 
+REPORT_STATUSES = ("pending", "approved", "rejected")
+
+REPORT_LIST_PARAMETERS = [
+    {
+        "in": "query",
+        "name": "status",
+        "schema": {"type": "string", "enum": list(REPORT_STATUSES)},
+        "required": False,
+        "description": "Filter by status. Example: ?status=pending",
+    },
+    {
+        "in": "query",
+        "name": "product_id",
+        "schema": {"type": "integer"},
+        "required": False,
+        "description": "Filter by product ID. Example: ?product_id=55",
+    },
+    {
+        "in": "query",
+        "name": "barcode",
+        "schema": {"type": "string"},
+        "required": False,
+        "description": "Filter by reported barcode. Example: ?barcode=6194002400707",
+    },
+    {
+        "in": "query",
+        "name": "created_after",
+        "schema": {"type": "string", "format": "date-time"},
+        "required": False,
+        "description": "Only reports created at or after this ISO date/time.",
+    },
+    {
+        "in": "query",
+        "name": "created_before",
+        "schema": {"type": "string", "format": "date-time"},
+        "required": False,
+        "description": "Only reports created before this ISO date/time.",
+    },
+    {
+        "in": "query",
+        "name": "cursor",
+        "schema": {"type": "string"},
+        "required": False,
+        "description": "Opaque cursor from the X-Next-Cursor header of the previous page.",
+    },
+    {
+        "in": "query",
+        "name": "limit",
+        "schema": {"type": "integer"},
+        "required": False,
+        "description": "Max results per page (max 100). Example: ?limit=20",
+    },
+]
+
+
+def encode_cursor(report):
+    raw = json.dumps([report.created_at.isoformat(), report.id])
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor_or_400(cursor):
+    try:
+        created_at, report_id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(created_at), int(report_id)
+    except (binascii.Error, UnicodeError, ValueError, TypeError):
+        abort(400, message="Invalid cursor.")
+
+
+def parse_datetime_or_400(name, raw):
+    try:
+        return datetime.fromisoformat(raw)
+    except ValueError:
+        abort(400, message=f"Invalid {name}. Use an ISO date or date-time (e.g. 2025-01-17).")
+
+
+def parse_int_or_400(args, name, default=None):
+    raw = args.get(name)
+    if raw is None or raw == "":
+        return default
+    try:
+        return int(raw)
+    except ValueError:
+        abort(400, message=f"Invalid {name}: must be an integer.")
+
+
+def filter_reports(query, args):
+    """Apply the status/product/barcode/date-range filters from query args."""
+    status = args.get("status")
+    if status:
+        if status not in REPORT_STATUSES:
+            abort(400, message="Invalid status. Must be: pending, approved, or rejected.")
+        query = query.filter(Report.status == status)
+
+    product_id = parse_int_or_400(args, "product_id")
+    if product_id is not None:
+        if product_id < 1:
+            abort(400, message="product_id must be >= 1.")
+        query = query.filter(Report.product_id == product_id)
+
+    barcode = args.get("barcode")
+    if barcode:
+        if not barcode.isdigit():
+            abort(400, message="Invalid barcode format: digits only.")
+        query = query.filter(Report.barcode == barcode)
+
+    created_after = args.get("created_after")
+    if created_after:
+        query = query.filter(Report.created_at >= parse_datetime_or_400("created_after", created_after))
+
+    created_before = args.get("created_before")
+    if created_before:
+        query = query.filter(Report.created_at < parse_datetime_or_400("created_before", created_before))
+
+    return query
+
+
+def paginate_reports(query, args):
+    """
+    Keyset pagination on (created_at, id), newest first.
+    Returns (reports, headers); X-Next-Cursor is set when more rows exist.
+    """
+    limit = parse_int_or_400(args, "limit", default=20)
+    if limit < 1 or limit > 100:
+        abort(400, message="limit must be between 1 and 100.")
+
+    cursor = args.get("cursor")
+    if cursor:
+        created_at, report_id = decode_cursor_or_400(cursor)
+        query = query.filter(
+            or_(
+                Report.created_at < created_at,
+                and_(Report.created_at == created_at, Report.id < report_id),
+            )
+        )
+
+    rows = (
+        query.order_by(Report.created_at.desc(), Report.id.desc())
+        .limit(limit + 1)
+        .all()
+    )
+
+    headers = {}
+    if len(rows) > limit:
+        rows = rows[:limit]
+        headers["X-Next-Cursor"] = encode_cursor(rows[-1])
+    return rows, headers
+
+
 # Updated endpoints with role-based access control
 @blp.route("/reports")
 class ReportList(MethodView):
     @blp.response(200, ReportSchema(many=True))
-    @blp.doc(security=[{"BearerAuth": []}])
+    @blp.doc(security=[{"BearerAuth": []}], parameters=REPORT_LIST_PARAMETERS)
     @auth_module.login_required
     def get(self):
         """
         GET /reports
         Authenticated users only.
         """
-        status = request.args.get("status")
-        query = Report.query
-
-        if status:
-            if status not in ["pending", "approved", "rejected"]:
-                abort(400, message="Invalid status. Must be: pending, approved, or rejected.")
-            query = query.filter_by(status=status)
-
-        reports = query.order_by(Report.created_at.desc()).all()
-        return reports
+        query = filter_reports(Report.query, request.args)
+        reports, headers = paginate_reports(query, request.args)
+        return reports, 200, headers
 
     @blp.arguments(ReportCreateSchema())
     @blp.doc(security=[{"BearerAuth": []}])
     @blp.response(201, ReportSchema())
+    @blp.alt_response(
+        202,
+        schema=ReportSchema(),
+        description="Queued (REPORT_INGESTION_MODE=queue); Location is GET /reports/ingest/{ingest_id}",
+    )
     @auth_module.login_required
     def post(self, data):
         """
@@ -52,10 +213,20 @@ class ReportList(MethodView):
         if not product_id and not barcode:
             abort(400, message="Either product_id or barcode must be provided.")
 
-        if product_id:
-            product = Product.query.get(product_id)
-            if not product:
-                abort(404, message="Product not found.")
+        # A primary-key probe, in queue mode too, so unknown products stay a 404
+        if product_id and db.session.query(Product.id).filter_by(id=product_id).first() is None:
+            abort(404, message="Product not found.")
+
+        ingest = current_app.extensions.get("report_ingest")
+        if ingest is not None:
+            try:
+                row = ingest.submit(
+                    user.id, product_id, barcode, data["message"], data.get("evidence_url")
+                )
+            except IngestQueueFull:
+                abort(503, message="Too many reports right now, please retry shortly.")
+            location = url_for("Reports.ReportIngestStatus", ingest_id=row["ingest_id"])
+            return row, 202, {"Location": location}
 
         report = Report(
             user_id=user.id,
@@ -64,9 +235,13 @@ class ReportList(MethodView):
             message=data["message"],
             evidence_url=data.get("evidence_url"),
             status="pending",
+            created_at=datetime.utcnow(),
         )
 
         db.session.add(report)
+        apply_report_changes(
+            [(product_id, barcode, None, "pending", report.created_at)]
+        )
         try:
             db.session.commit()
         except IntegrityError:
@@ -76,10 +251,388 @@ class ReportList(MethodView):
         return report
 
 
+def claimable(now):
+    """Pending reports with no lease, or whose lease has expired."""
+    return and_(
+        Report.status == "pending",
+        or_(Report.claimed_until.is_(None), Report.claimed_until < now),
+    )
+
+
+def claim_pending_reports(admin_id, n, lease_seconds):
+    """
+    Lease the next n pending reports (oldest first) to admin_id.
+
+    Postgres: SELECT ... FOR UPDATE SKIP LOCKED, so concurrent claimers
+    each skip rows another transaction is leasing.
+    Other databases (SQLite): pick candidates, then a conditional UPDATE
+    that re-checks the claimable predicate. Writers are serialized, so a
+    row already taken by a concurrent claim is simply not returned (the
+    caller may get fewer than n under contention).
+    """
+    now = datetime.utcnow()
+    until = now + timedelta(seconds=lease_seconds)
+    order = (Report.created_at.asc(), Report.id.asc())
+
+    if db.engine.dialect.name == "postgresql":
+        reports = (
+            Report.query.filter(claimable(now))
+            .order_by(*order)
+            .limit(n)
+            .with_for_update(skip_locked=True)
+            .all()
+        )
+        for report in reports:
+            report.claimed_by = admin_id
+            report.claimed_until = until
+        db.session.commit()
+        return reports
+
+    candidate_ids = [
+        report_id
+        for (report_id,) in db.session.query(Report.id)
+        .filter(claimable(now))
+        .order_by(*order)
+        .limit(n)
+    ]
+    if not candidate_ids:
+        return []
+
+    db.session.execute(
+        update(Report)
+        .where(Report.id.in_(candidate_ids), claimable(now))
+        .values(claimed_by=admin_id, claimed_until=until)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+
+    return (
+        Report.query.filter(
+            Report.id.in_(candidate_ids),
+            Report.claimed_by == admin_id,
+            Report.claimed_until == until,
+        )
+        .order_by(*order)
+        .all()
+    )
+
+
+@blp.route("/reports/claim")
+class ReportClaim(MethodView):
+    @blp.doc(
+        security=[{"BearerAuth": []}],
+        parameters=[
+            {
+                "in": "query",
+                "name": "n",
+                "schema": {"type": "integer"},
+                "required": False,
+                "description": "How many pending reports to lease (default 10). Example: ?n=20",
+            }
+        ],
+    )
+    @blp.response(200, ReportSchema(many=True))
+    @auth_module.admin_required
+    def post(self):
+        """
+        POST /reports/claim
+        Admin only. Leases the next N pending reports to the caller.
+        """
+        n = request.args.get("n", default=10, type=int)
+        max_n = current_app.config["REPORT_CLAIM_MAX"]
+        if n < 1 or n > max_n:
+            abort(400, message=f"n must be between 1 and {max_n}.")
+
+        return claim_pending_reports(
+            g.current_user.id, n, current_app.config["REPORT_CLAIM_LEASE_SECONDS"]
+        )
+
+    @blp.doc(security=[{"BearerAuth": []}])
+    @auth_module.admin_required
+    def delete(self):
+        """
+        DELETE /reports/claim
+        Admin only. Releases every lease held by the caller.
+        """
+        result = db.session.execute(
+            update(Report)
+            .where(Report.claimed_by == g.current_user.id, Report.status == "pending")
+            .values(claimed_by=None, claimed_until=None)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        return {"message": "Claims released.", "released": result.rowcount}, 200
+
+
+def not_leased_by_others(admin_id, now):
+    return or_(
+        Report.claimed_by.is_(None),
+        Report.claimed_by == admin_id,
+        Report.claimed_until.is_(None),
+        Report.claimed_until <= now,
+    )
+
+
+def lease_outcome(row, admin_id, now):
+    if row.status != "pending":
+        return "not_pending"
+    if (
+        row.claimed_by not in (None, admin_id)
+        and row.claimed_until
+        and row.claimed_until > now
+    ):
+        return "claimed"
+    return None
+
+
+def bulk_moderate_reports(admin_id, data):
+    """
+    Apply status/admin_note to many pending reports in one UPDATE.
+
+    Returns (updated_rows, outcomes) where updated_rows are
+    (id, product_id, barcode) tuples and outcomes maps id -> outcome.
+    """
+    now = datetime.utcnow()
+    conditions = [Report.status == "pending", not_leased_by_others(admin_id, now)]
+    outcomes = {}
+
+    report_ids = data.get("report_ids")
+    if report_ids:
+        requested = list(dict.fromkeys(report_ids))
+        found = {
+            row.id: row
+            for row in db.session.query(
+                Report.id, Report.status, Report.claimed_by, Report.claimed_until
+            ).filter(Report.id.in_(requested))
+        }
+        for report_id in requested:
+            row = found.get(report_id)
+            outcomes[report_id] = lease_outcome(row, admin_id, now) if row else "not_found"
+        eligible = [report_id for report_id, outcome in outcomes.items() if outcome is None]
+        if not eligible:
+            return [], outcomes
+        conditions.append(Report.id.in_(eligible))
+    else:
+        if data.get("product_id"):
+            conditions.append(Report.product_id == data["product_id"])
+        if data.get("barcode"):
+            conditions.append(Report.barcode == data["barcode"])
+
+    values = {
+        "status": data["status"],
+        "claimed_by": None,
+        "claimed_until": None,
+        "updated_at": now,
+    }
+    if data.get("admin_note"):
+        values["admin_note"] = data["admin_note"]
+
+    stmt = (
+        update(Report)
+        .where(*conditions)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    if db.engine.dialect.update_returning:
+        updated = db.session.execute(
+            stmt.returning(Report.id, Report.product_id, Report.barcode)
+        ).all()
+    else:
+        # No UPDATE ... RETURNING: lock the matching rows first, then update them
+        updated = (
+            db.session.query(Report.id, Report.product_id, Report.barcode)
+            .filter(*conditions)
+            .with_for_update()
+            .all()
+        )
+        if updated:
+            db.session.execute(stmt.where(Report.id.in_([row.id for row in updated])))
+    apply_report_changes(
+        (row.product_id, row.barcode, "pending", data["status"], None) for row in updated
+    )
+    db.session.commit()
+
+    updated_ids = {row.id for row in updated}
+    for report_id, outcome in outcomes.items():
+        if outcome is None:
+            outcomes[report_id] = "updated" if report_id in updated_ids else "conflict"
+    for report_id in updated_ids:
+        outcomes[report_id] = "updated"
+
+    return updated, outcomes
+
+
+def moderate_report(admin_id, report_id, data, attempts=3):
+    """
+    Set one report's status with an UPDATE conditioned on the status it was
+    read with, so concurrent moderations cannot both apply the same summary
+    delta. Aborts 404/409; the caller commits.
+    """
+    values = {"status": data["status"], "claimed_by": None, "claimed_until": None}
+    if data.get("admin_note"):
+        values["admin_note"] = data["admin_note"]
+
+    for _ in range(attempts):
+        now = datetime.utcnow()
+        row = db.session.query(
+            Report.id, Report.product_id, Report.barcode, Report.status,
+            Report.claimed_by, Report.claimed_until,
+        ).filter(Report.id == report_id).first()
+        if row is None:
+            abort(404, message="Report not found.")
+        if (
+            row.claimed_by not in (None, admin_id)
+            and row.claimed_until
+            and row.claimed_until > now
+        ):
+            abort(409, message="Report is claimed by another moderator.")
+
+        conditions = [
+            Report.id == report_id,
+            Report.status == row.status,
+            not_leased_by_others(admin_id, now),
+        ]
+        stmt = (
+            update(Report)
+            .where(*conditions)
+            .values(updated_at=now, **values)
+            .execution_options(synchronize_session=False)
+        )
+        if db.engine.dialect.update_returning:
+            updated = db.session.execute(stmt.returning(Report.id)).first()
+        else:
+            # No UPDATE ... RETURNING: lock the row first, then update it
+            updated = db.session.query(Report.id).filter(*conditions).with_for_update().first()
+            if updated:
+                db.session.execute(stmt)
+        if updated:
+            apply_report_changes([(row.product_id, row.barcode, row.status, data["status"], None)])
+            return db.session.get(Report, report_id)
+        # Another moderator changed the row between the read and the UPDATE
+
+    abort(409, message="Report was modified concurrently, try again.")
+
+
+@blp.route("/reports/moderate")
+class ReportBulkModerate(MethodView):
+    @blp.arguments(ReportBulkModerateSchema())
+    @blp.doc(security=[{"BearerAuth": []}])
+    @blp.response(200, ReportBulkResultSchema())
+    @auth_module.admin_required
+    def post(self, data):
+        """
+        POST /reports/moderate
+        Admin only. Approve or reject many pending reports at once, either
+        by id or every pending report matching a product_id/barcode.
+        """
+        updated, outcomes = bulk_moderate_reports(g.current_user.id, data)
+        return {
+            "status": data["status"],
+            "updated": len(updated),
+            "results": [
+                {"id": report_id, "outcome": outcome}
+                for report_id, outcome in outcomes.items()
+            ],
+        }
+
+
+SUMMARY_SORT_COLUMNS = {
+    "pending": ReportSummary.pending_count,
+    "approved": ReportSummary.approved_count,
+    "rejected": ReportSummary.rejected_count,
+    "total": (
+        ReportSummary.pending_count
+        + ReportSummary.approved_count
+        + ReportSummary.rejected_count
+    ),
+    "last_report_at": ReportSummary.last_report_at,
+}
+
+
+@blp.route("/reports/summary")
+class ReportSummaryList(MethodView):
+    @blp.doc(
+        security=[{"BearerAuth": []}],
+        parameters=[
+            {
+                "in": "query",
+                "name": "scope",
+                "schema": {"type": "string", "enum": ["product", "barcode"]},
+                "required": False,
+                "description": "Aggregate per product (default) or per barcode.",
+            },
+            {
+                "in": "query",
+                "name": "sort",
+                "schema": {"type": "string", "enum": list(SUMMARY_SORT_COLUMNS)},
+                "required": False,
+                "description": "Sort field (default: pending).",
+            },
+            {
+                "in": "query",
+                "name": "order",
+                "schema": {"type": "string", "enum": ["asc", "desc"]},
+                "required": False,
+                "description": "Sort order (default: desc).",
+            },
+            {
+                "in": "query",
+                "name": "page",
+                "schema": {"type": "integer"},
+                "required": False,
+                "description": "Page number (starts at 1). Example: ?page=1",
+            },
+            {
+                "in": "query",
+                "name": "limit",
+                "schema": {"type": "integer"},
+                "required": False,
+                "description": "Max results per page (max 100). Example: ?limit=20",
+            },
+        ],
+    )
+    @blp.response(200, ReportSummarySchema(many=True))
+    @auth_module.login_required
+    def get(self):
+        """
+        GET /reports/summary
+        Authenticated users only. Reads the maintained counters, never
+        aggregates the reports table.
+        """
+        scope = request.args.get("scope", default="product", type=str)
+        if scope not in ("product", "barcode"):
+            abort(400, message="Invalid scope. Use 'product' or 'barcode'.")
+
+        sort = request.args.get("sort", default="pending", type=str)
+        order = request.args.get("order", default="desc", type=str)
+        if sort not in SUMMARY_SORT_COLUMNS:
+            abort(400, message=f"Invalid sort field. Use one of: {', '.join(SUMMARY_SORT_COLUMNS)}.")
+        if order not in ("asc", "desc"):
+            abort(400, message="Invalid order. Use 'asc' or 'desc'.")
+
+        page = request.args.get("page", default=1, type=int)
+        limit = request.args.get("limit", default=20, type=int)
+        if page < 1:
+            abort(400, message="page must be >= 1.")
+        if limit < 1 or limit > 100:
+            abort(400, message="limit must be between 1 and 100.")
+
+        column = SUMMARY_SORT_COLUMNS[sort]
+        direction = column.asc() if order == "asc" else column.desc()
+        rows = (
+            ReportSummary.query.filter(ReportSummary.scope == scope)
+            .order_by(direction, ReportSummary.id.asc())
+            .offset((page - 1) * limit)
+            .limit(limit)
+            .all()
+        )
+        return [row.to_dict() for row in rows]
+
+
 @blp.route("/reports/mine")
 class MyReports(MethodView):
     @blp.response(200, ReportSchema(many=True))
-    @blp.doc(security=[{"BearerAuth": []}])
+    @blp.doc(security=[{"BearerAuth": []}], parameters=REPORT_LIST_PARAMETERS)
     @auth_module.login_required
     def get(self):
         """
@@ -87,10 +640,26 @@ class MyReports(MethodView):
         Authenticated users only.
         """
         user = g.current_user
-        reports = Report.query.filter_by(user_id=user.id).order_by(
-            Report.created_at.desc()
-        ).all()
-        return reports
+        query = filter_reports(Report.query.filter_by(user_id=user.id), request.args)
+        reports, headers = paginate_reports(query, request.args)
+        return reports, 200, headers
+
+
+@blp.route("/reports/ingest/<string:ingest_id>")
+class ReportIngestStatus(MethodView):
+    @blp.response(200, ReportSchema())
+    @blp.doc(security=[{"BearerAuth": []}])
+    @auth_module.login_required
+    def get(self, ingest_id):
+        """
+        GET /reports/ingest/{ingest_id}
+        Authenticated users only. The report created from a queued
+        submission (with its id), once the writer has inserted it.
+        """
+        report = Report.query.filter_by(ingest_id=ingest_id).first()
+        if not report:
+            abort(404, message="Report not written yet: still queued, or rejected by the writer.")
+        return report
 
 
 @blp.route("/reports/<int:report_id>")
@@ -118,15 +687,7 @@ class ReportDetail(MethodView):
         PUT /reports/{id}
         Admin only.
         """
-        report = Report.query.get(report_id)
-        if not report:
-            abort(404, message="Report not found.")
-
-        report.status = data["status"]
-
-        if "admin_note" in data and data["admin_note"]:
-            report.admin_note = data["admin_note"]
-
+        report = moderate_report(g.current_user.id, report_id, data)
         try:
             db.session.commit()
         except IntegrityError:
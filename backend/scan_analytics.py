@@ -0,0 +1,207 @@
+# FILE: scan_analytics.py
+"""
+Scan analytics for GET /barcode/<code>: which barcodes are scanned, how
+often, and which ones the catalog is missing.
+
+Recording never blocks the request. record() appends the event to a
+bounded in-memory ring buffer; when the buffer is full the oldest events
+are overwritten and counted as dropped. A background flusher drains the
+buffer every SCAN_FLUSH_INTERVAL seconds, aggregates the events per
+barcode and hour, and writes them with multi-row upserts into
+scan_counts and unknown_barcodes, then commits once.
+
+Events still buffered when a worker dies are lost, which is acceptable
+for analytics (report ingestion journals its queue; this does not).
+"""
+
+import atexit
+import logging
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import case, desc, exists, func, select
+
+from background import WorkerThread
+from db import db, upsert_insert
+from models.product import Product
+from models.scan_count import ScanCount
+from models.unknown_barcode import UnknownBarcode
+
+logger = logging.getLogger(__name__)
+
+# Rows per INSERT ... ON CONFLICT statement (SQLite caps bound parameters)
+UPSERT_CHUNK = 200
+
+
+def utc_datetime(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).replace(tzinfo=None)
+
+
+def chunked(rows, size=UPSERT_CHUNK):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+class ScanRecorder:
+    def __init__(self, app, buffer_size=100000, flush_interval=5.0, background=True):
+        """With `background` off nothing is flushed until flush() is called."""
+        self.app = app
+        self.flush_interval = flush_interval
+        self.buffer = deque(maxlen=buffer_size)
+        self.dropped = 0
+        self.flushed = 0
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._worker = WorkerThread(
+            self._run, "scan-analytics-flusher", on_start=self._on_start, enabled=background
+        )
+
+    # --- producer side (request threads) ---
+
+    def record(self, barcode, found):
+        """Note one scan of a canonical barcode; O(1), never blocks on I/O."""
+        self._worker.ensure_started()
+        if len(self.buffer) == self.buffer.maxlen:
+            self.dropped += 1
+        self.buffer.append((barcode, found, time.time()))
+
+    def stats(self):
+        return {"buffered": len(self.buffer), "dropped": self.dropped, "flushed": self.flushed}
+
+    # --- consumer side (flusher thread) ---
+
+    def _on_start(self):
+        self._stop.clear()
+        atexit.register(self.stop)
+
+    def _run(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception:
+                # Best effort: a failed batch is dropped rather than retried
+                logger.exception("Scan analytics flush failed")
+
+    def _drain(self):
+        events = []
+        try:
+            while True:
+                events.append(self.buffer.popleft())
+        except IndexError:
+            pass
+        return events
+
+    def flush(self):
+        """Synchronously write everything currently buffered."""
+        with self._flush_lock:
+            events = self._drain()
+            if not events:
+                return
+            with self.app.app_context():
+                self.write_events(events)
+            self.flushed += len(events)
+
+    def stop(self):
+        self._stop.set()
+        self._worker.join(timeout=5)
+        try:
+            self.flush()
+        except Exception:
+            logger.exception("Scan analytics flush failed")
+
+    # --- database ---
+
+    @staticmethod
+    def write_events(events):
+        """Fold (barcode, found, timestamp) events into the counters; one commit."""
+        hourly = {}
+        unknown = {}
+        for barcode, found, timestamp in events:
+            seen = utc_datetime(timestamp)
+            hour = seen.replace(minute=0, second=0, microsecond=0)
+            counts = hourly.setdefault((barcode, hour), [0, 0])
+            counts[0] += 1
+            if not found:
+                counts[1] += 1
+                entry = unknown.get(barcode)
+                if entry is None:
+                    unknown[barcode] = [1, seen, seen]
+                else:
+                    entry[0] += 1
+                    entry[1] = min(entry[1], seen)
+                    entry[2] = max(entry[2], seen)
+
+        # Rows in key order: workers flushing overlapping barcodes then lock
+        # them in the same order and cannot deadlock each other
+        table = ScanCount.__table__
+        rows = [
+            {"barcode": barcode, "hour": hour, "scans": scans, "misses": misses}
+            for (barcode, hour), (scans, misses) in sorted(hourly.items())
+        ]
+        for chunk in chunked(rows):
+            stmt = upsert_insert(table).values(chunk)
+            db.session.execute(stmt.on_conflict_do_update(
+                index_elements=["barcode", "hour"],
+                set_={
+                    "scans": table.c.scans + stmt.excluded.scans,
+                    "misses": table.c.misses + stmt.excluded.misses,
+                },
+            ))
+
+        table = UnknownBarcode.__table__
+        rows = [
+            {"barcode": barcode, "scan_count": scans, "first_seen_at": first, "last_seen_at": last}
+            for barcode, (scans, first, last) in sorted(unknown.items())
+        ]
+        for chunk in chunked(rows):
+            stmt = upsert_insert(table).values(chunk)
+            db.session.execute(stmt.on_conflict_do_update(
+                index_elements=["barcode"],
+                set_={
+                    "scan_count": table.c.scan_count + stmt.excluded.scan_count,
+                    "last_seen_at": case(
+                        (table.c.last_seen_at < stmt.excluded.last_seen_at, stmt.excluded.last_seen_at),
+                        else_=table.c.last_seen_at,
+                    ),
+                },
+            ))
+        db.session.commit()
+
+
+def top_scanned(hours, limit):
+    """[(barcode, scans, misses)] over the last `hours`, most scanned first."""
+    since = datetime.utcnow().replace(minute=0, second=0, microsecond=0) - timedelta(hours=hours - 1)
+    scans = func.sum(ScanCount.scans).label("scans")
+    stmt = (
+        select(ScanCount.barcode, scans, func.sum(ScanCount.misses))
+        .where(ScanCount.hour >= since)
+        .group_by(ScanCount.barcode)
+        .order_by(desc(scans), ScanCount.barcode)
+        .limit(limit)
+    )
+    return since, db.session.execute(stmt).all()
+
+
+def top_missing(since, limit):
+    """Unknown barcodes seen since `since` and still not in the catalog."""
+    in_catalog = exists().where(Product.barcode == UnknownBarcode.barcode)
+    stmt = (
+        select(UnknownBarcode)
+        .where(UnknownBarcode.last_seen_at >= since, ~in_catalog)
+        .order_by(UnknownBarcode.scan_count.desc(), UnknownBarcode.barcode)
+        .limit(limit)
+    )
+    return db.session.scalars(stmt).all()
+
+
+def init_scan_analytics(app):
+    """Attach a scan recorder to the app (flusher started on first scan)."""
+    recorder = ScanRecorder(
+        app,
+        buffer_size=app.config["SCAN_BUFFER_SIZE"],
+        flush_interval=app.config["SCAN_FLUSH_INTERVAL"],
+    )
+    app.extensions["scan_analytics"] = recorder
+    return recorder
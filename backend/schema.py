@@ -79,11 +79,20 @@ class ProductSchema(Schema):
     categories = fields.List(fields.Nested(CategorySchema), required=True)
 
 
+class ReportCountsSchema(Schema):
+    pending = fields.Int(required=True, metadata={"example": 3})
+    approved = fields.Int(required=True, metadata={"example": 12})
+    rejected = fields.Int(required=True, metadata={"example": 1})
+    total = fields.Int(required=True, metadata={"example": 16})
+
+
 class BarcodeResultSchema(Schema):
     barcode = fields.Str(required=True, metadata={"example": "6194002400707"})
     product_name = fields.Str(required=True, metadata={"example": "Coca-Cola Classic"})
     brand = fields.Nested(BrandSchema, required=True)
     alternatives = fields.List(fields.Nested(BrandSchema), required=True)
+    # Only present with ?include=reports
+    reports = fields.Nested(ReportCountsSchema)
 
 # ------------------------
 # INPUT (Create/Update) Schemas
@@ -180,6 +189,9 @@ class ReportSchema(Schema):
     admin_note = fields.Str(allow_none=True, metadata={"example": "Verified and approved"})
     created_at = fields.DateTime(dump_only=True, metadata={"example": "2025-01-17T10:00:00"})
     updated_at = fields.DateTime(dump_only=True, metadata={"example": "2025-01-17T10:00:00"})
+    ingest_id = fields.Str(dump_only=True, allow_none=True, metadata={"example": "3f2b9c0e5d7a4e1b8c6d2a9f0e1b3c4d"})
+    claimed_by = fields.Int(dump_only=True, allow_none=True, metadata={"example": 2})
+    claimed_until = fields.DateTime(dump_only=True, allow_none=True, metadata={"example": "2025-01-17T10:05:00"})
 
 
 class ReportCreateSchema(Schema):
@@ -208,3 +220,64 @@ class ReportUpdateSchema(Schema):
         validate=validate.Length(max=500),
         metadata={"example": "Verified against official sources"}
     )
+
+
+class ReportBulkModerateSchema(Schema):
+    """Schema for moderating many reports at once (admin only)"""
+    report_ids = fields.List(
+        fields.Int(),
+        validate=validate.Length(min=1, max=1000),
+        metadata={"example": [1, 2, 3]},
+    )
+    product_id = fields.Int(allow_none=True, metadata={"example": 55})
+    barcode = fields.Str(
+        allow_none=True,
+        validate=validate.Regexp(r"^\d{8,14}$", error="Barcode must be 8-14 digits"),
+        metadata={"example": "6194002400707"},
+    )
+    status = fields.Str(
+        required=True,
+        validate=validate.OneOf(["approved", "rejected"]),
+        metadata={"example": "rejected"}
+    )
+    admin_note = fields.Str(
+        allow_none=True,
+        validate=validate.Length(max=500),
+        metadata={"example": "Duplicate of an existing report"}
+    )
+
+    @validates_schema
+    def validate_selector(self, data, **kwargs):
+        """Either report_ids, or a product_id/barcode matcher - not both"""
+        by_ids = bool(data.get("report_ids"))
+        by_match = bool(data.get("product_id") or data.get("barcode"))
+        if by_ids == by_match:
+            raise ValidationError(
+                "Provide either report_ids, or product_id and/or barcode."
+            )
+
+
+class ReportBulkOutcomeSchema(Schema):
+    id = fields.Int(required=True, metadata={"example": 1})
+    outcome = fields.Str(
+        required=True,
+        validate=validate.OneOf(["updated", "not_found", "not_pending", "claimed", "conflict"]),
+        metadata={"example": "updated"},
+    )
+
+
+class ReportBulkResultSchema(Schema):
+    status = fields.Str(required=True, metadata={"example": "rejected"})
+    updated = fields.Int(required=True, metadata={"example": 120})
+    results = fields.List(fields.Nested(ReportBulkOutcomeSchema), required=True)
+
+
+class ReportSummarySchema(Schema):
+    scope = fields.Str(required=True, metadata={"example": "product"})
+    product_id = fields.Int(allow_none=True, metadata={"example": 55})
+    barcode = fields.Str(allow_none=True, metadata={"example": "6194002400707"})
+    pending = fields.Int(required=True, metadata={"example": 3})
+    approved = fields.Int(required=True, metadata={"example": 12})
+    rejected = fields.Int(required=True, metadata={"example": 1})
+    total = fields.Int(required=True, metadata={"example": 16})
+    last_report_at = fields.DateTime(allow_none=True, metadata={"example": "2025-01-17T10:00:00"})
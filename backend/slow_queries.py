@@ -0,0 +1,154 @@
+# FILE: slow_queries.py
+"""
+Slow-query log (SLOW_QUERY_MS > 0).
+
+Any statement slower than SLOW_QUERY_MS is written as one JSON line to a
+rotating log (SLOW_QUERY_LOG_FILE). The line holds the SQL, the bound
+parameters with string values redacted, the route that ran it, and its
+plan. For SELECTs the plan is captured right away on the same connection:
+EXPLAIN on Postgres, EXPLAIN QUERY PLAN on SQLite. With
+SLOW_QUERY_ANALYZE_SAMPLE > 0, that fraction of slow SELECTs uses EXPLAIN
+ANALYZE instead. This re-runs the query, so keep the rate small.
+
+Listeners are attached per engine (primary and replicas), so settings are
+per app. Running the plan costs nothing for statements under the threshold.
+"""
+
+import datetime
+import hashlib
+import json
+import logging
+import os
+import random
+import time
+from decimal import Decimal
+from logging.handlers import RotatingFileHandler
+
+from flask import has_request_context, request
+from sqlalchemy import event
+
+from db import db
+
+
+def redact(value):
+    """Numbers, dates and NULLs are kept (ids help reproduce); text is not."""
+    if value is None or isinstance(value, (bool, int, float)):
+        return value
+    if isinstance(value, (Decimal, datetime.date)):
+        return str(value)
+    if isinstance(value, (str, bytes)):
+        return f"<redacted {type(value).__name__} len={len(value)}>"
+    if isinstance(value, (list, tuple)):
+        return [redact(v) for v in value]
+    if isinstance(value, dict):
+        return {k: redact(v) for k, v in value.items()}
+    return f"<redacted {type(value).__name__}>"
+
+
+class SlowQueryLog:
+    def __init__(self, threshold_ms, logger, analyze_sample=0.0):
+        self.threshold = threshold_ms / 1000.0
+        self.logger = logger
+        self.analyze_sample = analyze_sample
+
+    def attach(self, engine):
+        event.listen(engine, "before_cursor_execute", self.before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self.after_cursor_execute)
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("slow_query_start", []).append(time.perf_counter())
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get("slow_query_start")
+        if not starts:
+            return
+        elapsed = time.perf_counter() - starts.pop()
+        if elapsed < self.threshold:
+            return
+
+        record = {
+            "ts": datetime.datetime.utcnow().isoformat() + "Z",
+            "duration_ms": round(elapsed * 1000, 2),
+            "route": f"{request.method} {request.url_rule.rule if request.url_rule else request.path}"
+            if has_request_context() else None,
+            "statement": statement,
+            "params": redact(parameters) if not executemany else f"<executemany x{len(parameters)}>",
+            "dialect": conn.dialect.name,
+        }
+        if not executemany and statement.lstrip().upper().startswith("SELECT"):
+            analyze = self.analyze_sample > 0 and random.random() < self.analyze_sample
+            record.update(self.explain(conn, cursor, statement, parameters, analyze))
+        self.logger.warning(json.dumps(record, default=str))
+
+    @staticmethod
+    def explain(conn, cursor, statement, parameters, analyze):
+        dialect = conn.dialect.name
+        if dialect == "postgresql":
+            prefix = "EXPLAIN (ANALYZE, BUFFERS) " if analyze else "EXPLAIN "
+        elif dialect == "sqlite":
+            prefix, analyze = "EXPLAIN QUERY PLAN ", False
+        else:
+            return {}
+
+        # Raw DBAPI cursor on the same connection: no engine events fire, and
+        # a savepoint keeps a failed EXPLAIN from aborting the caller's
+        # Postgres transaction
+        dbapi_conn = cursor.connection
+        plan_cursor = dbapi_conn.cursor()
+        savepoint = dialect == "postgresql"
+        try:
+            if savepoint:
+                plan_cursor.execute("SAVEPOINT slow_query_explain")
+            plan_cursor.execute(prefix + statement, parameters)
+            rows = plan_cursor.fetchall()
+            if savepoint:
+                plan_cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+        except Exception as e:
+            if savepoint:
+                try:
+                    plan_cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+                except Exception:
+                    pass
+            return {"plan_error": str(e)}
+        finally:
+            plan_cursor.close()
+
+        if dialect == "postgresql":
+            plan = [row[0] for row in rows]
+        else:
+            plan = [row[-1] for row in rows]  # (id, parent, notused, detail)
+        return {"plan": plan, "analyze": analyze}
+
+
+def slow_query_logger(path, max_bytes, backup_count):
+    # One logger per file; the file is only created on the first slow query
+    name = hashlib.sha1(path.encode("utf-8")).hexdigest()[:12]
+    logger = logging.getLogger("boycott.slow_queries").getChild(name)
+    logger.propagate = False
+    if not logger.handlers:
+        handler = RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backup_count, delay=True
+        )
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+    return logger
+
+
+def init_slow_query_log(app):
+    """Attach to the app's engines (call after db.init_app and replicas)."""
+    path = os.path.abspath(app.config["SLOW_QUERY_LOG_FILE"])
+    log = SlowQueryLog(
+        app.config["SLOW_QUERY_MS"],
+        slow_query_logger(
+            path, app.config["SLOW_QUERY_LOG_MAX_BYTES"], app.config["SLOW_QUERY_LOG_BACKUPS"]
+        ),
+        app.config["SLOW_QUERY_ANALYZE_SAMPLE"],
+    )
+    with app.app_context():
+        engines = list(db.engines.values())
+    replicas = app.extensions.get("read_replicas")
+    if replicas is not None:
+        engines.extend(replicas.engines.values())
+    for engine in engines:
+        log.attach(engine)
+    app.extensions["slow_queries"] = log
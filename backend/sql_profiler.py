@@ -0,0 +1,165 @@
+# FILE: sql_profiler.py
+"""
+Per-request SQL profiling and N+1 detection (opt-in: SQL_PROFILING=true).
+
+Engine-level cursor events feed every QueryProfile active on the current
+thread: one per request while profiling is on, plus any capture_queries()
+block (used by the query_budget test fixture). A profile keeps the query
+count, total DB time and how often each statement shape ran. A shape is
+the SQL with IN-lists collapsed; bound values never appear in SQL.
+
+Per profiled request:
+  * Server-Timing: db;dur=<ms>;desc="<n> queries" (visible in browser devtools)
+  * a debug log summary, and a warning when one SELECT shape repeats
+    SQL_N_PLUS_ONE_THRESHOLD+ times (lazy loads inside serialization)
+"""
+
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from flask import current_app, g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_active = threading.local()
+_installed = False
+_install_lock = threading.Lock()
+
+# "(?, ?, ?)" / "(%(id_1_1)s, %(id_1_2)s)" / "($1, $2)" -> "(?...)"
+_PLACEHOLDER = r"(?:\?|%s|%\(\w+\)s|\$\d+|:\w+)"
+_PLACEHOLDER_LIST = re.compile(rf"\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})+\s*\)")
+
+
+def statement_shape(statement):
+    return " ".join(_PLACEHOLDER_LIST.sub("(?...)", statement).split())
+
+
+class QueryProfile:
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.shapes = Counter()
+
+    def record(self, statement, seconds):
+        self.count += 1
+        self.seconds += seconds
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated(self, threshold):
+        """SELECT shapes run at least `threshold` times: likely N+1."""
+        return [
+            (shape, count)
+            for shape, count in self.shapes.most_common()
+            if count >= threshold and shape.lstrip().upper().startswith("SELECT")
+        ]
+
+    def summary(self, threshold):
+        return {
+            "queries": self.count,
+            "db_ms": round(self.seconds * 1000, 2),
+            "distinct_statements": len(self.shapes),
+            "n_plus_one": [
+                {"statement": shape, "count": count} for shape, count in self.repeated(threshold)
+            ],
+        }
+
+    def report(self):
+        lines = [f"{self.count} queries, {self.seconds * 1000:.1f} ms"]
+        lines += [f"  {count}x {shape}" for shape, count in self.shapes.most_common()]
+        return "\n".join(lines)
+
+
+def _profiles():
+    stack = getattr(_active, "profiles", None)
+    if stack is None:
+        stack = _active.profiles = []
+    return stack
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if getattr(_active, "profiles", None):
+        conn.info.setdefault("sql_profiler_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profiles = getattr(_active, "profiles", None)
+    starts = conn.info.get("sql_profiler_start")
+    if not profiles or not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    for profile in profiles:
+        profile.record(statement, elapsed)
+
+
+def install():
+    """Listen on every Engine (primary, replicas, async) once per process."""
+    global _installed
+    with _install_lock:
+        if not _installed:
+            event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+            _installed = True
+
+
+@contextmanager
+def capture_queries():
+    """Profile every query this thread runs inside the block."""
+    install()
+    profile = QueryProfile()
+    stack = _profiles()
+    stack.append(profile)
+    try:
+        yield profile
+    finally:
+        stack.remove(profile)
+
+
+def _start_profile():
+    profile = QueryProfile()
+    _profiles().append(profile)
+    g.sql_profile = profile
+
+
+def _finish_profile(response):
+    profile = g.pop("sql_profile", None)
+    if profile is None:
+        return response
+    _discard(profile)
+    response.headers.add(
+        "Server-Timing", f'db;dur={profile.seconds * 1000:.2f};desc="{profile.count} queries"'
+    )
+    threshold = current_app.config["SQL_N_PLUS_ONE_THRESHOLD"]
+    summary = profile.summary(threshold)
+    current_app.logger.debug("SQL profile %s: %s", _route(), summary)
+    for item in summary["n_plus_one"]:
+        current_app.logger.warning(
+            "Possible N+1 on %s: %dx %s", _route(), item["count"], item["statement"]
+        )
+    return response
+
+
+def _discard(profile):
+    stack = _profiles()
+    if profile in stack:
+        stack.remove(profile)
+
+
+def _teardown_profile(exc):
+    # Requests that failed before after_request still leave the stack clean
+    profile = g.pop("sql_profile", None)
+    if profile is not None:
+        _discard(profile)
+
+
+def _route():
+    return f"{request.method} {request.url_rule.rule if request.url_rule else request.path}"
+
+
+def init_sql_profiler(app):
+    install()
+    app.before_request(_start_profile)
+    app.after_request(_finish_profile)
+    app.teardown_request(_teardown_profile)
@@ -0,0 +1,198 @@
+# FILE: static_assets.py
+"""
+Fingerprinted, precompressed frontend assets.
+
+build_assets() (run by build_static.py at deploy time) copies js/*.js and
+css/*.css to the build directory as name.<hash>.ext, writes .gz (and .br
+when the brotli package is installed) next to each one, and records the
+mapping in manifest.json. Local CSS @imports are rewritten to the
+fingerprinted names before hashing, so a change in variables.css also
+changes the name of styles.css.
+
+At runtime StaticAssets replaces the view behind /static/<path>:
+fingerprinted files are sent with Cache-Control: immutable and the
+precompressed variant the client accepts. Other paths fall back to
+Flask's static folder. index.html is read once, its /static/ URLs are
+pointed at the fingerprinted names, and it is served from memory with an
+ETag (precompressed as well). Without a build, the assets and index.html
+are served unchanged.
+"""
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import threading
+
+from flask import current_app, request, send_file
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+ASSET_DIRS = {"js": ".js", "css": ".css"}
+MANIFEST = "manifest.json"
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+MIN_COMPRESS_BYTES = 256
+
+CSS_IMPORT = re.compile(r"""(@import\s+(?:url\(\s*)?)(['"])([^'"]+)\2""")
+INDEX_ASSET_URL = re.compile(r"""(["'])/static/([^"'?#]+)(?:\?[^"']*)?\1""")
+
+# Preferred first; the suffix is the file extension of the variant
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def compress(data):
+    """{encoding: bytes} for the variants worth sending (smaller than data)."""
+    if len(data) < MIN_COMPRESS_BYTES:
+        return {}
+    variants = {"gzip": gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants["br"] = brotli.compress(data, quality=11)
+    return {enc: body for enc, body in variants.items() if len(body) < len(data)}
+
+
+def build_assets(src_dir, out_dir):
+    """Fingerprint and precompress the assets in src_dir; returns the manifest."""
+    manifest = {}
+
+    def fingerprint(rel):
+        if rel in manifest:
+            return manifest[rel]
+        with open(os.path.join(src_dir, rel), "rb") as f:
+            data = f.read()
+        if rel.endswith(".css"):
+            data = rewrite_css_imports(data, os.path.dirname(rel), fingerprint, src_dir)
+        base, ext = os.path.splitext(rel)
+        name = f"{base}.{hashlib.sha256(data).hexdigest()[:12]}{ext}"
+        path = os.path.join(out_dir, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+        variants = compress(data)
+        for encoding, suffix in ENCODINGS:
+            if encoding in variants:
+                with open(path + suffix, "wb") as f:
+                    f.write(variants[encoding])
+        manifest[rel] = name
+        return name
+
+    for folder, ext in ASSET_DIRS.items():
+        folder_path = os.path.join(src_dir, folder)
+        if not os.path.isdir(folder_path):
+            continue
+        for filename in sorted(os.listdir(folder_path)):
+            if filename.endswith(ext):
+                fingerprint(f"{folder}/{filename}")
+
+    with open(os.path.join(out_dir, MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+def rewrite_css_imports(data, rel_dir, fingerprint, src_dir):
+    def replace(match):
+        target = match.group(3)
+        if "://" in target or target.startswith(("/", "data:")):
+            return match.group(0)
+        rel = os.path.normpath(os.path.join(rel_dir, target)).replace(os.sep, "/")
+        if not os.path.isfile(os.path.join(src_dir, rel)):
+            return match.group(0)
+        new_target = os.path.relpath(fingerprint(rel), rel_dir).replace(os.sep, "/")
+        if target.startswith("./"):
+            new_target = "./" + new_target
+        return f"{match.group(1)}{match.group(2)}{new_target}{match.group(2)}"
+
+    return CSS_IMPORT.sub(replace, data.decode("utf-8")).encode("utf-8")
+
+
+def accepted_encoding(available):
+    """The best encoding in `available` that the request accepts, or None."""
+    for encoding, _ in ENCODINGS:
+        if encoding in available and request.accept_encodings[encoding] > 0:
+            return encoding
+    return None
+
+
+class StaticAssets:
+    def __init__(self, frontend_dir, build_dir):
+        self.frontend_dir = frontend_dir
+        self.build_dir = build_dir
+        self.manifest = {}
+        manifest_path = os.path.join(build_dir, MANIFEST)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, encoding="utf-8") as f:
+                self.manifest = json.load(f)
+        # fingerprinted name -> {encoding or None: file path}, stat'ed once
+        self.files = {}
+        for name in self.manifest.values():
+            path = os.path.join(build_dir, name)
+            variants = {None: path}
+            for encoding, suffix in ENCODINGS:
+                if os.path.exists(path + suffix):
+                    variants[encoding] = path + suffix
+            self.files[name] = variants
+        self._index = None
+        self._index_lock = threading.Lock()
+
+    def serve(self, filename):
+        """View for /static/<path:filename>."""
+        variants = self.files.get(filename)
+        if variants is None:
+            return current_app.send_static_file(filename)
+        encoding = accepted_encoding(variants)
+        mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+        response = send_file(
+            variants[encoding], mimetype=mimetype, max_age=IMMUTABLE_MAX_AGE, conditional=True
+        )
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        response.vary.add("Accept-Encoding")
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+        return response
+
+    def index_html(self):
+        """(variants, etag) for index.html, built on first use."""
+        if self._index is None:
+            with self._index_lock:
+                if self._index is None:
+                    with open(os.path.join(self.frontend_dir, "index.html"), "rb") as f:
+                        html = self.rewrite_index(f.read().decode("utf-8")).encode("utf-8")
+                    variants = {None: html, **compress(html)}
+                    etag = hashlib.sha256(html).hexdigest()[:32]
+                    self._index = (variants, etag)
+        return self._index
+
+    def rewrite_index(self, html):
+        def replace(match):
+            name = self.manifest.get(match.group(2))
+            if name is None:
+                return match.group(0)
+            return f"{match.group(1)}/static/{name}{match.group(1)}"
+
+        return INDEX_ASSET_URL.sub(replace, html)
+
+    def index_response(self):
+        variants, etag = self.index_html()
+        encoding = accepted_encoding(variants)
+        response = current_app.response_class(variants[encoding], mimetype="text/html")
+        # Revalidate every time so a deploy's new asset names are picked up
+        response.cache_control.no_cache = True
+        response.vary.add("Accept-Encoding")
+        if encoding:
+            response.headers["Content-Encoding"] = encoding
+        response.set_etag(f"{etag}-{encoding}" if encoding else etag)
+        return response.make_conditional(request)
+
+
+def init_static_assets(app, frontend_dir):
+    """Serve /static/ and index.html through StaticAssets."""
+    build_dir = app.config["STATIC_BUILD_DIR"] or os.path.join(frontend_dir, "build")
+    assets = StaticAssets(frontend_dir, os.path.abspath(build_dir))
+    app.view_functions["static"] = assets.serve
+    app.extensions["static_assets"] = assets
+    return assets
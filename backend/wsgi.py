@@ -0,0 +1,7 @@
+# FILE: wsgi.py
+# Production entry point: gunicorn -c gunicorn.conf.py wsgi:app
+
+from app import create_app
+from config import ProductionConfig
+
+app = create_app(ProductionConfig)
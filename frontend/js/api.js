@@ -2,6 +2,18 @@ const API_BASE = window.location.origin;
 
 class API {
     static async request(endpoint, options = {}) {
+        const { data } = await API.send(endpoint, options);
+        return data;
+    }
+
+    // One page of a keyset-paginated list; pass nextCursor back for the next
+    static async requestPage(endpoint, params = {}, cursor = null) {
+        const query = new URLSearchParams({ ...params, ...(cursor ? { cursor } : {}) });
+        const { data, response } = await API.send(`${endpoint}?${query}`);
+        return { items: data, nextCursor: response.headers.get('X-Next-Cursor') };
+    }
+
+    static async send(endpoint, options = {}) {
         const token = localStorage.getItem('boycott_token');
         const headers = {
             'Content-Type': 'application/json',
@@ -21,7 +33,7 @@ class API {
                 throw new Error(data.message || 'API Request Failed');
             }
 
-            return data;
+            return { data, response };
         } catch (error) {
             console.error('API Error:', error);
             throw error;
@@ -89,13 +101,12 @@ class API {
     }
 
     // Reports
-    static getReports(status = null) {
-        const query = status ? `?status=${status}` : '';
-        return API.request(`/reports${query}`);
+    static getReports(status = null, cursor = null) {
+        return API.requestPage('/reports', status ? { status } : {}, cursor);
     }
 
-    static getMyReports() {
-        return API.request('/reports/mine');
+    static getMyReports(cursor = null) {
+        return API.requestPage('/reports/mine', {}, cursor);
     }
 
     static createReport(data) {
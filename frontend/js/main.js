@@ -1,4 +1,7 @@
 const app = {
+    reports: [],
+    reportsCursor: null,
+
     init: () => {
         window.addEventListener('hashchange', app.handleRoute);
         window.addEventListener('auth-change', UI.updateAuthUI);
@@ -204,10 +207,13 @@ const app = {
         }
     },
 
-    async loadReports() {
+    async loadReports(more = false) {
         try {
-            const reports = Auth.isAdmin() ? await API.getReports() : await API.getMyReports();
-            UI.renderReports(reports);
+            const cursor = more ? app.reportsCursor : null;
+            const page = Auth.isAdmin() ? await API.getReports(null, cursor) : await API.getMyReports(cursor);
+            app.reports = more ? app.reports.concat(page.items) : page.items;
+            app.reportsCursor = page.nextCursor;
+            UI.renderReports(app.reports, Boolean(page.nextCursor));
         } catch (error) {
             console.error('Failed to load reports', error);
             const list = document.getElementById('reports-list');
@@ -191,7 +191,7 @@ class UI {
         grid.innerHTML = products.map(p => UI.renderProductCard(p)).join('');
     }
 
-    static renderReports(reports) {
+    static renderReports(reports, hasMore = false) {
         const list = document.getElementById('reports-list');
         if (!reports || reports.length === 0) {
             list.innerHTML = '<div class="card" style="text-align: center; color: var(--text-muted);">No activity recorded yet.</div>';
@@ -230,7 +230,9 @@ class UI {
                 </div>
                 ` : ''}
             </div>
-        `).join('');
+        `).join('') + (hasMore ? `
+            <button class="btn btn-outline" style="align-self: center;" onclick="app.loadReports(true)">Load more</button>
+        ` : '');
     }
 
     static renderCategories(categories) {
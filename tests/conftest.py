@@ -1,7 +1,16 @@
+import time
+from contextlib import contextmanager
+
 import pytest
 
+import auth_utils as auth_module
 from app import create_app
 from db import db
+from models.brand import Brand
+from models.brand_alternative import BrandAlternative
+from models.category import Category
+from models.product import Product
+from models.user import User
 
 
 @pytest.fixture
@@ -29,3 +38,88 @@ def _block_postgres_for_tests(app):
     uri = app.config.get("SQLALCHEMY_DATABASE_URI", "")
     if uri.startswith("postgresql://") or uri.startswith("postgres://"):
         raise RuntimeError("Tests must not run against Postgres. Use SQLite only.")
+
+
+@pytest.fixture
+def query_budget():
+    """
+    with query_budget(3):
+        client.get("/barcode/...")
+    fails if the block runs more than 3 SQL statements (lists them).
+    """
+    from sql_profiler import capture_queries
+
+    @contextmanager
+    def budget(max_queries):
+        with capture_queries() as profile:
+            yield profile
+        assert profile.count <= max_queries, (
+            f"Query budget exceeded ({profile.count} > {max_queries}):\n{profile.report()}"
+        )
+
+    return budget
+
+
+@pytest.fixture
+def create_user():
+    """create_user(email, username, role="user") -> a committed User (password "password123")."""
+
+    def create(email, username, role="user", password="password123"):
+        user = User(username=username, email=email, role=role)
+        user.set_password(password)
+        db.session.add(user)
+        db.session.commit()
+        return user
+
+    return create
+
+
+@pytest.fixture
+def auth_header():
+    """auth_header(user) -> Authorization header with a fresh access token."""
+
+    def header(user):
+        token = auth_module.create_access_token(
+            user.id, user.role, token_version=user.token_version or 0
+        )
+        return {"Authorization": f"Bearer {token}"}
+
+    return header
+
+
+@pytest.fixture
+def wait_until():
+    """wait_until(predicate, timeout=5.0) -> polls until predicate() is true; its last result."""
+
+    def wait(predicate, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if predicate():
+                return True
+            time.sleep(0.01)
+        return predicate()
+
+    return wait
+
+
+@pytest.fixture
+def seed_catalog():
+    """seed_catalog() -> commits a small catalog: boycotted Cola (three products,
+    barcodes stored in several forms) with ranked alternatives, and Local Chips."""
+
+    def seed():
+        drinks, snacks = Category(name="Drinks", slug="drinks"), Category(name="Snacks", slug="snacks")
+        cola = Brand(name="Cola", boycott_status=True, reason="Supports X", website="https://cola.example.com")
+        local, other, chips = Brand(name="Local Cola"), Brand(name="Other Soda"), Brand(name="Local Chips")
+        db.session.add_all([
+            Product(name="Cola Classic", barcode="6194002400707", brand=cola, categories=[drinks]),
+            Product(name="Cola Snack", barcode="06194002400714", brand=cola, categories=[snacks]),
+            Product(name="Cola Mini", barcode="12345670", brand=cola),
+            Product(name="Chips", barcode="6.194002400721e12", brand=chips),
+            BrandAlternative(boycotted_brand=cola, alternative_brand=local, category=drinks, score=90),
+            BrandAlternative(boycotted_brand=cola, alternative_brand=other, score=50),
+            BrandAlternative(boycotted_brand=cola, alternative_brand=chips, category=snacks, score=70),
+        ])
+        db.session.commit()
+
+    return seed
@@ -0,0 +1,136 @@
+"""
+Local stand-in for a Redis server: the RESP2 subset cache.py uses (GET,
+SET with PX/EX/NX, DEL, INCR, EXPIRE, PUBLISH, SUBSCRIBE, PING) on a
+real TCP socket, so tests exercise the same client code as production.
+"""
+
+import socketserver
+import threading
+import time
+
+
+class FakeRedisServer:
+    def __init__(self):
+        self.data = {}  # key -> (value, expires_at or None)
+        self.subscribers = {}  # channel -> set of handlers
+        self.commands = []
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def setup(self):
+                super().setup()
+                self.write_lock = threading.Lock()
+
+            def send(self, payload):
+                with self.write_lock:
+                    self.wfile.write(payload)
+                    self.wfile.flush()
+
+            def handle(self):
+                try:
+                    while True:
+                        args = self.read_command()
+                        if args is None:
+                            return
+                        self.send(server.dispatch(self, args))
+                except (ConnectionError, OSError):
+                    pass
+                finally:
+                    with server.lock:
+                        for handlers in server.subscribers.values():
+                            handlers.discard(self)
+
+            def read_command(self):
+                line = self.rfile.readline()
+                if not line:
+                    return None
+                count = int(line[1:-2])
+                args = []
+                for _ in range(count):
+                    size = int(self.rfile.readline()[1:-2])
+                    args.append(self.rfile.read(size + 2)[:-2])
+                return args
+
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        self.server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self.url = f"redis://127.0.0.1:{self.port}/0"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    # --- RESP encoding ---
+
+    @staticmethod
+    def bulk(value):
+        if value is None:
+            return b"$-1\r\n"
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+
+    @classmethod
+    def array(cls, items):
+        return b"*%d\r\n" % len(items) + b"".join(cls.bulk(item) for item in items)
+
+    # --- commands ---
+
+    def live(self, key):
+        entry = self.data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+    def dispatch(self, handler, args):
+        name = args[0].upper().decode()
+        self.commands.append(name)
+        with self.lock:
+            if name == "PING":
+                return b"+PONG\r\n"
+            if name in ("AUTH", "SELECT"):
+                return b"+OK\r\n"
+            if name == "GET":
+                return self.bulk(self.live(args[1]))
+            if name == "SET":
+                options = [a.upper() for a in args[3:]]
+                if b"NX" in options and self.live(args[1]) is not None:
+                    return b"$-1\r\n"
+                expires_at = None
+                for unit, scale in ((b"PX", 1000.0), (b"EX", 1.0)):
+                    if unit in options:
+                        expires_at = time.monotonic() + int(args[3 + options.index(unit) + 1]) / scale
+                self.data[args[1]] = (args[2], expires_at)
+                return b"+OK\r\n"
+            if name == "DEL":
+                removed = sum(1 for key in args[1:] if self.data.pop(key, None) is not None)
+                return b":%d\r\n" % removed
+            if name == "INCR":
+                value = int(self.live(args[1]) or 0) + 1
+                self.data[args[1]] = (str(value).encode(), None)
+                return b":%d\r\n" % value
+            if name == "EXPIRE":
+                value = self.live(args[1])
+                if value is None:
+                    return b":0\r\n"
+                self.data[args[1]] = (value, time.monotonic() + int(args[2]))
+                return b":1\r\n"
+            if name == "SUBSCRIBE":
+                self.subscribers.setdefault(args[1], set()).add(handler)
+                return b"*3\r\n" + self.bulk(b"subscribe") + self.bulk(args[1]) + b":1\r\n"
+            if name == "PUBLISH":
+                receivers = list(self.subscribers.get(args[1], ()))
+            else:
+                return b"-ERR unknown command '%s'\r\n" % name.encode()
+        # PUBLISH: deliver outside the lock
+        for receiver in receivers:
+            try:
+                receiver.send(self.array([b"message", args[1], args[2]]))
+            except OSError:
+                pass
+        return b":%d\r\n" % len(receivers)
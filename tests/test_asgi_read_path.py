@@ -0,0 +1,85 @@
+import asyncio
+
+import pytest
+
+from app import create_app
+from asgi import AsyncCatalogApp
+from config import Config
+from db import db
+from models.brand import Brand
+from models.brand_alternative import BrandAlternative
+from models.category import Category
+from models.product import Product
+
+
+class ScanLog:
+    def __init__(self):
+        self.events = []
+
+    def record(self, barcode, found):
+        self.events.append((barcode, found))
+
+
+@pytest.fixture
+def apps(tmp_path):
+    path = tmp_path / "catalog.db"
+
+    class FileConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{path}"
+
+    sync_app = create_app(FileConfig)
+    with sync_app.app_context():
+        db.create_all()
+        drinks = Category(name="Drinks", slug="drinks")
+        cola = Brand(name="Cola", boycott_status=True, reason="Supports X")
+        local = Brand(name="Local", boycott_status=False)
+        db.session.add_all([drinks, cola, local])
+        db.session.flush()
+        db.session.add(Product(name="Cola Classic", barcode="6194002400707", brand=cola, categories=[drinks]))
+        db.session.add(BrandAlternative(boycotted_brand_id=cola.id, alternative_brand_id=local.id, category_id=drinks.id))
+        db.session.commit()
+
+    async_app = AsyncCatalogApp(database_url=f"sqlite+aiosqlite:///{path}", scans=ScanLog())
+    yield sync_app, async_app
+    asyncio.run(async_app.engine.dispose())
+
+
+@pytest.mark.parametrize(
+    "url",
+    [
+        "/barcode/6194002400707",
+        "/barcode/6.194002400707e12",
+        "/barcode/00000000",
+        "/barcode/abc",
+        "/products/6194002400707/alternatives",
+        "/products?category_id=1",
+        "/products/1",
+        "/products/99",
+        "/brands?boycott_status=true",
+        "/brands?limit=0",
+        "/brands/2",
+        "/categories",
+        "/categories/drinks/products",
+    ],
+)
+def test_async_path_matches_sync_responses(apps, url):
+    sync_app, async_app = apps
+    path, _, query = url.partition("?")
+
+    expected = sync_app.test_client().get(url)
+    status, body = asyncio.run(async_app.handle(path, query))
+
+    assert status == expected.status_code
+    assert body == expected.get_json()
+
+
+def test_async_path_records_the_same_scans(apps):
+    sync_app, async_app = apps
+    urls = ["/barcode/6.194002400707e12", "/barcode/00000000", "/barcode/abc"]
+
+    for url in urls:
+        sync_app.test_client().get(url)
+        asyncio.run(async_app.handle(url, ""))
+
+    recorded = [(barcode, found) for barcode, found, _ in sync_app.extensions["scan_analytics"].buffer]
+    assert async_app.scans.events == recorded == [("6194002400707", True), ("00000000", False)]
@@ -0,0 +1,81 @@
+from contextlib import contextmanager
+
+from sqlalchemy import delete, event
+
+from auth_utils import Principal, PrincipalCache
+from db import db
+from models.user import User
+
+
+@contextmanager
+def count_user_queries():
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if "FROM users" in statement:
+            statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(db.engine, "before_cursor_execute", record)
+
+
+def test_cached_principal_skips_user_lookup(client, create_user, auth_header):
+    user = create_user("user@example.com", "user")
+    headers = auth_header(user)
+
+    assert client.get("/reports", headers=headers).status_code == 200
+    with count_user_queries() as queries:
+        assert client.get("/reports", headers=headers).status_code == 200
+    assert queries == []
+
+
+def test_demotion_invalidates_cache_and_old_tokens(client, create_user, auth_header):
+    admin = create_user("admin@example.com", "admin", role="admin")
+    old_headers = auth_header(admin)
+    assert client.post("/reports/claim", headers=old_headers).status_code == 200
+
+    admin.role = "user"
+    db.session.commit()
+
+    assert client.post("/reports/claim", headers=old_headers).status_code == 401
+    assert client.post("/reports/claim", headers=auth_header(admin)).status_code == 403
+
+
+def test_trusted_role_claim_needs_no_user_query(app, client, create_user, auth_header):
+    app.config.update(AUTH_TRUST_TOKEN_ROLE=True, AUTH_REVOCATION_REFRESH_SECONDS=0)
+    admin = create_user("admin@example.com", "admin", role="admin")
+    headers = auth_header(admin)
+
+    with count_user_queries() as queries:
+        assert client.post("/reports/claim", headers=headers).status_code == 200
+    assert all("token_version >" in q for q in queries)
+
+    admin.role = "user"
+    db.session.commit()
+    assert client.post("/reports/claim", headers=headers).status_code == 401
+
+
+def test_trusted_role_claim_rejects_users_deleted_by_another_worker(app, client, create_user, auth_header):
+    app.config.update(AUTH_TRUST_TOKEN_ROLE=True, AUTH_REVOCATION_REFRESH_SECONDS=0)
+    user = create_user("user@example.com", "user")
+    headers = auth_header(user)
+    assert client.get("/reports/mine", headers=headers).status_code == 200
+
+    # A Core DELETE fires no ORM events, as if another worker ran it
+    db.session.execute(delete(User).where(User.id == user.id))
+    db.session.commit()
+
+    assert client.get("/reports/mine", headers=headers).status_code == 401
+
+
+def test_principal_cache_is_bounded():
+    cache = PrincipalCache(ttl=60, maxsize=2)
+    for user_id in (1, 2, 3):
+        cache.put(Principal(user_id, None, None, "user", 0))
+
+    assert cache.get(1) is None
+    assert cache.get(3) is not None
+    assert cache.stats()["evictions"] == 1
@@ -14,3 +14,28 @@ def test_decode_invalid_token_returns_none(app):
     with app.app_context():
         payload = auth_module.decode_token("not-a-real-token")
         assert payload is None
+
+
+def test_decode_token_reuses_verified_payload(app):
+    with app.app_context():
+        token = auth_module.create_access_token(7, "user", expires_in=60)
+        first = auth_module.decode_token(token)
+        second = auth_module.decode_token(token)
+        assert second == first
+        stats = auth_module.token_cache().stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+
+
+def test_token_cache_respects_secret_and_expiry(app):
+    with app.app_context():
+        token = auth_module.create_access_token(7, "user", expires_in=60)
+        assert auth_module.decode_token(token) is not None
+
+        app.config["SECRET_KEY"] = "rotated-secret"
+        assert auth_module.decode_token(token) is None
+
+        cache = auth_module.token_cache()
+        key = auth_module.TokenCache.key("rotated-secret", "expired")
+        cache.put(key, {"user_id": 7, "exp": 0})
+        assert cache.get(key) is None
@@ -0,0 +1,167 @@
+import threading
+import time
+
+import pytest
+from sqlalchemy import event
+
+from app import create_app
+from cache import MISSING, Cache, LocalCache, RespClient
+from config import Config
+from db import db
+from fake_redis import FakeRedisServer
+from models.brand import Brand
+from models.product import Product
+
+
+@pytest.fixture
+def redis_server():
+    server = FakeRedisServer()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def workers(redis_server, wait_until):
+    """Two caches sharing one server, like two gunicorn workers."""
+    caches = [
+        Cache(LocalCache(100), RespClient(redis_server.url, timeout=1.0), default_ttl=60, local_ttl=30)
+        for _ in range(2)
+    ]
+    for cache in caches:
+        cache.ensure_listener()
+        assert wait_until(lambda: cache._subscribed)
+    yield caches
+    for cache in caches:
+        cache.close()
+
+
+def test_local_cache_is_lru_with_ttl():
+    local = LocalCache(2)
+    local.set("a", 1, ttl=60)
+    local.set("b", 2, ttl=60)
+    local.get("a")
+    local.set("c", 3, ttl=60)  # evicts b, the least recently used
+    local.set("d", 4, ttl=-1)  # already expired: not stored
+
+    assert local.get("b") is MISSING and local.get("d") is MISSING
+    assert (local.get("a"), local.get("c")) == (1, 3)
+    assert local.stats()["evictions"] == 1
+
+
+def test_local_only_entries_are_capped_at_local_ttl(wait_until):
+    # Without a shared tier another worker's clear() never reaches this one
+    cache = Cache(LocalCache(100), default_ttl=60, local_ttl=0.05)
+    cache.set("brands", "page:1", ["old"])
+    assert cache.get("brands", "page:1") == ["old"]
+
+    assert wait_until(lambda: cache.get("brands", "page:1") is MISSING, timeout=1.0)
+
+
+def test_entries_are_shared_between_workers(workers):
+    a, b = workers
+    calls = []
+
+    assert a.get_or_set("barcode", "123", lambda: calls.append(1) or {"name": "Cola"}) == {"name": "Cola"}
+    assert b.get_or_set("barcode", "123", lambda: calls.append(1) or {"name": "stale"}) == {"name": "Cola"}
+    assert calls == [1]
+    assert b.shared_stats()["hits"] == 1
+
+
+def test_clear_and_delete_are_broadcast_to_other_workers(workers, wait_until):
+    a, b = workers
+    a.set("barcode", "123", {"v": 1})
+    a.set("barcode", "456", {"v": 1})
+    assert b.get("barcode", "123") == {"v": 1}  # now in b's local tier too
+
+    a.delete("barcode", "123")
+    assert wait_until(lambda: b.get("barcode", "123") is MISSING)
+
+    a.clear("barcode")
+    assert wait_until(lambda: b.get("barcode", "456") is MISSING)
+    assert a.version("barcode") == b.version("barcode") == 1
+
+
+def test_unreachable_shared_tier_is_a_miss_not_an_error(redis_server):
+    cache = Cache(LocalCache(100), RespClient(redis_server.url, timeout=0.2))
+    redis_server.close()
+
+    assert cache.get_or_set("barcode", "123", lambda: "computed") == "computed"
+    assert cache.shared_stats()["errors"] == 1
+    cache.close()
+
+
+def test_barcode_lookups_are_cached_and_invalidated_on_commit(app, client, query_budget):
+    brand = Brand(name="Cola", boycott_status=True)
+    db.session.add(Product(name="Cola Classic", barcode="6194002400707", brand=brand))
+    db.session.commit()
+
+    first = client.get("/barcode/6194002400707")
+    with query_budget(0):
+        again = client.get("/barcode/6.194002400707e12")  # same canonical barcode
+    assert again.get_json() == first.get_json()
+
+    brand.boycott_status = False
+    db.session.commit()
+
+    assert client.get("/barcode/6194002400707").get_json()["brand"]["boycott_status"] is False
+
+
+def test_concurrent_misses_share_one_computation_across_workers(workers):
+    a, b = workers
+    calls = []
+
+    def slow_compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return {"name": "Cola"}
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda c=cache: results.append(c.get_or_set("barcode", "123", slow_compute)))
+        for cache in (a, b, a, b, a, b)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [{"name": "Cola"}] * 6
+    assert calls == [1]
+    assert a.shared_stats()["coalesced"] + b.shared_stats()["coalesced"] == 5
+
+
+def test_concurrent_identical_requests_resolve_once(tmp_path):
+    class FileConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'catalog.db'}"
+
+    app = create_app(FileConfig)
+    with app.app_context():
+        db.create_all()
+        db.session.add(Product(name="Cola Classic", barcode="6194002400707", brand=Brand(name="Cola")))
+        db.session.commit()
+        engine = db.engine
+
+    resolutions = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def slow_product_select(conn, cursor, statement, *args):
+        if statement.startswith("SELECT") and "\nFROM products LEFT OUTER JOIN brands" in statement:
+            resolutions.append(statement)
+            time.sleep(0.05)  # keep the first resolution in flight
+
+    def scan(url, out):
+        out.append(app.test_client().get(url).status_code)
+
+    for url in ("/barcode/6194002400707", "/products?limit=5"):
+        resolutions.clear()
+        statuses = []
+        threads = [threading.Thread(target=scan, args=(url, statuses)) for _ in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert statuses == [200] * 16
+        assert len(resolutions) == 1, url
+
+    assert app.extensions["cache"].coalesced == 30
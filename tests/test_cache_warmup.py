@@ -0,0 +1,76 @@
+from datetime import datetime
+
+import pytest
+
+from app import create_app
+from cache_warmup import CacheWarmer
+from config import Config
+from db import db
+from models.brand import Brand
+from models.scan_count import ScanCount
+
+
+@pytest.fixture
+def seed_hot_set(seed_catalog):
+    """The catalog plus one scanned barcode: a hot set of four URLs."""
+
+    def seed():
+        seed_catalog()
+        hour = datetime.utcnow().replace(minute=0, second=0, microsecond=0)
+        db.session.add(ScanCount(barcode="6194002400707", hour=hour, scans=9))
+        db.session.commit()
+
+    return seed
+
+
+def use_warmer(app, **kwargs):
+    # Run passes by hand instead of in the background thread
+    warmer = CacheWarmer(app, background=False, **kwargs)
+    app.extensions["cache_warmup"] = warmer
+    return warmer
+
+
+def test_warm_up_preloads_lists_and_top_scanned_barcodes(app, client, query_budget, seed_hot_set):
+    seed_hot_set()
+    warmer = use_warmer(app, gate_ready=True)
+    assert client.get("/ready").status_code == 503
+
+    assert warmer.warm() == {"urls": 4, "skipped": 0, "seconds": warmer.last_run["seconds"]}
+
+    with query_budget(0):
+        for url in ("/categories", "/brands", "/products", "/barcode/6194002400707"):
+            assert client.get(url).status_code == 200
+    assert client.get("/ready").status_code == 200
+    assert len(app.extensions["scan_analytics"].buffer) == 1  # only the real scan above
+
+
+def test_warm_up_stops_at_its_time_budget(app, seed_hot_set):
+    seed_hot_set()
+    warmer = use_warmer(app, budget=0)
+    assert warmer.warm()["skipped"] == 4
+
+
+def test_commit_to_a_hot_table_triggers_another_pass(tmp_path, query_budget, seed_hot_set, wait_until):
+    class WarmConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'catalog.db'}"
+        CACHE_WARMUP_ENABLED = True
+        CACHE_WARMUP_DELAY = 0
+        CACHE_WARMUP_GATE_READY = True
+
+    app = create_app(WarmConfig)
+    with app.app_context():
+        db.create_all()
+        seed_hot_set()
+    warmer = app.extensions["cache_warmup"]
+    client = app.test_client()
+
+    assert wait_until(lambda: client.get("/ready").status_code == 200)
+    first_run = warmer.last_run
+
+    with app.app_context():
+        db.session.add(Brand(name="Soda", boycott_status=False))
+        db.session.commit()
+    assert wait_until(lambda: warmer.last_run is not first_run)
+
+    with query_budget(0):
+        assert "Soda" in [b["name"] for b in client.get("/brands").get_json()]
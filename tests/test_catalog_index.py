@@ -0,0 +1,73 @@
+import pytest
+from werkzeug.exceptions import HTTPException
+
+from catalog_index import CatalogIndex, ServingCatalog, init_catalog_index
+from db import db, run_plan
+from models.brand import Brand
+from resources.barcode import barcode_lookup_plan
+
+
+def outcome(lookup, raw):
+    try:
+        return lookup(raw)
+    except HTTPException as e:
+        return e.code, e.description
+
+
+@pytest.mark.parametrize("raw", [
+    "6194002400707", "6.194002400707e12", "06194002400707", "6194002400714", "06194002400714",
+    "12345670", "6194002400721", "6.194002400721e12", "99999999", "12345", "abc",
+])
+def test_index_lookup_matches_database_lookup(app, raw, seed_catalog):
+    seed_catalog()
+    index = CatalogIndex.load()
+
+    assert outcome(index.lookup, raw) == outcome(lambda r: run_plan(barcode_lookup_plan(r)), raw)
+
+
+def test_barcode_is_served_without_database_and_swapped_on_change(app, client, query_budget, seed_catalog):
+    seed_catalog()
+    catalog = ServingCatalog(app, background=False)  # rebuild by hand instead of in the background thread
+    app.extensions["catalog_index"] = catalog
+    first = catalog.rebuild()
+
+    with query_budget(0):
+        assert client.get("/barcode/12345670").get_json()["brand"]["boycott_status"] is True
+
+    Brand.query.filter_by(name="Cola").one().boycott_status = False
+    db.session.commit()
+    assert catalog.current() is first and catalog._wake.is_set()  # stale: rebuild scheduled
+
+    catalog.rebuild()
+    with query_budget(0):
+        assert client.get("/barcode/12345670").get_json()["brand"]["boycott_status"] is False
+
+
+def test_failed_first_build_is_retried(app, monkeypatch, wait_until):
+    calls = []
+
+    def flaky_load(generations=None):
+        calls.append(generations)
+        if len(calls) == 1:
+            raise RuntimeError("database unavailable")
+        return CatalogIndex.build([], [], [], [], generations)
+
+    monkeypatch.setattr(CatalogIndex, "load", flaky_load)
+    catalog = ServingCatalog(app, retry_delay=0.01)
+    assert catalog.current() is None  # starts the builder; its first build fails
+
+    assert wait_until(lambda: catalog.index is not None)
+    assert len(calls) == 2
+
+
+def test_memory_report_covers_every_component(app, seed_catalog):
+    seed_catalog()
+    report = CatalogIndex.load().memory_report()
+
+    assert set(report) == {"products", "product_categories", "brands", "alternatives", "strings", "total"}
+    assert report["total"] == sum(v for k, v in report.items() if k != "total")
+
+
+def test_max_age_is_capped_without_a_shared_cache_tier(app):
+    app.config.update(CATALOG_INDEX_MAX_AGE=300, CACHE_LOCAL_TTL=30)
+    assert init_catalog_index(app).max_age == 30
@@ -0,0 +1,117 @@
+import asyncio
+import gzip
+import json
+
+from flask import Response
+from werkzeug.http import parse_accept_header
+
+from app import create_app
+from asgi import AsyncCatalogApp
+from compression import negotiate
+from config import Config
+from db import db
+from models.brand import Brand
+from models.product import Product
+
+
+def seed_products(n):
+    brand = Brand(name="Cola", boycott_status=True, reason="Supports X")
+    db.session.add_all(
+        Product(name=f"Cola {i}", barcode=f"619400{i:07d}", brand=brand, description="Soft drink " * 5)
+        for i in range(n)
+    )
+    db.session.commit()
+
+
+def test_large_json_is_gzipped_when_accepted(app, client):
+    seed_products(60)
+
+    plain = client.get("/products?limit=100")
+    zipped = client.get("/products?limit=100", headers={"Accept-Encoding": "gzip"})
+
+    assert "Content-Encoding" not in plain.headers
+    assert zipped.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in zipped.headers["Vary"]
+    assert int(zipped.headers["Content-Length"]) == len(zipped.data) < len(plain.data) / 4
+    assert json.loads(gzip.decompress(zipped.data)) == plain.get_json()
+
+
+def test_small_responses_are_not_compressed(client):
+    resp = client.get("/health", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in resp.headers
+
+
+def test_compressed_etag_is_weak_and_still_revalidates(client):
+    resp = client.get("/openapi.json", headers={"Accept-Encoding": "gzip"})
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert resp.headers["ETag"].startswith('W/"')
+
+    again = client.get(
+        "/openapi.json",
+        headers={"Accept-Encoding": "gzip", "If-None-Match": resp.headers["ETag"]},
+    )
+    assert again.status_code == 304
+
+
+def test_streamed_response_is_compressed_per_chunk(tmp_path):
+    class SmallConfig(Config):
+        SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+        COMPRESS_MIN_SIZE = 0
+
+    app = create_app(SmallConfig)
+    rows = [f"{i},product {i}\n" for i in range(500)]
+
+    @app.get("/export.csv")
+    def export():
+        return Response((row for row in rows), mimetype="text/csv")
+
+    resp = app.test_client().get("/export.csv", headers={"Accept-Encoding": "gzip"})
+
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in resp.headers
+    assert gzip.decompress(resp.data).decode("utf-8") == "".join(rows)
+
+
+def test_negotiate_uses_client_quality_then_server_order():
+    accept = parse_accept_header("gzip;q=1.0, br;q=0.5, identity")
+    assert negotiate(accept, ["br", "gzip"]) == "gzip"
+    assert negotiate(parse_accept_header("*"), ["zstd-unknown", "gzip"]) == "gzip"
+    assert negotiate(parse_accept_header("gzip;q=0"), ["gzip"]) is None
+    assert negotiate(parse_accept_header(""), ["gzip"]) is None
+
+
+def test_async_path_compresses_with_same_settings(tmp_path):
+    path = tmp_path / "catalog.db"
+
+    class FileConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{path}"
+
+    with create_app(FileConfig).app_context():
+        db.create_all()
+        seed_products(40)
+    async_app = AsyncCatalogApp(database_url=f"sqlite+aiosqlite:///{path}")
+
+    async def call(accept_encoding):
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {
+            "type": "http", "method": "GET", "path": "/products", "query_string": b"limit=100",
+            "headers": [(b"accept-encoding", accept_encoding)],
+        }
+        await async_app(scope, None, send)
+        return dict(sent[0]["headers"]), sent[1]["body"]
+
+    async def run():
+        try:
+            return await call(b"gzip"), await call(b"")
+        finally:
+            await async_app.engine.dispose()
+
+    (zipped_headers, zipped), (plain_headers, plain) = asyncio.run(run())
+
+    assert zipped_headers[b"content-encoding"] == b"gzip"
+    assert b"content-encoding" not in plain_headers
+    assert gzip.decompress(zipped) == plain
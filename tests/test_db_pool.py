@@ -0,0 +1,102 @@
+import threading
+import time
+
+import pytest
+from sqlalchemy.exc import TimeoutError as PoolTimeout
+
+from app import create_app
+from config import Config
+from db import db
+from db_pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool, engine_options
+
+
+@pytest.fixture
+def pooled_app(tmp_path):
+    class PoolConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'pool.db'}"
+        DB_POOL_SIZE = 2
+        DB_MAX_OVERFLOW = 0
+        DB_POOL_TIMEOUT = 1
+        PASSWORD_HASH_METHOD = "pbkdf2:sha256:1000"
+
+    app = create_app(PoolConfig)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+
+
+def test_pool_settings_come_from_config(pooled_app):
+    pool = db.engine.pool
+    assert isinstance(pool, InstrumentedQueuePool)
+    assert pool.size() == 2
+    assert pool.timeout() == 1
+    assert pool._pre_ping is True
+
+
+def test_in_memory_sqlite_keeps_default_pool(app):
+    assert app.config["SQLALCHEMY_ENGINE_OPTIONS"] == {}
+
+
+def test_pool_endpoint_reports_waits_and_timeouts(pooled_app, create_user, auth_header):
+    admin = auth_header(create_user("admin@example.com", "admin", role="admin"))
+    user = auth_header(create_user("user@example.com", "user"))
+    db.session.remove()
+
+    held = [db.engine.connect(), db.engine.connect()]
+    with pytest.raises(PoolTimeout):
+        db.engine.connect()
+    for conn in held:
+        conn.close()
+
+    client = pooled_app.test_client()
+    assert client.get("/admin/db-pool", headers=user).status_code == 403
+
+    resp = client.get("/admin/db-pool", headers=admin)
+    assert resp.status_code == 200
+    stats = resp.get_json()["default"]
+    assert stats["pool_class"] == "InstrumentedQueuePool"
+    assert stats["size"] == 2
+    assert stats["timeouts"] == 1
+    assert stats["waiting"] == 0
+    assert stats["checked_out"] >= 1  # the request's own connection
+    assert stats["wait_seconds_buckets"]["+Inf"] == stats["checkouts"]
+
+
+def test_only_blocked_checkouts_count_as_waiting(pooled_app):
+    db.session.remove()
+    engine = db.engine
+    pool = engine.pool
+    first = engine.connect()
+    assert not pool._exhausted()  # room for another connection: no wait
+
+    second = engine.connect()
+    assert pool._exhausted()
+    blocked = threading.Thread(target=lambda: engine.connect().close())
+    blocked.start()
+    deadline = time.monotonic() + 1
+    while pool.wait_stats.waiting == 0 and time.monotonic() < deadline:
+        time.sleep(0.005)
+    assert pool.wait_stats.waiting == 1
+
+    first.close()
+    blocked.join()
+    second.close()
+    assert pool.wait_stats.waiting == 0
+    assert pool.wait_stats.timeouts == 0
+
+
+def test_pgbouncer_mode_disables_asyncpg_statement_cache():
+    config = {
+        key: getattr(Config, key) for key in dir(Config) if key.isupper()
+    }
+    config["DB_PGBOUNCER"] = True
+    url = "postgresql+asyncpg://app@pgbouncer:6432/boycott"
+
+    options = engine_options(config, url, is_async=True)
+
+    assert options["poolclass"] is InstrumentedAsyncQueuePool
+    assert options["connect_args"] == {
+        "statement_cache_size": 0,
+        "prepared_statement_cache_size": 0,
+    }
@@ -0,0 +1,58 @@
+from werkzeug.datastructures import MultiDict
+
+from cache import normalized_query
+from db import db
+from models.brand import Brand
+from models.category import Category
+from models.product import Product
+from models.user import User
+
+
+def test_normalized_query_fills_defaults_and_sorts():
+    defaults = {"sort": "name", "page": 1, "limit": 20}
+    assert normalized_query(MultiDict(), defaults) == "limit=20&page=1&sort=name"
+    assert normalized_query(MultiDict([("q", "cola"), ("limit", "50")]), defaults) == "limit=50&page=1&q=cola&sort=name"
+
+
+def test_list_pages_are_served_from_cache_until_a_table_changes(app, client, query_budget):
+    db.session.add(Brand(name="Cola", boycott_status=True))
+    db.session.commit()
+
+    first = client.get("/brands")
+    with query_budget(0):
+        again = client.get("/brands?page=1&limit=20&sort=name&order=asc")
+    assert again.get_json() == first.get_json()
+
+    db.session.add(User(username="someone", email="someone@example.com", password_hash="x"))
+    db.session.commit()
+    with query_budget(0):
+        client.get("/brands")  # users is not a table /brands reads
+
+    db.session.add(Brand(name="Soda", boycott_status=False))
+    db.session.commit()
+    assert [b["name"] for b in client.get("/brands").get_json()] == ["Cola", "Soda"]
+
+
+def test_association_table_write_refreshes_filtered_products(app, client):
+    category = Category(name="Drinks", slug="drinks")
+    product = Product(name="Cola Classic", barcode="6194002400707", brand=Brand(name="Cola"))
+    db.session.add_all([category, product])
+    db.session.commit()
+
+    url = f"/products?category_id={category.id}"
+    assert client.get(url).get_json() == []
+
+    product.categories.append(category)  # only product_category changes
+    db.session.commit()
+
+    assert [p["name"] for p in client.get(url).get_json()] == ["Cola Classic"]
+
+
+def test_rolled_back_write_keeps_entries(app, client, query_budget):
+    client.get("/categories")
+    db.session.add(Category(name="Snacks", slug="snacks"))
+    db.session.flush()
+    db.session.rollback()
+
+    with query_budget(0):
+        assert client.get("/categories").get_json() == []
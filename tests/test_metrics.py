@@ -0,0 +1,70 @@
+import os
+
+from app import create_app
+from config import Config
+from metrics import LATENCY_BUCKETS
+
+
+def metric_lines(resp):
+    assert resp.status_code == 200
+    assert resp.mimetype == "text/plain"
+    return resp.get_data(as_text=True).splitlines()
+
+
+def test_metrics_expose_request_counts_and_latency(client):
+    client.get("/health")
+    client.get("/health")
+    client.get("/brands/999")
+
+    lines = metric_lines(client.get("/metrics"))
+
+    assert 'boycott_http_requests_total{route="/health",method="GET",status="200"} 2' in lines
+    assert 'boycott_http_requests_total{route="/brands/<int:brand_id>",method="GET",status="404"} 1' in lines
+    assert 'boycott_http_request_duration_seconds_count{route="/health",method="GET"} 2' in lines
+    buckets = [
+        line for line in lines
+        if line.startswith('boycott_http_request_duration_seconds_bucket{route="/health",method="GET"')
+    ]
+    assert len(buckets) == len(LATENCY_BUCKETS) + 1
+    assert buckets[-1].endswith('le="+Inf"} 2')
+    # The scrape itself is in flight while it renders
+    assert "boycott_http_requests_in_flight 1" in lines
+    assert "# TYPE boycott_cache_hits_total counter" in lines
+
+
+def test_unknown_paths_share_one_route_label(client):
+    client.get("/no/such/path")
+    client.get("/another/missing/path")
+
+    lines = metric_lines(client.get("/metrics"))
+
+    assert 'boycott_http_requests_total{route="<unmatched>",method="GET",status="404"} 2' in lines
+
+
+def test_workers_are_aggregated_and_exited_workers_keep_counters(tmp_path):
+    class MultiConfig(Config):
+        SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+        METRICS_MULTIPROC_DIR = str(tmp_path)
+        METRICS_FLUSH_INTERVAL = 3600
+
+    # Two app instances stand in for two gunicorn workers sharing the directory
+    worker_a, worker_b = create_app(MultiConfig), create_app(MultiConfig)
+    client_a, client_b = worker_a.test_client(), worker_b.test_client()
+    client_a.get("/health")
+    client_b.get("/health")
+    client_b.get("/health")
+    worker_b.extensions["metrics"].write_snapshot(worker_b)  # its periodic flush
+
+    lines = metric_lines(client_a.get("/metrics"))
+    assert 'boycott_http_requests_total{route="/health",method="GET",status="200"} 3' in lines
+
+    # Worker B exits: its lock is released
+    b_metrics = worker_b.extensions["metrics"]
+    b_metrics._pid = None
+    b_metrics._lock_file.close()
+
+    lines = metric_lines(client_a.get("/metrics"))
+    assert 'boycott_http_requests_total{route="/health",method="GET",status="200"} 3' in lines
+    assert 'boycott_http_requests_total{route="/metrics",method="GET",status="200"} 1' in lines
+    assert os.path.exists(tmp_path / "archive.json")
+    assert len(list(tmp_path.glob("worker-*.lock"))) == 1
@@ -0,0 +1,41 @@
+from app import create_app
+from config import Config
+
+
+def smorest_api(app):
+    return app.extensions["flask-smorest"]["apis"][""]["ext_obj"]
+
+
+def test_spec_is_built_on_first_request_and_cached(app, client):
+    api = smorest_api(app)
+    assert not api.spec_built
+
+    resp = client.get("/openapi.json")
+
+    assert resp.status_code == 200
+    spec = resp.get_json()
+    assert api.spec_built
+    assert "/barcode/{barcode}" in spec["paths"]
+    assert "/reports/summary" in spec["paths"]
+    assert "BearerAuth" in spec["components"]["securitySchemes"]
+    assert [tag["name"] for tag in spec["tags"]][:2] == ["Auth", "Barcode"]
+    assert "BarcodeResultSchema" in spec["components"]["schemas"]
+
+    again = client.get("/openapi.json", headers={"If-None-Match": resp.headers["ETag"].strip('"')})
+    assert again.status_code == 304
+
+
+def test_prebuilt_spec_file_is_served_without_building(app, client, tmp_path):
+    path = tmp_path / "openapi.json"
+    path.write_text(smorest_api(app).spec_json(), encoding="utf-8")
+
+    class PrebuiltConfig(Config):
+        SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+        OPENAPI_SPEC_FILE = str(path)
+
+    prebuilt = create_app(PrebuiltConfig)
+    resp = prebuilt.test_client().get("/openapi.json")
+
+    assert resp.status_code == 200
+    assert resp.get_data(as_text=True) == path.read_text(encoding="utf-8")
+    assert not smorest_api(prebuilt).spec_built
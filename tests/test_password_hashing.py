@@ -0,0 +1,66 @@
+import threading
+
+from db import db
+from werkzeug.security import generate_password_hash
+
+from password_hashing import PasswordHasher, method_prefix
+
+
+def test_login_rehashes_when_method_changes(app, client, create_user):
+    app.config["PASSWORD_HASH_METHOD"] = "pbkdf2:sha256:1000"
+    app.extensions.pop("password_hasher", None)
+    user = create_user("user@example.com", "user")
+    assert user.password_hash.startswith("pbkdf2:sha256:1000$")
+
+    app.config["PASSWORD_HASH_METHOD"] = "pbkdf2:sha256:2000"
+    app.extensions.pop("password_hasher", None)
+    resp = client.post(
+        "/auth/login", json={"email": "user@example.com", "password": "password123"}
+    )
+
+    assert resp.status_code == 200
+    db.session.refresh(user)
+    assert user.password_hash.startswith("pbkdf2:sha256:2000$")
+    assert user.check_password("password123")
+
+
+def test_default_parameters_do_not_force_a_rehash():
+    for method in ("scrypt", "pbkdf2"):
+        hasher = PasswordHasher(method)
+        assert not hasher.needs_rehash(hasher.hash("password123"))
+    assert PasswordHasher("scrypt").needs_rehash(PasswordHasher("pbkdf2").hash("password123"))
+
+
+def test_method_prefix_matches_werkzeug():
+    for method in ("scrypt", "scrypt:16384:8:1", "pbkdf2", "pbkdf2:sha512", "pbkdf2:sha256:1000"):
+        assert method_prefix(method) == generate_password_hash("x", method).split("$", 1)[0]
+
+
+def test_saturated_pool_returns_503(app, client, create_user):
+    create_user("user@example.com", "user")
+    hasher = PasswordHasher("pbkdf2:sha256:1000", workers=1, max_pending=0)
+    app.extensions["password_hasher"] = hasher
+
+    release = threading.Event()
+    started = threading.Event()
+
+    def occupy():
+        started.set()
+        release.wait(5)
+
+    busy = threading.Thread(target=hasher.run, args=(occupy,))
+    busy.start()
+    started.wait(5)
+    try:
+        resp = client.post(
+            "/auth/login", json={"email": "user@example.com", "password": "password123"}
+        )
+        assert resp.status_code == 503
+    finally:
+        release.set()
+        busy.join()
+
+    resp = client.post(
+        "/auth/login", json={"email": "user@example.com", "password": "password123"}
+    )
+    assert resp.status_code == 200
@@ -0,0 +1,88 @@
+import logging
+
+import pytest
+from sqlalchemy import select
+
+from db import db
+from models.brand import Brand
+from models.brand_alternative import BrandAlternative
+from models.category import Category
+from models.product import Product
+from sql_profiler import capture_queries, init_sql_profiler, statement_shape
+
+
+@pytest.fixture
+def catalog(app):
+    drinks = Category(name="Drinks", slug="drinks")
+    snacks = Category(name="Snacks", slug="snacks")
+    cola = Brand(name="Cola", boycott_status=True, reason="Supports X")
+    db.session.add_all([drinks, snacks, cola])
+    for i in range(3):
+        local = Brand(name=f"Local {i}", boycott_status=False)
+        db.session.add(local)
+        db.session.flush()
+        db.session.add(BrandAlternative(boycotted_brand_id=cola.id, alternative_brand_id=local.id, category_id=drinks.id))
+    for i in range(6):
+        db.session.add(Product(
+            name=f"Cola {i}", barcode=f"619400240070{i}", brand=cola, categories=[drinks, snacks],
+        ))
+    db.session.commit()
+    db.session.expunge_all()
+
+
+# Budgets are independent of the number of rows: a lazy load inside
+# serialization adds one query per row and fails these.
+@pytest.mark.parametrize(
+    "url, budget",
+    [
+        ("/barcode/6194002400700", 3),
+        ("/barcode/6194002400700?include=reports", 4),
+        ("/products/6194002400700/alternatives", 3),
+        ("/products", 2),
+        ("/products/1", 2),
+        ("/brands", 1),
+        ("/categories/drinks/products", 3),
+    ],
+)
+def test_endpoint_query_budgets(client, catalog, query_budget, url, budget):
+    with query_budget(budget):
+        resp = client.get(url)
+    assert resp.status_code == 200
+
+
+def test_lazy_loads_are_flagged_as_n_plus_one(catalog):
+    with capture_queries() as profile:
+        products = db.session.scalars(select(Product)).all()
+        [product.brand.name for product in products]
+        db.session.expunge_all()
+        products = db.session.scalars(select(Product)).all()
+        [len(product.categories) for product in products]
+
+    # one lazy categories load per product; brand loads hit the identity map
+    assert profile.count == 2 + 1 + len(products)
+    (shape, count), = profile.repeated(threshold=5)
+    assert count == len(products)
+    assert "product_category" in shape
+
+
+def test_profiled_request_sets_server_timing(app, client, catalog, caplog):
+    init_sql_profiler(app)
+    app.config["SQL_N_PLUS_ONE_THRESHOLD"] = 3
+
+    with caplog.at_level(logging.DEBUG, logger=app.logger.name):
+        resp = client.get("/barcode/6194002400700")
+
+    assert resp.status_code == 200
+    assert resp.headers["Server-Timing"].startswith("db;dur=")
+    assert resp.headers["Server-Timing"].endswith('desc="3 queries"')
+    assert "SQL profile GET /barcode/<path:barcode>" in caplog.text
+    assert "Possible N+1" not in caplog.text
+
+
+def test_statement_shape_collapses_in_lists():
+    assert statement_shape("SELECT * FROM t WHERE id IN (?, ?, ?)") == statement_shape(
+        "SELECT * FROM t\n WHERE id IN (?, ?)"
+    )
+    assert statement_shape("SELECT * FROM t WHERE id IN (%(id_1_1)s, %(id_1_2)s)") == (
+        "SELECT * FROM t WHERE id IN (?...)"
+    )
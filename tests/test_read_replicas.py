@@ -0,0 +1,72 @@
+import time
+
+import pytest
+
+from app import create_app
+from config import Config
+from db import db
+from models.brand import Brand
+from models.user import User
+
+
+def brand_names(resp):
+    assert resp.status_code == 200
+    return sorted(brand["name"] for brand in resp.get_json())
+
+
+@pytest.fixture
+def replicated_app(tmp_path):
+    # Two SQLite files stand in for the primary and a (lagging) replica
+    class ReplicaConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'primary.db'}"
+        DATABASE_REPLICA_URLS = [f"sqlite:///{tmp_path / 'replica.db'}"]
+        READ_YOUR_WRITES_SECONDS = 5
+        PASSWORD_HASH_METHOD = "pbkdf2:sha256:1000"
+
+    app = create_app(ReplicaConfig)
+    with app.app_context():
+        replica = app.extensions["read_replicas"].engines["replica_0"]
+        db.metadata.create_all(db.engine)
+        db.metadata.create_all(replica)
+        for engine, brand in ((db.engine, "Primary Cola"), (replica, "Replica Cola")):
+            with engine.begin() as conn:
+                conn.execute(Brand.__table__.insert(), {"name": brand, "boycott_status": True})
+                conn.execute(
+                    User.__table__.insert(),
+                    {"id": 1, "username": "admin", "email": "admin@example.com",
+                     "password_hash": "x", "role": "admin", "token_version": 0},
+                )
+        yield app
+        db.session.remove()
+
+
+def test_reads_go_to_replica_and_writes_to_primary(replicated_app, auth_header):
+    client = replicated_app.test_client()
+    admin = auth_header(User(id=1, role="admin", token_version=0))
+
+    assert brand_names(client.get("/brands")) == ["Replica Cola"]
+
+    resp = client.post("/brands", json={"name": "Local Juice", "boycott_status": False}, headers=admin)
+    assert resp.status_code == 201
+    with replicated_app.app_context(), db.engine.connect() as primary:
+        assert primary.execute(Brand.__table__.select().where(Brand.name == "Local Juice")).first()
+
+
+def test_writer_reads_own_writes_from_primary(replicated_app, monkeypatch, auth_header):
+    admin = auth_header(User(id=1, role="admin", token_version=0))
+    writer = replicated_app.test_client()
+    resp = writer.post("/brands", json={"name": "Local Juice", "boycott_status": False}, headers=admin)
+    assert resp.status_code == 201
+
+    # Cookie-carrying client, and a cookie-less client with the same token
+    assert brand_names(writer.get("/brands")) == ["Local Juice", "Primary Cola"]
+    api_client = replicated_app.test_client(use_cookies=False)
+    assert brand_names(api_client.get("/brands", headers=admin)) == ["Local Juice", "Primary Cola"]
+    # Everyone else still reads the replica
+    assert brand_names(api_client.get("/brands")) == ["Replica Cola"]
+
+    later = time.time() + 10
+    later_monotonic = time.monotonic() + 10
+    monkeypatch.setattr(time, "time", lambda: later)
+    monkeypatch.setattr(time, "monotonic", lambda: later_monotonic)
+    assert brand_names(api_client.get("/brands", headers=admin)) == ["Replica Cola"]
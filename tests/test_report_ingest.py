@@ -0,0 +1,148 @@
+import json
+import os
+
+from db import db
+from models.brand import Brand
+from models.product import Product
+from models.report import Report
+from models.report_summary import ReportSummary
+from report_ingest import ReportIngestQueue, ReportJournal
+
+
+def use_queue(app, **kwargs):
+    # Run the writer by hand (flush) instead of in the background thread
+    ingest = ReportIngestQueue(app, background=False, **kwargs)
+    app.extensions["report_ingest"] = ingest
+    return ingest
+
+
+def post_report(client, headers, barcode="12345678"):
+    return client.post(
+        "/reports",
+        json={"barcode": barcode, "message": "This product should be reviewed."},
+        headers=headers,
+    )
+
+
+def test_queued_reports_are_batch_inserted(app, client, create_user, auth_header):
+    ingest = use_queue(app, batch_size=10)
+    user = create_user("user@example.com", "user")
+
+    responses = [post_report(client, auth_header(user)) for _ in range(3)]
+    assert {r.status_code for r in responses} == {202}
+    ingest_ids = {r.get_json()["ingest_id"] for r in responses}
+    assert Report.query.count() == 0
+
+    ingest.flush()
+
+    assert {r.ingest_id for r in Report.query} == ingest_ids
+    assert ReportSummary.query.filter_by(scope="barcode", key="12345678").one().pending_count == 3
+
+
+def test_queued_report_is_tracked_by_ingest_id(app, client, create_user, auth_header):
+    ingest = use_queue(app)
+    headers = auth_header(create_user("user@example.com", "user"))
+
+    resp = post_report(client, headers)
+    status_url = resp.headers["Location"]
+    assert status_url == f"/reports/ingest/{resp.get_json()['ingest_id']}"
+    assert client.get(status_url, headers=headers).status_code == 404
+
+    ingest.flush()
+    report = client.get(status_url, headers=headers).get_json()
+    assert client.get(f"/reports/{report['id']}", headers=headers).status_code == 200
+
+
+def test_unknown_product_is_rejected_before_queueing(app, client, create_user, auth_header):
+    ingest = use_queue(app)
+    headers = auth_header(create_user("user@example.com", "user"))
+    product = Product(name="Cola", barcode="12345678", brand=Brand(name="Brand"))
+    db.session.add(product)
+    db.session.commit()
+
+    payload = {"product_id": 999, "message": "This product should be reviewed."}
+    assert client.post("/reports", json=payload, headers=headers).status_code == 404
+
+    # Deleted while queued: dead-lettered by the writer, not silently dropped
+    payload["product_id"] = product.id
+    assert client.post("/reports", json=payload, headers=headers).status_code == 202
+    db.session.delete(product)
+    db.session.commit()
+    ingest.flush()
+    assert Report.query.count() == 0
+    assert ingest.dead_lettered == 1
+
+
+def test_full_queue_applies_backpressure(app, client, create_user, auth_header):
+    use_queue(app, maxsize=1)
+    user = create_user("user@example.com", "user")
+
+    assert post_report(client, auth_header(user)).status_code == 202
+    assert post_report(client, auth_header(user)).status_code == 503
+
+
+def test_orphaned_journal_is_replayed_once(app, tmp_path, create_user):
+    user = create_user("user@example.com", "user")
+    row = {
+        "ingest_id": "a" * 32,
+        "user_id": user.id,
+        "product_id": None,
+        "barcode": "12345678",
+        "message": "This product should be reviewed.",
+        "evidence_url": None,
+        "status": "pending",
+        "created_at": "2025-01-01T00:00:00",
+        "updated_at": "2025-01-01T00:00:00",
+    }
+    (tmp_path / "reports-1-dead.jsonl").write_text(json.dumps(row) + "\n" + '{"torn')
+
+    ReportIngestQueue(app, journal_dir=str(tmp_path)).replay_orphans()
+    # Same journal replayed again (crash during replay) must not duplicate
+    (tmp_path / "reports-2-dead.jsonl").write_text(json.dumps(row) + "\n")
+    ReportIngestQueue(app, journal_dir=str(tmp_path)).replay_orphans()
+
+    assert [r.ingest_id for r in Report.query] == ["a" * 32]
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_failing_row_is_dead_lettered_without_blocking_the_batch(
+    app, client, tmp_path, monkeypatch, create_user, auth_header
+):
+    ingest = use_queue(app, batch_size=10, journal_dir=str(tmp_path), max_attempts=2, retry_delay=0)
+    user = create_user("user@example.com", "user")
+    write_batch = ReportIngestQueue.write_batch
+
+    def reject_poison(rows):
+        if any(row["barcode"] == "99999999" for row in rows):
+            raise RuntimeError("foreign key violation")
+        return write_batch(rows)
+
+    monkeypatch.setattr(ReportIngestQueue, "write_batch", staticmethod(reject_poison))
+    good = post_report(client, auth_header(user)).get_json()["ingest_id"]
+    poison = post_report(client, auth_header(user), barcode="99999999").get_json()["ingest_id"]
+    ingest.flush()
+
+    assert [r.ingest_id for r in Report.query] == [good]
+    assert ingest.dead_lettered == 1
+    dead = (tmp_path / "dead-letter.jsonl").read_text().splitlines()
+    assert [json.loads(line)["ingest_id"] for line in dead] == [poison]
+
+
+def test_journal_segments_are_deleted_once_written(app, client, tmp_path, create_user, auth_header):
+    ingest = use_queue(app, batch_size=2)
+    ingest.journal = ReportJournal(str(tmp_path))
+    user = create_user("user@example.com", "user")
+
+    for _ in range(3):
+        post_report(client, auth_header(user))
+    ingest._deliver(ingest._take_batch(timeout=0))
+    # The sealed segment still holds the third, unwritten row
+    assert len(ingest.journal.paths()) == 2
+
+    for _ in range(2):
+        post_report(client, auth_header(user))
+    ingest.flush()
+
+    assert Report.query.count() == 5
+    assert [path.name for path in tmp_path.iterdir()] == [os.path.basename(p) for p in ingest.journal.paths()]
+    assert os.path.getsize(ingest.journal.paths()[0]) == 0
@@ -0,0 +1,112 @@
+import resources.reports as reports_module
+from db import db
+from models.brand import Brand
+from models.product import Product
+from models.report import Report
+from models.report_summary import ReportSummary, apply_report_changes, rebuild_report_summaries
+
+
+def create_product(name, barcode):
+    brand = Brand.query.filter_by(name="Brand").first() or Brand(name="Brand", boycott_status=False)
+    product = Product(name=name, barcode=barcode, brand=brand)
+    db.session.add(product)
+    db.session.commit()
+    return product
+
+
+def submit(client, headers, **payload):
+    payload.setdefault("message", "This product should be reviewed.")
+    resp = client.post("/reports", json=payload, headers=headers)
+    assert resp.status_code == 201
+    return resp.get_json()["id"]
+
+
+def counters(scope, key):
+    row = ReportSummary.query.filter_by(scope=scope, key=key).one()
+    return row.pending_count, row.approved_count, row.rejected_count
+
+
+def test_counters_follow_report_lifecycle(client, create_user, auth_header):
+    user = create_user("user@example.com", "user")
+    admin = create_user("admin@example.com", "admin", role="admin")
+    product = create_product("Cola", "12345678")
+
+    first = submit(client, auth_header(user), product_id=product.id)
+    second = submit(client, auth_header(user), product_id=product.id)
+    submit(client, auth_header(user), barcode="87654321")
+    assert counters("product", str(product.id)) == (2, 0, 0)
+    assert counters("barcode", "87654321") == (1, 0, 0)
+
+    client.put(f"/reports/{first}", json={"status": "approved"}, headers=auth_header(admin))
+    client.post(
+        "/reports/moderate",
+        json={"report_ids": [second], "status": "rejected"},
+        headers=auth_header(admin),
+    )
+    db.session.expire_all()
+    assert counters("product", str(product.id)) == (0, 1, 1)
+
+    # Incremental counters agree with a full recount
+    before = {(r.scope, r.key): r.to_dict() for r in ReportSummary.query}
+    rebuild_report_summaries()
+    after = {(r.scope, r.key): r.to_dict() for r in ReportSummary.query}
+    assert before == after
+
+
+def test_summary_endpoint_sorts_by_pending(client, create_user, auth_header):
+    user = create_user("user@example.com", "user")
+    quiet = create_product("Quiet", "11111111")
+    busy = create_product("Busy", "22222222")
+    submit(client, auth_header(user), product_id=quiet.id)
+    for _ in range(3):
+        submit(client, auth_header(user), product_id=busy.id)
+
+    resp = client.get("/reports/summary?sort=pending", headers=auth_header(user))
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert [row["product_id"] for row in body] == [busy.id, quiet.id]
+    assert body[0]["pending"] == 3
+
+
+def test_barcode_lookup_includes_report_badge(client, create_user, auth_header):
+    user = create_user("user@example.com", "user")
+    product = create_product("Cola", "12345678")
+    submit(client, auth_header(user), product_id=product.id)
+
+    plain = client.get("/barcode/12345678").get_json()
+    assert "reports" not in plain
+
+    badge = client.get("/barcode/12345678?include=reports").get_json()
+    assert badge["reports"] == {"pending": 1, "approved": 0, "rejected": 0, "total": 1}
+
+
+def test_moderation_racing_another_moderator_counts_once(client, create_user, auth_header, monkeypatch):
+    user = create_user("user@example.com", "user")
+    admin = create_user("admin@example.com", "admin", role="admin")
+    product = create_product("Cola", "12345678")
+    report_id = submit(client, auth_header(user), product_id=product.id)
+
+    # Another moderator rejects the report between our read and our UPDATE
+    original = reports_module.not_leased_by_others
+    raced = []
+
+    def racing(admin_id, now):
+        if not raced:
+            raced.append(True)
+            db.session.execute(
+                Report.__table__.update().where(Report.id == report_id).values(status="rejected")
+            )
+            apply_report_changes([(product.id, None, "pending", "rejected", None)])
+        return original(admin_id, now)
+
+    monkeypatch.setattr(reports_module, "not_leased_by_others", racing)
+    resp = client.put(f"/reports/{report_id}", json={"status": "approved"}, headers=auth_header(admin))
+    assert resp.status_code == 200
+    assert resp.get_json()["status"] == "approved"
+
+    db.session.expire_all()
+    assert counters("product", str(product.id)) == (0, 1, 0)
+    before = {(r.scope, r.key): r.to_dict() for r in ReportSummary.query}
+    rebuild_report_summaries()
+    after = {(r.scope, r.key): r.to_dict() for r in ReportSummary.query}
+    assert before == after
@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+
+from db import db
+from models.report import Report
+
+
+def add_report(user, barcode="12345678", status="pending"):
+    report = Report(
+        user_id=user.id,
+        barcode=barcode,
+        message="This product should be reviewed.",
+        status=status,
+    )
+    db.session.add(report)
+    db.session.commit()
+    return report.id
+
+
+def test_bulk_moderation_by_ids_reports_each_outcome(client, create_user, auth_header):
+    admin = create_user("admin@example.com", "admin", role="admin")
+    other = create_user("other@example.com", "other", role="admin")
+    pending = add_report(admin)
+    done = add_report(admin, status="approved")
+    leased = add_report(admin)
+    report = db.session.get(Report, leased)
+    report.claimed_by = other.id
+    report.claimed_until = datetime.utcnow() + timedelta(minutes=5)
+    db.session.commit()
+
+    resp = client.post(
+        "/reports/moderate",
+        json={
+            "report_ids": [pending, done, leased, 9999],
+            "status": "rejected",
+            "admin_note": "Duplicate",
+        },
+        headers=auth_header(admin),
+    )
+
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert body["updated"] == 1
+    assert {r["id"]: r["outcome"] for r in body["results"]} == {
+        pending: "updated",
+        done: "not_pending",
+        leased: "claimed",
+        9999: "not_found",
+    }
+    db.session.expire_all()
+    assert db.session.get(Report, pending).status == "rejected"
+    assert db.session.get(Report, pending).admin_note == "Duplicate"
+
+
+def test_bulk_moderation_by_barcode_touches_only_matching_pending(client, create_user, auth_header):
+    admin = create_user("admin@example.com", "admin", role="admin")
+    matching = [add_report(admin, barcode="11111111") for _ in range(5)]
+    approved = add_report(admin, barcode="11111111", status="approved")
+    unrelated = add_report(admin, barcode="22222222")
+
+    resp = client.post(
+        "/reports/moderate",
+        json={"barcode": "11111111", "status": "rejected"},
+        headers=auth_header(admin),
+    )
+
+    body = resp.get_json()
+    assert body["updated"] == 5
+    assert sorted(r["id"] for r in body["results"]) == sorted(matching)
+    db.session.expire_all()
+    assert db.session.get(Report, approved).status == "approved"
+    assert db.session.get(Report, unrelated).status == "pending"
+
+
+def test_bulk_moderation_requires_a_selector(client, create_user, auth_header):
+    admin = create_user("admin@example.com", "admin", role="admin")
+    resp = client.post(
+        "/reports/moderate", json={"status": "rejected"}, headers=auth_header(admin)
+    )
+    assert resp.status_code == 422
@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta
+
+from db import db
+from models.report import Report
+
+
+def seed_pending(user, count):
+    base = datetime(2025, 1, 1)
+    for i in range(count):
+        db.session.add(
+            Report(
+                user_id=user.id,
+                barcode="12345678",
+                message="This product should be reviewed.",
+                created_at=base + timedelta(minutes=i),
+            )
+        )
+    db.session.commit()
+
+
+def test_claims_never_overlap(client, create_user, auth_header):
+    first = create_user("mod1@example.com", "mod1", role="admin")
+    second = create_user("mod2@example.com", "mod2", role="admin")
+    seed_pending(first, 3)
+
+    a = client.post("/reports/claim?n=2", headers=auth_header(first))
+    b = client.post("/reports/claim?n=2", headers=auth_header(second))
+    c = client.post("/reports/claim?n=2", headers=auth_header(second))
+
+    assert a.status_code == 200
+    a_ids = {r["id"] for r in a.get_json()}
+    b_ids = {r["id"] for r in b.get_json()}
+    assert len(a_ids) == 2
+    assert len(b_ids) == 1
+    assert not a_ids & b_ids
+    assert c.get_json() == []
+    assert {r["claimed_by"] for r in a.get_json()} == {first.id}
+
+
+def test_expired_lease_can_be_reclaimed(client, create_user, auth_header):
+    first = create_user("mod1@example.com", "mod1", role="admin")
+    second = create_user("mod2@example.com", "mod2", role="admin")
+    seed_pending(first, 1)
+
+    client.post("/reports/claim?n=1", headers=auth_header(first))
+    report = Report.query.one()
+    report.claimed_until = datetime.utcnow() - timedelta(seconds=1)
+    db.session.commit()
+
+    resp = client.post("/reports/claim?n=1", headers=auth_header(second))
+    assert [r["claimed_by"] for r in resp.get_json()] == [second.id]
+
+
+def test_moderating_a_report_leased_by_someone_else_conflicts(client, create_user, auth_header):
+    first = create_user("mod1@example.com", "mod1", role="admin")
+    second = create_user("mod2@example.com", "mod2", role="admin")
+    seed_pending(first, 1)
+
+    report_id = client.post("/reports/claim?n=1", headers=auth_header(first)).get_json()[0]["id"]
+
+    blocked = client.put(
+        f"/reports/{report_id}", json={"status": "approved"}, headers=auth_header(second)
+    )
+    assert blocked.status_code == 409
+
+    done = client.put(
+        f"/reports/{report_id}", json={"status": "approved"}, headers=auth_header(first)
+    )
+    assert done.status_code == 200
+    assert done.get_json()["claimed_by"] is None
+
+
+def test_claim_requires_admin(client, create_user, auth_header):
+    user = create_user("user@example.com", "user", role="user")
+    resp = client.post("/reports/claim", headers=auth_header(user))
+    assert resp.status_code == 403
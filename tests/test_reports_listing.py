@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta
+
+from db import db
+from models.report import Report
+
+
+def seed_reports(user, count, status="pending", barcode="12345678"):
+    base = datetime(2025, 1, 1)
+    for i in range(count):
+        db.session.add(
+            Report(
+                user_id=user.id,
+                barcode=barcode,
+                message="This product should be reviewed.",
+                status=status,
+                # Pairs share a timestamp so the id tie-breaker is exercised
+                created_at=base + timedelta(minutes=i // 2),
+            )
+        )
+    db.session.commit()
+
+
+def test_reports_cursor_pagination_walks_every_row_once(client, create_user, auth_header):
+    user = create_user("reader@example.com", "reader")
+    seed_reports(user, 7)
+
+    seen = []
+    url = "/reports?limit=3"
+    while True:
+        resp = client.get(url, headers=auth_header(user))
+        assert resp.status_code == 200
+        seen.extend(r["id"] for r in resp.get_json())
+        cursor = resp.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+        url = f"/reports?limit=3&cursor={cursor}"
+
+    assert len(seen) == 7
+    assert len(set(seen)) == 7
+    keys = [(db.session.get(Report, i).created_at, i) for i in seen]
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_reports_filters(client, create_user, auth_header):
+    user = create_user("filter@example.com", "filter")
+    seed_reports(user, 2, status="pending", barcode="11111111")
+    seed_reports(user, 3, status="approved", barcode="22222222")
+
+    resp = client.get("/reports?status=approved", headers=auth_header(user))
+    assert [r["status"] for r in resp.get_json()] == ["approved"] * 3
+
+    resp = client.get("/reports?barcode=11111111", headers=auth_header(user))
+    assert len(resp.get_json()) == 2
+
+    resp = client.get(
+        "/reports?created_after=2025-01-01T00:01:00", headers=auth_header(user)
+    )
+    assert len(resp.get_json()) == 1
+
+    resp = client.get("/reports?cursor=not-a-cursor", headers=auth_header(user))
+    assert resp.status_code == 400
+
+    for query in ("limit=abc", "product_id=x"):
+        assert client.get(f"/reports?{query}", headers=auth_header(user)).status_code == 400
+
+
+def test_my_reports_only_returns_own(client, create_user, auth_header):
+    alice = create_user("alice@example.com", "alice")
+    bob = create_user("bob@example.com", "bob")
+    seed_reports(alice, 2)
+    seed_reports(bob, 4)
+
+    resp = client.get("/reports/mine", headers=auth_header(alice))
+    assert resp.status_code == 200
+    assert {r["user_id"] for r in resp.get_json()} == {alice.id}
+    assert len(resp.get_json()) == 2
@@ -0,0 +1,73 @@
+import time
+
+from db import db
+from models.brand import Brand
+from models.product import Product
+from models.scan_count import ScanCount
+from models.unknown_barcode import UnknownBarcode
+from scan_analytics import ScanRecorder
+
+
+def use_recorder(app, **kwargs):
+    # Flush by hand instead of in the background thread
+    recorder = ScanRecorder(app, background=False, **kwargs)
+    app.extensions["scan_analytics"] = recorder
+    return recorder
+
+
+def test_scans_are_buffered_then_upserted_per_hour(app, client):
+    recorder = use_recorder(app)
+    db.session.add(Product(name="Cola Classic", barcode="6194002400707", brand=Brand(name="Cola")))
+    db.session.commit()
+
+    for raw in ("6194002400707", "6.194002400707e12", "6194002400707"):
+        assert client.get(f"/barcode/{raw}").status_code == 200
+    assert client.get("/barcode/12345678").status_code == 404
+    assert client.get("/barcode/abc").status_code == 400  # invalid: not recorded
+    assert ScanCount.query.count() == 0  # nothing written on the request path
+
+    recorder.flush()
+    assert client.get("/barcode/12345678").status_code == 404
+    recorder.flush()
+
+    counts = {row.barcode: (row.scans, row.misses) for row in ScanCount.query}
+    assert counts == {"6194002400707": (3, 0), "12345678": (2, 2)}
+    unknown = UnknownBarcode.query.one()
+    assert (unknown.barcode, unknown.scan_count) == ("12345678", 2)
+    assert unknown.first_seen_at <= unknown.last_seen_at
+
+
+def test_full_buffer_overwrites_oldest_events(app):
+    recorder = use_recorder(app, buffer_size=2)
+    for barcode in ("11111111", "22222222", "33333333"):
+        recorder.record(barcode, found=True)
+
+    assert recorder.stats() == {"buffered": 2, "dropped": 1, "flushed": 0}
+    recorder.flush()
+    assert {row.barcode for row in ScanCount.query} == {"22222222", "33333333"}
+
+
+def test_admin_lists_top_scanned_and_missing(app, client, create_user, auth_header):
+    recorder = use_recorder(app)
+    db.session.add(Product(name="Cola Classic", barcode="6194002400707", brand=Brand(name="Cola")))
+    db.session.commit()
+    now = time.time()
+    recorder.buffer.extend(
+        [("6194002400707", True, now)] * 5
+        + [("12345678", False, now)] * 3
+        + [("87654321", False, now)]
+        + [("99999999", False, now - 3 * 86400)]  # outside the window
+    )
+    recorder.flush()
+
+    headers = auth_header(create_user("admin@example.com", "admin", role="admin"))
+    resp = client.get("/admin/scans?hours=24&limit=2", headers=headers)
+
+    assert resp.status_code == 200
+    body = resp.get_json()
+    assert body["top_scanned"] == [
+        {"barcode": "6194002400707", "scans": 5, "misses": 0},
+        {"barcode": "12345678", "scans": 3, "misses": 3},
+    ]
+    assert [row["barcode"] for row in body["top_missing"]] == ["12345678", "87654321"]
+    assert client.get("/admin/scans?hours=0", headers=headers).status_code == 400
@@ -0,0 +1,61 @@
+import json
+
+import pytest
+
+from app import create_app
+from config import Config
+from db import db
+from models.brand import Brand
+from models.product import Product
+from slow_queries import redact
+
+
+@pytest.fixture
+def logged_app(tmp_path):
+    class SlowConfig(Config):
+        SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+        SLOW_QUERY_MS = 0.0001  # everything is "slow"
+        SLOW_QUERY_LOG_FILE = str(tmp_path / "slow.log")
+
+    app = create_app(SlowConfig)
+    with app.app_context():
+        db.create_all()
+        brand = Brand(name="Cola", boycott_status=True)
+        db.session.add(Product(name="Cola Classic", barcode="6194002400707", brand=brand))
+        db.session.commit()
+        yield app
+        db.session.remove()
+
+
+def read_log(app):
+    with open(app.config["SLOW_QUERY_LOG_FILE"], encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_slow_select_is_logged_with_route_plan_and_redacted_params(logged_app):
+    resp = logged_app.test_client().get("/products?search=secret-term")
+    assert resp.status_code == 200
+
+    records = [r for r in read_log(logged_app) if r["route"] == "GET /products"]
+    record = next(r for r in records if "FROM products" in r["statement"])
+    assert record["duration_ms"] >= 0
+    assert record["dialect"] == "sqlite"
+    assert "secret-term" not in json.dumps(record)
+    assert any(str(p).startswith("<redacted str") for p in record["params"])
+    assert record["plan"] and record["analyze"] is False
+
+
+def test_writes_are_logged_without_plan(logged_app):
+    with logged_app.app_context():
+        db.session.add(Brand(name="Local", boycott_status=False))
+        db.session.commit()
+
+    insert = next(r for r in read_log(logged_app) if r["statement"].startswith("INSERT INTO brands"))
+    assert insert["route"] is None
+    assert "plan" not in insert
+
+
+def test_redact_keeps_ids_and_hides_text():
+    assert redact((5, None, True, "alice@example.com", b"\x00")) == [
+        5, None, True, "<redacted str len=17>", "<redacted bytes len=1>",
+    ]
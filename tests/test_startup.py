@@ -0,0 +1,36 @@
+import json
+import os
+import subprocess
+import sys
+
+BACKEND = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+
+PROBE = r"""
+import json, sys
+import app as app_module
+assert "app" not in vars(app_module)  # default app is built on first use
+app = app_module.create_app()
+api = app.extensions["flask-smorest"]["apis"][""]["ext_obj"]
+print(json.dumps({
+    "loaded": sorted(set(sys.argv[1:]) & set(sys.modules)),
+    "spec_built": api.spec_built,
+}))
+"""
+
+OPTIONAL = [
+    "sql_profiler",
+    "read_replicas",
+    "concurrent.futures.process",
+    "sqlalchemy.ext.asyncio",
+]
+
+
+def test_create_app_leaves_optional_subsystems_unimported():
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE, *OPTIONAL],
+        cwd=BACKEND, capture_output=True, text=True, check=True,
+        env={**os.environ, "PYTHONPATH": BACKEND, "DATABASE_URL": "sqlite:///:memory:"},
+    )
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+
+    assert result == {"loaded": [], "spec_built": False}
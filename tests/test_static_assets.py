@@ -0,0 +1,80 @@
+import gzip
+import os
+
+import pytest
+
+from app import create_app
+from config import Config
+from static_assets import build_assets
+
+FRONTEND = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "frontend")
+
+
+@pytest.fixture
+def built(tmp_path):
+    manifest = build_assets(FRONTEND, str(tmp_path))
+
+    class BuiltConfig(Config):
+        SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+        STATIC_BUILD_DIR = str(tmp_path)
+
+    return create_app(BuiltConfig).test_client(), manifest
+
+
+def test_build_fingerprints_and_rewrites_css_imports(built, tmp_path):
+    _, manifest = built
+    assert manifest["js/api.js"].startswith("js/api.") and manifest["js/api.js"].endswith(".js")
+
+    styles = (tmp_path / manifest["css/styles.css"]).read_text(encoding="utf-8")
+    variables = manifest["css/variables.css"].split("/")[-1]
+    assert f"@import './{variables}'" in styles
+    assert (tmp_path / (manifest["js/ui.js"] + ".gz")).exists()
+
+
+def test_fingerprinted_asset_is_immutable_and_precompressed(built):
+    client, manifest = built
+    url = "/static/" + manifest["js/main.js"]
+    with open(os.path.join(FRONTEND, "js", "main.js"), "rb") as f:
+        source = f.read()
+
+    resp = client.get(url, headers={"Accept-Encoding": "gzip, deflate"})
+    assert resp.status_code == 200
+    assert resp.headers["Content-Encoding"] == "gzip"
+    assert "immutable" in resp.headers["Cache-Control"]
+    assert "Accept-Encoding" in resp.headers["Vary"]
+    assert resp.mimetype == "text/javascript"
+    assert gzip.decompress(resp.data) == source
+
+    plain = client.get(url)
+    assert "Content-Encoding" not in plain.headers
+    assert plain.data == source
+
+
+def test_index_points_at_fingerprinted_assets_and_revalidates(built):
+    client, manifest = built
+
+    resp = client.get("/")
+    html = resp.get_data(as_text=True)
+    assert resp.status_code == 200
+    assert f'src="/static/{manifest["js/api.js"]}"' in html
+    assert f'href="/static/{manifest["css/styles.css"]}"' in html
+    assert "?v=" not in html
+    assert "no-cache" in resp.headers["Cache-Control"]
+
+    again = client.get("/", headers={"If-None-Match": resp.headers["ETag"].strip('"')})
+    assert again.status_code == 304
+
+    zipped = client.get("/", headers={"Accept-Encoding": "gzip"})
+    assert gzip.decompress(zipped.data).decode("utf-8") == html
+
+
+def test_without_a_build_assets_are_served_unchanged(tmp_path):
+    class UnbuiltConfig(Config):
+        SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+        STATIC_BUILD_DIR = str(tmp_path)  # no manifest.json
+
+    client = create_app(UnbuiltConfig).test_client()
+    resp = client.get("/static/js/api.js")
+    assert resp.status_code == 200
+    assert "immutable" not in resp.headers.get("Cache-Control", "")
+    assert 'src="/static/js/api.js?v=4"' in client.get("/").get_data(as_text=True)